@@ -43,6 +43,9 @@ def include_object(object, name, type_, reflected, compare_to):
         "checkpoint_migrations",
     ]:
         return False
+    # Created by its own migration only where the pgvector extension exists
+    if type_ == "table" and name == "vector_chunks":
+        return False
     return True
 
 def run_migrations_offline() -> None:
@@ -0,0 +1,35 @@
+"""add_chunks
+
+Revision ID: 20261019_chunks
+Revises: 20261019_vector_chunks
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261019_chunks'
+down_revision = '20261019_vector_chunks'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('chunks',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('doc_id', sa.UUID(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('page', sa.Integer(), nullable=True),
+    sa.Column('chunk_index', sa.Integer(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['doc_id'], ['documents.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_chunks_doc_id_seq', 'chunks', ['doc_id', 'seq'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_chunks_doc_id_seq', table_name='chunks')
+    op.drop_table('chunks')
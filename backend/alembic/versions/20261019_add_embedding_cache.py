@@ -0,0 +1,30 @@
+"""add_embedding_cache
+
+Revision ID: 20261019_embedding_cache
+Revises: b8f8c2ac5f5d
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261019_embedding_cache'
+down_revision = 'b8f8c2ac5f5d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('embedding_cache',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('vector', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('embedding_cache')
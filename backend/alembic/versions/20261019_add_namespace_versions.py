@@ -0,0 +1,28 @@
+"""add_namespace_versions
+
+Revision ID: 20261019_namespace_versions
+Revises: 20261019_chunks
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261019_namespace_versions'
+down_revision = '20261019_chunks'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('namespace_versions',
+    sa.Column('namespace', sa.String(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('namespace')
+    )
+
+
+def downgrade():
+    op.drop_table('namespace_versions')
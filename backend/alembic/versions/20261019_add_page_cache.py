@@ -0,0 +1,33 @@
+"""add_page_cache
+
+Revision ID: 20261019_page_cache
+Revises: 20261019_embedding_cache
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261019_page_cache'
+down_revision = '20261019_embedding_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('page_cache',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('url', sa.Text(), nullable=False),
+    sa.Column('title', sa.Text(), nullable=True),
+    sa.Column('markdown', sa.LargeBinary(), nullable=False),
+    sa.Column('etag', sa.String(), nullable=True),
+    sa.Column('last_modified', sa.String(), nullable=True),
+    sa.Column('fetched_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('page_cache')
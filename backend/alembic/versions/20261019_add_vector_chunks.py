@@ -0,0 +1,51 @@
+"""add_vector_chunks
+
+Revision ID: 20261019_vector_chunks
+Revises: 20261019_page_cache
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = '20261019_vector_chunks'
+down_revision = '20261019_page_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Only servers with the pgvector extension installed (e.g. the
+    # pgvector/pgvector image) get the table; VECTOR_STORE=pgvector needs it.
+    available = op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'vector'")
+    ).scalar()
+    if not available:
+        print("pgvector extension not available; skipping vector_chunks (VECTOR_STORE=pgvector unsupported on this server)")
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.execute(f"""
+        CREATE TABLE vector_chunks (
+            user_id UUID NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            bin_id UUID NOT NULL REFERENCES knowledge_bins (id) ON DELETE CASCADE,
+            id VARCHAR NOT NULL,
+            doc_id UUID REFERENCES documents (id) ON DELETE CASCADE,
+            metadata JSONB NOT NULL,
+            embedding vector({int(settings.EMBEDDING_DIMENSION)}) NOT NULL,
+            PRIMARY KEY (user_id, bin_id, id)
+        )
+    """)
+    op.create_index(op.f('ix_vector_chunks_doc_id'), 'vector_chunks', ['doc_id'], unique=False)
+    op.execute(
+        "CREATE INDEX ix_vector_chunks_embedding_hnsw ON vector_chunks "
+        "USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+    )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS vector_chunks")
@@ -0,0 +1,84 @@
+"""
+Run Budgets - Per-run deadline and per-node time budgets for the agent graph
+
+build_graph() wraps nodes with with_budget(). Each wrapped node runs under
+min(its own budget, time left until the run's `run_deadline`) and can read
+what is left through remaining_budget(). A node that overruns is cancelled
+and its on_timeout fallback (sync or async) supplies partial results instead of an error;
+timeouts are counted per node in `node_timeouts`.
+"""
+import asyncio
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.types import Command
+
+from app.core.config import settings
+
+_node_deadline: ContextVar[Optional[float]] = ContextVar("node_deadline", default=None)
+_partial: ContextVar[Optional[Dict[str, Any]]] = ContextVar("node_partial", default=None)
+
+TimeoutFallback = Callable[[Dict[str, Any], Dict[str, Any]], Any]
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left for the current node, or None outside a budgeted node."""
+    deadline = _node_deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def partial_results() -> Dict[str, Any]:
+    """Scratch dict a node can fill as it goes; its on_timeout fallback receives it."""
+    partial = _partial.get()
+    return partial if partial is not None else {}
+
+
+def new_run_deadline() -> float:
+    return time.time() + settings.RUN_DEADLINE_SECONDS
+
+
+def _count_timeout(result: Any, name: str) -> Any:
+    counted = {"node_timeouts": {name: 1}}
+    if isinstance(result, Command):
+        return Command(update={**(result.update or {}), **counted}, goto=result.goto)
+    return {**(result or {}), **counted}
+
+
+def with_budget(name: str, node: Callable, on_timeout: TimeoutFallback, budget_seconds: Optional[float] = None):
+    """Wrap a graph node so it runs under its time budget (NODE_TIME_BUDGETS[name] by default)."""
+    budget_seconds = budget_seconds or settings.NODE_TIME_BUDGETS.get(name, settings.NODE_DEFAULT_BUDGET_SECONDS)
+    min_budget_seconds = settings.NODE_MIN_BUDGETS.get(name, settings.NODE_MIN_BUDGET_SECONDS)
+    accepts_config = "config" in inspect.signature(node).parameters
+
+    async def budgeted_node(state: Dict[str, Any], config: RunnableConfig):
+        budget = budget_seconds
+        run_deadline = state.get("run_deadline")
+        if run_deadline:
+            # Past the run deadline nodes still get a short grace period to wrap up
+            budget = min(budget, max(run_deadline - time.time(), min_budget_seconds))
+
+        partial: Dict[str, Any] = {}
+        deadline_token = _node_deadline.set(time.monotonic() + budget)
+        partial_token = _partial.set(partial)
+        try:
+            result = node(state, config) if accepts_config else node(state)
+            if inspect.isawaitable(result):
+                result = await asyncio.wait_for(result, timeout=budget)
+            return result
+        except asyncio.TimeoutError:
+            print(f"⏱️ Node {name} exceeded its {budget:.0f}s budget; continuing with partial results")
+            fallback = on_timeout(state, partial)
+            if inspect.isawaitable(fallback):
+                fallback = await fallback
+            return _count_timeout(fallback, name)
+        finally:
+            _partial.reset(partial_token)
+            _node_deadline.reset(deadline_token)
+
+    budgeted_node.__name__ = getattr(node, "__name__", name)
+    return budgeted_node
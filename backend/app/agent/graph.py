@@ -1,14 +1,17 @@
 from langgraph.graph import StateGraph, START, END
 from langgraph.types import Send
-from app.agent.state import AgentState
-from app.agent.nodes.style_analyst import style_analyst_node
-from app.agent.nodes.internal_indexer import internal_indexer_node
-from app.agent.nodes.researcher import researcher_node
-from app.agent.nodes.planner import planner_node
+from langchain_core.runnables import RunnableConfig
+from app.agent.state import AgentState, DeepResearchOutput
+from app.agent.budget import with_budget
+from app.agent.nodes.style_analyst import style_analyst_node, style_analyst_timeout_fallback
+from app.agent.nodes.internal_indexer import internal_indexer_node, internal_indexer_timeout_fallback
+from app.agent.nodes.researcher import researcher_node, researcher_timeout_fallback
+from app.agent.nodes.planner import planner_node, planner_timeout_fallback
 from app.agent.nodes.human_approval import human_approval_node
-from app.agent.nodes.writer import writer_node
-from app.agent.nodes.critic import critic_node
-from app.agent.nodes.visuals import visuals_node
+from app.agent.nodes.section_retrieval import section_retrieval_node, section_retrieval_timeout_fallback
+from app.agent.nodes.writer import writer_node, writer_timeout_fallback
+from app.agent.nodes.critic import critic_node, critic_timeout_fallback
+from app.agent.nodes.visuals import visuals_node, visuals_timeout_fallback
 from app.agent.nodes.publisher import publisher_node
 from app.agent.nodes.deep_research import (
     generate_query_node, 
@@ -16,23 +19,20 @@ from app.agent.nodes.deep_research import (
     social_research_node,
     academic_research_node,
     reflection_node, 
-    finalize_answer_node
+    finalize_answer_node,
+    deep_research_timeout_fallback
 )
 
-def build_graph():
-    builder = StateGraph(AgentState)
-    
-    builder.add_node("internal_indexer", internal_indexer_node)
-    builder.add_node("style_analyst", style_analyst_node)
-    builder.add_node("researcher", researcher_node)
-    builder.add_node("planner", planner_node)
-    builder.add_node("human_approval", human_approval_node)
-    builder.add_node("writer", writer_node)
-    builder.add_node("critic", critic_node)
-    builder.add_node("visuals", visuals_node)
-    builder.add_node("publisher", publisher_node)
+def build_deep_research_graph():
+    """
+    The deep research loop as its own graph.
+
+    It is mounted as a single node of the main graph so the whole loop runs
+    alongside internal_indexer and style_analyst instead of waiting for them
+    at every superstep. Only the research keys flow back to the parent.
+    """
+    builder = StateGraph(AgentState, output_schema=DeepResearchOutput)
     
-    # Deep Research Nodes
     builder.add_node("deep_generate_query", generate_query_node)
     builder.add_node("deep_web_research", web_research_node)
     builder.add_node("deep_social_research", social_research_node)
@@ -40,31 +40,27 @@ def build_graph():
     builder.add_node("deep_reflection", reflection_node)
     builder.add_node("deep_finalize", finalize_answer_node)
     
-    # Research Phase (Sequential for safety)
-    builder.add_edge(START, "internal_indexer")
-    builder.add_edge("internal_indexer", "style_analyst")
-    
-    # Conditional Routing for Research
-    def route_research(state):
-        if state.get("deep_research_mode"):
-            return "deep_generate_query"
-        return "researcher"
-
-    builder.add_conditional_edges("style_analyst", route_research, ["deep_generate_query", "researcher"])
+    builder.add_edge(START, "deep_generate_query")
     
     # Deep Research Loop - Route to parallel research based on selected sources
     def route_to_research_tasks(state):
         queries = state.get("generated_queries", [])
         sources = state.get("research_sources", ["web", "internal"])
+        # URLs already cited in earlier loops; their pages are not scraped again
+        seen_urls = state.get("seen_research_urls", [])
         tasks = []
         
+        # Every generated query was a near-duplicate of one already searched
+        if not queries:
+            return "deep_finalize"
+        
         # Always run web research if 'web' is in sources
         if "web" in sources:
-            tasks.extend([Send("deep_web_research", {"query": q}) for q in queries])
+            tasks.extend([Send("deep_web_research", {"query": q, "seen_urls": seen_urls}) for q in queries])
         
         # Add social research if enabled (only first query to avoid rate limits)
         if "social" in sources and queries:
-            tasks.append(Send("deep_social_research", {"query": queries[0]}))
+            tasks.append(Send("deep_social_research", {"query": queries[0], "seen_urls": seen_urls}))
         
         # Add academic research if enabled (only first query)
         if "academic" in sources and queries:
@@ -75,28 +71,73 @@ def build_graph():
     builder.add_conditional_edges(
         "deep_generate_query", 
         route_to_research_tasks, 
-        ["deep_web_research", "deep_social_research", "deep_academic_research"]
+        ["deep_web_research", "deep_social_research", "deep_academic_research", "deep_finalize"]
     )
     builder.add_edge("deep_web_research", "deep_reflection")
     builder.add_edge("deep_social_research", "deep_reflection")
     builder.add_edge("deep_academic_research", "deep_reflection")
     
     def route_after_reflection(state):
-        if state.get("is_sufficient") or state.get("research_loop_count", 0) > 3:
+        if state.get("research_stop_reason") or state.get("is_sufficient"):
             return "deep_finalize"
         return "deep_generate_query"
 
     builder.add_conditional_edges("deep_reflection", route_after_reflection, ["deep_finalize", "deep_generate_query"])
+    builder.add_edge("deep_finalize", END)
+    
+    return builder
+
+def build_graph():
+    builder = StateGraph(AgentState)
     
-    # Rejoin Main Flow
-    builder.add_edge("deep_finalize", "planner")
-    builder.add_edge("researcher", "planner")
+    # Nodes run under their NODE_TIME_BUDGETS (capped by the run deadline) and
+    # fall back to partial results on overrun. human_approval waits on the
+    # user and publisher is instant. deep_research also stops its loop on its
+    # own time budget; the node budget bounds a loop that is still running.
+    builder.add_node("internal_indexer", with_budget("internal_indexer", internal_indexer_node, internal_indexer_timeout_fallback))
+    builder.add_node("style_analyst", with_budget("style_analyst", style_analyst_node, style_analyst_timeout_fallback))
+    builder.add_node("researcher", with_budget("researcher", researcher_node, researcher_timeout_fallback))
+    deep_research_graph = build_deep_research_graph().compile()
+
+    async def deep_research_node(state: AgentState, config: RunnableConfig):
+        return await deep_research_graph.ainvoke(state, config)
+
+    builder.add_node("deep_research", with_budget("deep_research", deep_research_node, deep_research_timeout_fallback))
+    builder.add_node("planner", with_budget("planner", planner_node, planner_timeout_fallback))
+    builder.add_node("human_approval", human_approval_node)
+    builder.add_node("section_retrieval", with_budget("section_retrieval", section_retrieval_node, section_retrieval_timeout_fallback))
+    builder.add_node("writer", with_budget("writer", writer_node, writer_timeout_fallback))
+    builder.add_node("critic", with_budget("critic", critic_node, critic_timeout_fallback))
+    builder.add_node("visuals", with_budget("visuals", visuals_node, visuals_timeout_fallback))
+    builder.add_node("publisher", publisher_node)
+    
+    # Opening Phase (Parallel)
+    # The sitemap crawl, tone-URL analysis and research don't depend on each
+    # other, so they all start at once and join again before the planner.
+    builder.add_edge(START, "internal_indexer")
+    builder.add_edge(START, "style_analyst")
+    
+    # Conditional Routing for Research
+    def route_research(state):
+        if state.get("deep_research_mode"):
+            return "deep_research"
+        return "researcher"
+
+    builder.add_conditional_edges(START, route_research, ["deep_research", "researcher"])
+    
+    # Rejoin Main Flow - planner waits for the indexer, the style analyst and
+    # whichever research path ran
+    builder.add_edge(["internal_indexer", "style_analyst", "researcher"], "planner")
+    builder.add_edge(["internal_indexer", "style_analyst", "deep_research"], "planner")
     
     # Planning Phase
     builder.add_edge("planner", "human_approval")
     
+    # Targeted internal retrieval for the approved sections
+    # human_approval -> section_retrieval (via Command)
+    builder.add_edge("section_retrieval", "writer")
+    
     # Generation Loop
-    # human_approval -> writer (via Command)
     # writer -> critic (via Command)
     # critic -> writer (retry) or visuals (pass) (via Command)
     # visuals -> writer (next section) or publisher (done) (via Command)
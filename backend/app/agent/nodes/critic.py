@@ -136,3 +136,7 @@ async def critic_node(state: AgentState):
         },
         goto="writer"
     )
+
+def critic_timeout_fallback(state: AgentState, partial: dict):
+    # The draft stands as written
+    return Command(goto="visuals")
@@ -1,46 +1,134 @@
 import os
-from typing import List, Dict, Any
+import re
+import json
+import time
+from typing import List, Dict, Any, Set
 import asyncio
+import numpy as np
 from app.services.llm_service import llm_service
+from app.services.keyphrase_service import keyphrase_service
 from app.services.firecrawl_service import firecrawl_service
 from app.services.arxiv_service import arxiv_service
 from app.agent.state import AgentState, ResearchResult, Citation
 from app.core.config import settings
 from pydantic import BaseModel
 from app.services.embedding_service import embedding_service
-from app.services.pinecone_service import pinecone_service
+from app.services.retrieval_service import retrieval_service
+from app.utils.llm_logger import llm_logger
+from app.utils.vector_math import to_matrix, normalize_rows
+from app.utils.urls import canonicalize_url
+from app.agent.budget import partial_results
+
+def _keep_partial(update: Dict[str, Any]) -> Dict[str, Any]:
+    # Collected for deep_research_timeout_fallback in case the loop runs out of time
+    partial_results().setdefault("deep_research_results", []).extend(update["deep_research_results"])
+    return update
 
 # --- Node 1: Generate Queries ---
+async def _dedupe_queries(queries: List[str], executed: List[Dict[str, Any]], threshold: float):
+    """
+    Drop queries that are near-duplicates of an already executed query or of
+    an earlier query in the same batch. Returns (kept_entries, skipped_queries)
+    where each kept entry is {"query": str, "embedding": List[float]}.
+    """
+    queries = [q.strip() for q in queries if q and q.strip()]
+    if not queries:
+        return [], []
+
+    vectors = await asyncio.to_thread(embedding_service.embed_documents, queries)
+    candidates = normalize_rows(to_matrix(vectors))
+    history = normalize_rows(to_matrix([e["embedding"] for e in executed if e.get("embedding")]))
+
+    kept: List[Dict[str, Any]] = []
+    kept_rows: List[int] = []
+    skipped: List[str] = []
+    for i, q in enumerate(queries):
+        best = 0.0
+        if history.size:
+            best = float(np.max(history @ candidates[i]))
+        if kept_rows:
+            best = max(best, float(np.max(candidates[kept_rows] @ candidates[i])))
+        if best >= threshold:
+            skipped.append(q)
+            continue
+        kept_rows.append(i)
+        kept.append({"query": q, "embedding": list(map(float, vectors[i]))})
+    return kept, skipped
+
 async def generate_query_node(state: AgentState):
     topic = state["topic"]
     loop_count = state.get("research_loop_count", 0)
     use_local = state.get("use_local", False)
+    executed = state.get("executed_queries", [])
     
-    llm = llm_service.get_llm(
-        model_provider=state.get("model_provider", "anthropic"),
-        model_name=state.get("model_name", "claude-haiku-4-5"),
-        use_local=use_local
-    )
+    if state.get("fast_query_mode"):
+        # Keyphrase-based queries: no LLM round-trip before the searches start
+        queries = keyphrase_service.generate_queries(
+            topic,
+            state.get("research_guidelines", []),
+            state.get("extra_context", ""),
+            state.get("target_audience", ""),
+            num_queries=3,
+            exclude=[e["query"] for e in executed]
+        )
+    else:
+        llm = llm_service.get_llm(
+            model_provider=state.get("model_provider", "anthropic"),
+            model_name=state.get("model_name", "claude-haiku-4-5"),
+            use_local=use_local
+        )
     
-    prompt = f"""
-    You are a research planner. 
-    Topic: {topic}
-    Current Loop: {loop_count}
+        already_run = "\n".join(f"- {e['query']}" for e in executed) or "None"
+        prompt = f"""
+        You are a research planner. 
+        Topic: {topic}
+        Current Loop: {loop_count}
     
-    Break the topic into 3 specific, search-optimized queries to gather comprehensive information.
-    If this is a follow-up loop, focus on missing details.
-    """
+        Queries already executed (do not repeat or paraphrase these):
+        {already_run}
+    
+        Break the topic into 3 specific, search-optimized queries to gather comprehensive information.
+        If this is a follow-up loop, focus on missing details.
+        """
     
-    class QueryList(BaseModel):
-        queries: List[str]
+        class QueryList(BaseModel):
+            queries: List[str]
 
-    structured_llm = llm.with_structured_output(QueryList)
-    result = await structured_llm.ainvoke(prompt)
+        structured_llm = llm.with_structured_output(QueryList)
+        result = await structured_llm.ainvoke(prompt)
+        queries = result.queries
     
-    return {
-        "generated_queries": result.queries,
-        "research_loop_count": loop_count + 1
+    try:
+        kept, skipped = await _dedupe_queries(queries, executed, settings.QUERY_DEDUP_THRESHOLD)
+    except Exception as e:
+        print(f"Query dedup failed, running all queries: {e}")
+        kept, skipped = [{"query": q, "embedding": []} for q in queries], []
+    
+    skipped_total = state.get("skipped_query_count", 0) + len(skipped)
+    if skipped:
+        print(f"Deep Research loop {loop_count}: skipped {len(skipped)} near-duplicate queries: {skipped}")
+    
+    # Trim the fan-out so this loop stays within the per-run search budget
+    sources = state.get("research_sources", ["web", "internal"])
+    searches_per_query = 1 if "web" in sources else 0
+    fixed_searches = int("social" in sources) + int("academic" in sources)
+    remaining = settings.DEEP_RESEARCH_MAX_SEARCHES - state.get("research_search_count", 0)
+    while kept and searches_per_query * len(kept) + fixed_searches > remaining:
+        kept.pop()
+    searches = searches_per_query * len(kept) + fixed_searches if kept else 0
+    
+    update = {
+        "generated_queries": [e["query"] for e in kept],
+        "executed_queries": executed + kept,
+        "skipped_query_count": skipped_total,
+        "research_loop_count": loop_count + 1,
+        "research_started_at": state.get("research_started_at") or time.time(),
+        "research_search_count": state.get("research_search_count", 0) + searches
     }
+    if not kept:
+        update["research_stop_reason"] = "no_new_queries" if skipped or not queries else "search_budget"
+        print(f"Deep Research stopping before loop {loop_count}: {update['research_stop_reason']}")
+    return update
 
 # --- Node 2: Web Research (Parallel) ---
 async def web_research_node(state: Dict):
@@ -56,7 +144,10 @@ async def web_research_node(state: Dict):
     
     try:
         # Use Firecrawl for search
-        web_results = await asyncio.to_thread(firecrawl_service.search, query, limit=3)
+        # Pages found in earlier loops are not scraped again
+        seen = {canonicalize_url(u) for u in state.get("seen_urls", [])}
+        web_results = await firecrawl_service.asearch(query, limit=3, seen_urls=seen)
+        search_stats = [web_results["stats"]]
         
         if hasattr(web_results, 'model_dump'):
             web_results = web_results.model_dump()
@@ -85,16 +176,18 @@ async def web_research_node(state: Dict):
         print(f"Deep Research Failed for {query}: {e}")
         content_text = f"Search failed for {query}. Error: {str(e)}"
         citations = []
+        search_stats = []
 
-    return {
+    return _keep_partial({
         "deep_research_results": [
             ResearchResult(
                 query=query, 
                 summary=content_text, 
                 citations=citations
             )
-        ]
-    }
+        ],
+        "search_phase_stats": search_stats
+    })
 
 # --- Node 2B: Social Research (Parallel) ---
 async def social_research_node(state: Dict):
@@ -105,7 +198,9 @@ async def social_research_node(state: Dict):
         # Search Reddit/Twitter via Firecrawl using site filter
         clean_q = query.strip('"').strip("'")
         social_query = f"{clean_q} site:reddit.com OR site:x.com OR site:twitter.com"
-        social_results = await asyncio.to_thread(firecrawl_service.search, social_query, limit=3)
+        seen = {canonicalize_url(u) for u in state.get("seen_urls", [])}
+        social_results = await firecrawl_service.asearch(social_query, limit=3, seen_urls=seen)
+        search_stats = [social_results["stats"]]
         
         if hasattr(social_results, 'model_dump'):
             social_results = social_results.model_dump()
@@ -134,16 +229,18 @@ async def social_research_node(state: Dict):
         print(f"Deep Social Research Failed for {query}: {e}")
         content_text = f"Social search failed for {query}. Error: {str(e)}"
         citations = []
+        search_stats = []
 
-    return {
+    return _keep_partial({
         "deep_research_results": [
             ResearchResult(
                 query=query, 
                 summary=content_text, 
                 citations=citations
             )
-        ]
-    }
+        ],
+        "search_phase_stats": search_stats
+    })
 
 # --- Node 2C: Academic Research (Parallel) ---
 async def academic_research_node(state: Dict):
@@ -180,7 +277,7 @@ async def academic_research_node(state: Dict):
         content_text = f"Academic search failed for {query}. Error: {str(e)}"
         citations = []
 
-    return {
+    return _keep_partial({
         "deep_research_results": [
             ResearchResult(
                 query=query, 
@@ -188,17 +285,101 @@ async def academic_research_node(state: Dict):
                 citations=citations
             )
         ]
-    }
+    })
 
 # --- Node 3: Reflection ---
+_STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "from", "into", "what", "when", "where", "which",
+    "how", "why", "are", "was", "were", "will", "can", "should", "about", "their", "your", "our",
+    "use", "using", "vs", "versus", "its", "has", "have", "not", "all", "any", "more", "most",
+    "include", "focus", "data", "blog", "post"
+}
+
+def _relevant_terms(state: AgentState) -> Set[str]:
+    """Content words from the topic and guidelines that good research should cover."""
+    text = " ".join([state.get("topic", ""), *state.get("research_guidelines", [])]).lower()
+    return {w for w in re.findall(r"[a-z0-9][a-z0-9+\-]{2,}", text) if w not in _STOPWORDS}
+
+def _measure_loop_gain(state: AgentState, new_results: List[ResearchResult]) -> Dict[str, Any]:
+    """Marginal gain of the latest loop: new URLs, new passages and term coverage."""
+    # Canonical URLs, so tracking parameters or a trailing slash don't count as a new page
+    seen_urls = {canonicalize_url(u) for u in state.get("seen_research_urls", [])}
+    new_urls: List[str] = []
+    new_passages = 0
+    for res in new_results:
+        for cit in res.citations:
+            if not cit.url or cit.url == "No URL":
+                continue
+            url = canonicalize_url(cit.url)
+            if url in seen_urls:
+                continue
+            seen_urls.add(url)
+            new_urls.append(url)
+            if len((cit.content or "").strip()) >= 200:
+                new_passages += 1
+
+    terms = _relevant_terms(state)
+    # Only results that returned sources count: failure summaries echo the query terms
+    all_text = " ".join(r.summary for r in state.get("deep_research_results", []) if r.citations).lower()
+    coverage = sum(1 for t in terms if t in all_text) / len(terms) if terms else 1.0
+    previous = state.get("research_loop_metrics", [])
+    prev_coverage = previous[-1]["term_coverage"] if previous else 0.0
+
+    return {
+        "loop": state.get("research_loop_count", 0),
+        "new_urls": len(new_urls),
+        "new_passages": new_passages,
+        "term_coverage": round(coverage, 3),
+        "coverage_gain": round(coverage - prev_coverage, 3),
+        "searches": state.get("research_search_count", 0),
+        "elapsed_s": round(time.time() - (state.get("research_started_at") or time.time()), 1),
+        "_new_url_list": new_urls
+    }
+
+def _budget_stop_reason(metrics: Dict[str, Any]) -> str:
+    """Reason to stop based on budgets and measured gain, or "" to keep going."""
+    if metrics["loop"] >= settings.DEEP_RESEARCH_MAX_LOOPS:
+        return "max_loops"
+    if metrics["elapsed_s"] >= settings.DEEP_RESEARCH_TIME_BUDGET_SECONDS:
+        return "time_budget"
+    if metrics["searches"] >= settings.DEEP_RESEARCH_MAX_SEARCHES:
+        return "search_budget"
+    if (
+        metrics["loop"] >= 2
+        and metrics["new_urls"] < settings.DEEP_RESEARCH_MIN_NEW_URLS
+        and metrics["coverage_gain"] < settings.DEEP_RESEARCH_MIN_COVERAGE_GAIN
+    ):
+        return "low_marginal_gain"
+    return ""
+
 async def reflection_node(state: AgentState):
     topic = state["topic"]
     results = state.get("deep_research_results", [])
     loop_count = state.get("research_loop_count", 0)
     use_local = state.get("use_local", False)
+    coverage_summary = state.get("coverage_summary", "")
+    reflected_count = state.get("reflected_results_count", 0)
+    
+    # Only the results added since the last reflection are sent in full;
+    # everything older is represented by the running coverage summary.
+    new_results = results[reflected_count:]
+    
+    metrics = _measure_loop_gain(state, new_results)
+    new_url_list = metrics.pop("_new_url_list")
+    loop_update = {
+        "reflected_results_count": len(results),
+        "seen_research_urls": state.get("seen_research_urls", []) + new_url_list,
+        "research_loop_metrics": state.get("research_loop_metrics", []) + [metrics]
+    }
+    print(f"Deep Research loop {loop_count} gain: {metrics}")
     
-    # Summarize current findings
-    findings_summary = "\n\n".join([f"Query: {r.query}\nSummary: {r.summary}" for r in results])
+    # Budget and gain checks need no LLM call, so stop before paying for one
+    stop_reason = _budget_stop_reason(metrics)
+    if stop_reason:
+        print(f"Deep Research stopping after loop {loop_count}: {stop_reason}")
+        return {**loop_update, "research_stop_reason": stop_reason}
+    
+    findings_summary = "\n\n".join([f"Query: {r.query}\nSummary: {r.summary}" for r in new_results])
     
     llm = llm_service.get_llm(
         model_provider=state.get("model_provider", "anthropic"),
@@ -209,33 +390,63 @@ async def reflection_node(state: AgentState):
     class ReflectionOutput(BaseModel):
         is_sufficient: bool
         feedback: str
+        coverage_summary: str
 
     prompt = f"""
     Review the current research findings for the topic: "{topic}"
     
-    Findings:
-    {findings_summary}
+    Coverage So Far (summary of findings from earlier loops):
+    {coverage_summary or "None yet - this is the first loop."}
+    
+    New Findings (this loop):
+    {findings_summary or "No new findings."}
     
-    Are these findings sufficient to write a comprehensive blog post?
+    Are the findings so far sufficient to write a comprehensive blog post?
     If yes, set is_sufficient to True.
     If no, explain what is missing.
+    
+    Also return coverage_summary: an updated, compact summary (max 200 words) of everything
+    covered so far, merging the previous coverage with the new findings. List key facts,
+    subtopics and notable sources. It replaces the previous summary in the next loop.
     """
     
     structured_llm = llm.with_structured_output(ReflectionOutput)
     result = await structured_llm.ainvoke(prompt)
     
-    return {
+    llm_logger.log_call(
+        thread_id=state.get("user_id", "unknown"),
+        node_name=f"deep_reflection_loop_{loop_count}",
+        prompt=prompt,
+        response=json.dumps(result.model_dump(), indent=2),
+        metadata={
+            "loop": loop_count,
+            "new_results": len(new_results),
+            "total_results": len(results),
+            "coverage_summary_chars": len(coverage_summary),
+            "prompt_tokens_estimate": len(prompt) // 4,
+            "is_sufficient": result.is_sufficient
+        },
+        model_info={
+            "provider": state.get("model_provider", "anthropic"),
+            "name": state.get("model_name", "claude-haiku-4-5")
+        }
+    )
+    
+    update = {
+        **loop_update,
         "is_sufficient": result.is_sufficient,
-        # We don't strictly need to store feedback, but it helps debugging
+        "coverage_summary": result.coverage_summary
     }
+    if result.is_sufficient:
+        update["research_stop_reason"] = "sufficient"
+        print(f"Deep Research stopping after loop {loop_count}: sufficient")
+    return update
 
 # --- Node 4: Finalize Answer (Adapter) ---
-async def finalize_answer_node(state: AgentState):
+def _research_data_from_results(deep_results: List[ResearchResult], research_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     # Convert Deep Research Results into the format expected by the 'planner' node
     # Planner expects 'research_data' as List[Dict]
-    
-    deep_results = state.get("deep_research_results", [])
-    research_data = list(state.get("research_data") or [])
+    research_data = list(research_data or [])
     
     # Categorize results by detecting source type from citations
     web_count = 0
@@ -274,6 +485,10 @@ async def finalize_answer_node(state: AgentState):
                 "title": cit.title,
                 "content": cit.content or cit.title # Fallback if content empty
             })
+    return research_data
+
+async def finalize_answer_node(state: AgentState):
+    research_data = _research_data_from_results(state.get("deep_research_results", []), state.get("research_data"))
 
     internal_results = await _run_internal_search(state)
     # Prioritize internal findings by prepending them
@@ -297,49 +512,32 @@ async def _run_internal_search(state: AgentState) -> List[Dict[str, Any]]:
     queries_to_run = [q for q in queries if q] or [state.get("topic", "")]
     queries_to_run = queries_to_run[:2]
 
-    results: List[Dict[str, Any]] = []
-
-    for q in queries_to_run:
-        try:
-            query_embedding = await asyncio.to_thread(embedding_service.embed_query, q)
-        except Exception as e:
-            print(f"Deep internal search embedding failed for query '{q}': {e}")
-            continue
-
-        for bin_id in bins:
-            namespace = f"{user_id}_{bin_id}"
-            try:
-                query_response = await asyncio.to_thread(
-                    pinecone_service.query_vectors,
-                    vector=query_embedding,
-                    namespace=namespace,
-                    top_k=3
-                )
-            except Exception as e:
-                print(f"Deep internal search Pinecone error for namespace {namespace}: {e}")
-                continue
-
-            if hasattr(query_response, "matches"):
-                matches = query_response.matches
-            elif isinstance(query_response, dict):
-                matches = query_response.get("matches", [])
-            else:
-                matches = []
-
-            for match in matches:
-                if isinstance(match, dict):
-                    metadata = match.get("metadata", {})
-                else:
-                    metadata = getattr(match, "metadata", {})
-                    if hasattr(metadata, "to_dict"):
-                        metadata = metadata.to_dict()
+    try:
+        hits = await retrieval_service.search(queries_to_run, user_id, bins, top_k=3)
+    except Exception as e:
+        print(f"Deep internal search failed: {e}")
+        return []
 
-                results.append({
-                    "source_id": f"int_{str(bin_id)[:4]}_L{loop_count}_{len(results)+1}",
-                    "source": "internal",
-                    "title": metadata.get("source", "Internal Doc"),
-                    "url": "Internal Knowledge Base",
-                    "content": metadata.get("text", "")
-                })
+    results: List[Dict[str, Any]] = []
+    for hit in hits:
+        metadata = hit["metadata"]
+        results.append({
+            "source_id": f"int_{str(hit['bin_id'])[:4]}_L{loop_count}_{len(results)+1}",
+            "source": "internal",
+            "title": metadata.get("source", "Internal Doc"),
+            "url": "Internal Knowledge Base",
+            "content": metadata.get("text", "")
+        })
 
     return results
+
+def deep_research_timeout_fallback(state: AgentState, partial: Dict[str, Any]) -> Dict[str, Any]:
+    # Whatever the searches found before the loop ran out of time, without
+    # another round of internal search
+    results = partial.get("deep_research_results", [])
+    return {
+        "research_data": _research_data_from_results(results, state.get("research_data")),
+        "deep_research_results": results,
+        "research_timeouts": ["deep_research"],
+        "research_stop_reason": "node_budget"
+    }
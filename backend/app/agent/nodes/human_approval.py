@@ -7,7 +7,7 @@ def human_approval_node(state: AgentState):
     if user_feedback and "approved_outline" in user_feedback:
         return Command(
             update={"outline": user_feedback["approved_outline"]},
-            goto="writer"
+            goto="section_retrieval"
         )
     
     return Command(goto="planner")
@@ -7,6 +7,10 @@ from app.core.database import AsyncSessionLocal
 from app.core.models import InternalIndex
 from sqlalchemy import select, delete
 from datetime import datetime, timedelta, timezone
+from app.utils.singleflight import SingleFlight
+from app.agent.budget import remaining_budget, partial_results
+
+indexer_flight = SingleFlight("internal_indexer")
 
 async def fetch_url_content(client: httpx.AsyncClient, url: str) -> bytes | None:
     try:
@@ -60,6 +64,14 @@ async def internal_indexer_node(state: AgentState) -> Dict[str, Any]:
     
     domain_key = target_domain.replace("https://", "").replace("http://", "").split("/")[0]
 
+    # Concurrent runs for the same domain share one crawl (and one bulk insert)
+    internal_links = await indexer_flight.do(domain_key, lambda: index_domain(target_domain, domain_key))
+    return {"internal_links": list(internal_links)}
+
+def internal_indexer_timeout_fallback(state: AgentState, partial: Dict[str, Any]) -> Dict[str, Any]:
+    return {"internal_links": list(partial.get("internal_links", []))}
+
+async def index_domain(target_domain: str, domain_key: str) -> List[Dict[str, str]]:
     # Check Cache
     async with AsyncSessionLocal() as db:
         # Check if we have recent data (last 24h)
@@ -73,7 +85,7 @@ async def internal_indexer_node(state: AgentState) -> Dict[str, Any]:
             now_naive = datetime.now(timezone.utc).replace(tzinfo=None)
             if cached_links[0].last_scraped > now_naive - timedelta(hours=24):
                 print(f"Using cached sitemap for {domain_key}")
-                return {"internal_links": [{"url": l.url, "title": l.title} for l in cached_links]}
+                return [{"url": l.url, "title": l.title} for l in cached_links]
             else:
                 # Stale, delete old
                 await db.execute(delete(InternalIndex).where(InternalIndex.domain == domain_key))
@@ -81,6 +93,9 @@ async def internal_indexer_node(state: AgentState) -> Dict[str, Any]:
 
     internal_links = []
     visited_urls = set()
+    # Handed back as partial results if the node runs out of time
+    partial_results()["internal_links"] = internal_links
+    truncated = False
     
     headers = {"User-Agent": "Mozilla/5.0 (compatible; ContentStrategistBot/1.0)"}
     async with httpx.AsyncClient(headers=headers, follow_redirects=True) as client:
@@ -110,6 +125,11 @@ async def internal_indexer_node(state: AgentState) -> Dict[str, Any]:
         processed_sitemaps = set()
         
         while sitemap_queue:
+            budget = remaining_budget()
+            if budget is not None and budget < 2:
+                print(f"Sitemap crawl for {domain_key} out of time after {len(internal_links)} links")
+                truncated = True
+                break
             current_sitemap = sitemap_queue.pop(0)
             if current_sitemap in processed_sitemaps:
                 continue
@@ -143,8 +163,8 @@ async def internal_indexer_node(state: AgentState) -> Dict[str, Any]:
             if len(internal_links) > 5000:
                 break
 
-    # Save to Cache
-    if internal_links:
+    # Save to Cache (a crawl cut short is not cached, so the next run completes it)
+    if internal_links and not truncated:
         async with AsyncSessionLocal() as db:
             for link in internal_links:
                 db_link = InternalIndex(
@@ -155,4 +175,4 @@ async def internal_indexer_node(state: AgentState) -> Dict[str, Any]:
                 db.add(db_link)
             await db.commit()
 
-    return {"internal_links": internal_links}
+    return internal_links
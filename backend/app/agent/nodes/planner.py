@@ -4,7 +4,12 @@ from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
 from app.utils.llm_logger import llm_logger
+from app.services.research_index_service import research_index_service
+from app.core.config import settings
+from app.agent.budget import partial_results
+from app.services.source_quality_service import source_quality_service, estimate_tokens
 import json
+import copy
 
 class SectionModel(BaseModel):
     id: str = Field(description="Unique ID like sec_1")
@@ -16,11 +21,52 @@ class SectionModel(BaseModel):
 class Outline(BaseModel):
     sections: List[SectionModel]
 
+# Map blog size to target word count AND recommended section count
+SIZE_GUIDELINES = {
+    "small": {"word_count": 2500, "min_sections": 3, "max_sections": 5},
+    "medium": {"word_count": 5500, "min_sections": 6, "max_sections": 8},
+    "large": {"word_count": 10000, "min_sections": 10, "max_sections": 15}
+}
+
+FALLBACK_OUTLINE = [
+    {"id": "sec_1", "title": "Introduction", "intent": "Introduce topic", "source_ids": [], "content": None},
+    {"id": "sec_2", "title": "Main Point", "intent": "Discuss main point", "source_ids": [], "content": None},
+    {"id": "sec_3", "title": "Conclusion", "intent": "Summarize", "source_ids": [], "content": None}
+]
+
 class WordBudgetAllocation(BaseModel):
     """LLM-generated word budget allocation per section"""
     section_budgets: Dict[str, int] = Field(description="Map of section_id to target word count")
     reasoning: str = Field(description="Explanation of how words were allocated")
 
+async def build_research_digest(research_data: List[Dict]) -> str:
+    """
+    Compact planner context: one entry per cluster of similar sources with its
+    member Source IDs, the most central source's excerpt and a few other titles.
+    """
+    clusters = await research_index_service.cluster(research_data, settings.PLANNER_DIGEST_CLUSTERS)
+    entries = [
+        "Research has been grouped into clusters of related sources. Any Source ID listed "
+        "in a cluster can be assigned to a section on its own.\n"
+    ]
+    for n, cluster in enumerate(clusters, 1):
+        representative = cluster["representative"]
+        other_titles = [
+            f"  - {m.get('source_id')}: {(m.get('title') or 'Untitled')[:80]}"
+            for m in cluster["members"][1:settings.PLANNER_DIGEST_TITLES_PER_CLUSTER + 1]
+        ]
+        entry = (
+            f"Cluster {n} ({len(cluster['members'])} sources)\n"
+            f"Source IDs: {', '.join(cluster['source_ids'])}\n"
+            f"Key source {representative.get('source_id')}: {representative.get('title', 'Untitled')}\n"
+            f"Content: {(representative.get('content') or '')[:500]}\n"
+        )
+        if other_titles:
+            entry += "Other sources:\n" + "\n".join(other_titles) + "\n"
+        entries.append(entry)
+    print(f"Planner: {len(research_data)} sources compacted into {len(clusters)} clusters")
+    return "\n".join(entries)
+
 async def planner_node(state: AgentState):
     topic = state["topic"]
     research_data = state.get("research_data", [])
@@ -30,20 +76,51 @@ async def planner_node(state: AgentState):
     guidelines = state.get("research_guidelines", [])
     blog_size = state.get("blog_size", "medium")
     
-    # Map blog size to target word count AND recommended section count
-    size_guidelines = {
-        "small": {"word_count": 2500, "min_sections": 3, "max_sections": 5},
-        "medium": {"word_count": 5500, "min_sections": 6, "max_sections": 8},
-        "large": {"word_count": 10000, "min_sections": 10, "max_sections": 15}
-    }
-    guidelines_config = size_guidelines.get(blog_size, size_guidelines["medium"])
+    guidelines_config = SIZE_GUIDELINES.get(blog_size, SIZE_GUIDELINES["medium"])
     target_word_count = guidelines_config["word_count"]
     min_sections = guidelines_config["min_sections"]
     max_sections = guidelines_config["max_sections"]
     
-    context = ""
-    for item in research_data:
-        context += f"Source ID: {item.get('source_id')}\nTitle: {item.get('title', 'Untitled')}\nContent: {item.get('content', '')[:500]}\n\n"
+    # Drop unusable and low-value sources so planner and writer prompts stay within budget
+    research_pruning = {}
+    try:
+        tokens_before = sum(estimate_tokens(r) for r in research_data)
+        kept, pruned = await source_quality_service.prune(
+            research_data,
+            topic,
+            token_budget=settings.RESEARCH_TOKEN_BUDGET,
+            quotas=settings.RESEARCH_SOURCE_QUOTAS,
+            min_score=settings.RESEARCH_MIN_QUALITY
+        )
+        research_pruning = {
+            "sources_before": len(research_data),
+            "sources_after": len(kept),
+            "tokens_before": tokens_before,
+            "tokens_after": sum(estimate_tokens(r) for r in kept),
+            "pruned": pruned
+        }
+        print(f"Research pruning: kept {len(kept)}/{len(research_data)} sources, "
+              f"~{research_pruning['tokens_before']} -> ~{research_pruning['tokens_after']} tokens")
+        for entry in pruned:
+            print(f"   pruned {entry['source_id']} ({entry['source']}, score {entry['score']}): {entry['reason']} - {entry['title']}")
+        research_data = kept
+        partial_results().update({"research_data": kept, "research_pruning": research_pruning})
+    except Exception as e:
+        print(f"Research pruning failed, keeping all sources: {e}")
+
+    context = None
+    if len(research_data) > settings.PLANNER_DIGEST_MIN_SOURCES:
+        # Many sources: keep the prompt size flat by handing over a per-cluster digest
+        try:
+            context = await build_research_digest(research_data)
+        except Exception as e:
+            print(f"Research clustering failed, using full research list: {e}")
+    context_mode = "clusters" if context else "full"
+    if context is None:
+        context = "".join(
+            f"Source ID: {item.get('source_id')}\nTitle: {item.get('title', 'Untitled')}\nContent: {item.get('content', '')[:500]}\n\n"
+            for item in research_data
+        )
         
     guidelines_str = "\n".join(f"- {g}" for g in guidelines) if guidelines else "None"
 
@@ -129,7 +206,10 @@ async def planner_node(state: AgentState):
                 "target_word_count": target_word_count,
                 "min_sections": min_sections,
                 "max_sections": max_sections,
-                "actual_sections_created": len(outline)
+                "actual_sections_created": len(outline),
+                "research_sources": len(research_data),
+                "research_context": context_mode,
+                "research_pruned": len(research_pruning.get("pruned", []))
             },
             model_info={
                 "provider": state.get("model_provider", "anthropic"),
@@ -152,11 +232,19 @@ async def planner_node(state: AgentState):
             
     except Exception as e:
         print(f"Planner failed: {e}")
-        outline = [
-            {"id": "sec_1", "title": "Introduction", "intent": "Introduce topic", "source_ids": [], "content": None},
-            {"id": "sec_2", "title": "Main Point", "intent": "Discuss main point", "source_ids": [], "content": None},
-            {"id": "sec_3", "title": "Conclusion", "intent": "Summarize", "source_ids": [], "content": None}
-        ]
+        outline = copy.deepcopy(FALLBACK_OUTLINE)
+    
+    # Suggest source_ids for sections the LLM left empty or filled with unknown IDs
+    try:
+        known_ids = {r.get("source_id") for r in research_data if r.get("source_id")}
+        suggestions = await research_index_service.rank_for_sections(research_data, outline, top_k=3)
+        for section in outline:
+            valid_ids = [sid for sid in section.get("source_ids", []) if sid in known_ids]
+            if not valid_ids:
+                valid_ids = suggestions.get(section["id"], [])
+            section["source_ids"] = valid_ids
+    except Exception as e:
+        print(f"Source suggestion failed: {e}")
     
     # PASS 2: Allocate word budgets across sections
     section_titles = [s["title"] for s in outline]
@@ -230,6 +318,8 @@ async def planner_node(state: AgentState):
         section_word_budgets = {s["id"]: words_per_section for s in outline}
         
     return {
+        "research_data": research_data,
+        "research_pruning": research_pruning,
         "outline": outline,
         "target_word_count": target_word_count,
         "section_word_budgets": section_word_budgets,
@@ -237,3 +327,55 @@ async def planner_node(state: AgentState):
         "section_retries": {},
         "draft_sections": {}
     }
+
+async def build_fallback_outline(research_data: List[Dict], num_sections: int) -> List[Dict]:
+    """
+    Outline built without the LLM: an introduction, one section per cluster of
+    related research (titled after its key source) and a conclusion.
+    Falls back to FALLBACK_OUTLINE when there is no research to cluster.
+    """
+    index = await research_index_service.build_index(research_data)
+    clusters = await research_index_service.cluster(research_data, max(1, num_sections - 2), index=index)
+    if not clusters:
+        return copy.deepcopy(FALLBACK_OUTLINE)
+
+    intro, conclusion = copy.deepcopy(FALLBACK_OUTLINE[0]), copy.deepcopy(FALLBACK_OUTLINE[-1])
+    body = []
+    for cluster in clusters:
+        title = cluster["representative"].get("title") or "Key Findings"
+        body.append({
+            "id": f"sec_{len(body) + 2}",
+            "title": title,
+            "intent": f"Discuss {title}",
+            "source_ids": [sid for sid in cluster["source_ids"][:3] if sid],
+            "content": None
+        })
+    conclusion["id"] = f"sec_{len(body) + 2}"
+    outline = [intro] + body + [conclusion]
+
+    suggestions = await research_index_service.rank_for_sections(research_data, [intro, conclusion], top_k=3, index=index)
+    intro["source_ids"] = suggestions.get(intro["id"], [])
+    conclusion["source_ids"] = suggestions.get(conclusion["id"], [])
+    return outline
+
+async def planner_timeout_fallback(state: AgentState, partial: Dict) -> Dict:
+    guidelines_config = SIZE_GUIDELINES.get(state.get("blog_size", "medium"), SIZE_GUIDELINES["medium"])
+    target_word_count = guidelines_config["word_count"]
+    research_data = partial.get("research_data", state.get("research_data", []))
+    try:
+        outline = await build_fallback_outline(research_data, guidelines_config["min_sections"])
+    except Exception as e:
+        print(f"Fallback outline from research failed: {e}")
+        outline = copy.deepcopy(FALLBACK_OUTLINE)
+
+    update = {
+        "outline": outline,
+        "target_word_count": target_word_count,
+        "section_word_budgets": {s["id"]: target_word_count // len(outline) for s in outline},
+        "critique_feedback": {},
+        "section_retries": {},
+        "draft_sections": {}
+    }
+    if "research_data" in partial:
+        update.update({"research_data": partial["research_data"], "research_pruning": partial["research_pruning"]})
+    return update
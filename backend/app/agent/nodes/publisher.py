@@ -13,6 +13,9 @@ def publisher_node(state: AgentState):
     
     for section in outline:
         content = drafts.get(section['id'], "")
+        if not content:
+            # The writer ran out of budget before drafting this section
+            continue
         final_doc += f"## {section['title']}\n\n"
         final_doc += content + "\n\n"
         
@@ -1,13 +1,15 @@
 import asyncio
-from typing import List
+from typing import List, Dict, Any, Set
 from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
 from app.agent.state import AgentState
 from app.services.firecrawl_service import firecrawl_service
-from app.services.pinecone_service import pinecone_service
-from app.services.embedding_service import embedding_service
+from app.services.retrieval_service import retrieval_service
 from app.services.arxiv_service import arxiv_service
 from app.services.llm_service import llm_service
+from app.services.keyphrase_service import keyphrase_service
+from app.core.config import settings
+from app.agent.budget import remaining_budget, partial_results
 
 class SearchQueries(BaseModel):
     queries: List[str] = Field(description="List of 3-5 optimized search queries")
@@ -22,93 +24,128 @@ async def researcher_node(state: AgentState):
     use_local = state.get("use_local", False)
 
     # --- Step 1: Generate Optimized Queries ---
-    llm = llm_service.get_llm(
-        model_provider=state.get("model_provider", "anthropic"),
-        model_name=state.get("model_name", "claude-haiku-4-5"),
-        use_local=use_local
-    )
+    if state.get("fast_query_mode"):
+        # No LLM round-trip: searches can start right away
+        search_queries = keyphrase_service.generate_queries(topic, guidelines, extra_context, audience)
+        print(f"Generated Queries (fast mode): {search_queries}")
+    else:
+        llm = llm_service.get_llm(
+            model_provider=state.get("model_provider", "anthropic"),
+            model_name=state.get("model_name", "claude-haiku-4-5"),
+            use_local=use_local
+        )
     
-    query_prompt = ChatPromptTemplate.from_template(
-        """
-        You are a Research Strategist. Your goal is to generate targeted search queries to gather information for a blog post.
+        query_prompt = ChatPromptTemplate.from_template(
+            """
+            You are a Research Strategist. Your goal is to generate targeted search queries to gather information for a blog post.
         
-        Topic: {topic}
-        Target Audience: {audience}
-        Research Guidelines:
-        {guidelines}
+            Topic: {topic}
+            Target Audience: {audience}
+            Research Guidelines:
+            {guidelines}
         
-        Generate 3-5 specific, high-quality search queries that will help uncover relevant facts, statistics, and insights.
-        If the audience is technical, use technical terms. If the guidelines ask for specific data, include that in the queries.
-        """
-    )
+            Generate 3-5 specific, high-quality search queries that will help uncover relevant facts, statistics, and insights.
+            If the audience is technical, use technical terms. If the guidelines ask for specific data, include that in the queries.
+            """
+        )
     
-    structured_llm = llm.with_structured_output(SearchQueries)
-    chain = query_prompt | structured_llm
+        structured_llm = llm.with_structured_output(SearchQueries)
+        chain = query_prompt | structured_llm
     
-    try:
-        guidelines_str = "\\n".join(f"- {g}" for g in guidelines) if guidelines else "None"
-        result = await chain.ainvoke({
-            "topic": topic, 
-            "audience": audience or "General Audience", 
-            "guidelines": guidelines_str
-        })
-        search_queries = result.queries
-        print(f"Generated Queries: {search_queries}")
-    except Exception as e:
-        print(f"Query generation failed: {e}. Falling back to topic.")
-        search_queries = [topic]
+        try:
+            guidelines_str = "\\n".join(f"- {g}" for g in guidelines) if guidelines else "None"
+            result = await chain.ainvoke({
+                "topic": topic, 
+                "audience": audience or "General Audience", 
+                "guidelines": guidelines_str
+            })
+            search_queries = result.queries
+            print(f"Generated Queries: {search_queries}")
+        except Exception as e:
+            print(f"Query generation failed: {e}. Falling back to topic.")
+            search_queries = [topic]
 
     # --- Step 2: Execute Search Tasks ---
     
+    deadlines = settings.RESEARCH_SOURCE_DEADLINES
+    budget = remaining_budget()
+    if budget is not None:
+        # Never wait on a source past this node's own budget (keep a moment to aggregate)
+        deadlines = {source: max(1.0, min(seconds, budget - 2)) for source, seconds in deadlines.items()}
+    timed_out: List[str] = []
+    # Each source's results land here as they arrive, for the timeout fallback
+    partial = partial_results()
+    partial["timed_out"] = timed_out
+    # Shared by all concurrent searches so each page is scraped at most once
+    scraped_urls: Set[str] = set()
+    search_stats: List[Dict[str, Any]] = []
+
+    async def search_web_query(q: str):
+        # Strip quotes from query as they break Firecrawl search
+        clean_q = q.strip('"').strip("'")
+        try:
+            print(f"Executing Web Search for: {clean_q}")
+            web_results = await firecrawl_service.asearch(clean_q, limit=3, seen_urls=scraped_urls)
+            print(f"Raw Firecrawl Result for {clean_q}: {str(web_results)[:200]}...")
+            search_stats.append(web_results.get("stats", {}))
+            
+            # Extract data from 'web' or 'data' key
+            data = web_results.get('web') or web_results.get('data') or []
+            
+            if not data:
+                print(f"No data found for query: {q}")
+            return data
+        except Exception as e:
+            print(f"Web search failed for query '{q}': {e}")
+            import traceback
+            traceback.print_exc()
+            return []
+
+    def collect_web_items(by_query: Dict[int, List[Dict[str, Any]]]):
+        results = []
+        for i in sorted(by_query):
+            for item in by_query[i]:
+                 # Extract title/url from metadata if not at top level
+                 metadata = item.get('metadata', {})
+                 title = item.get('title') or metadata.get('title') or 'No Title'
+                 url = item.get('url') or metadata.get('url') or 'No URL'
+                 # Fallback to description or snippet if markdown is not available
+                 content = item.get('markdown') or item.get('description') or item.get('snippet') or ''
+                 content = content[:2000]
+
+                 results.append({
+                     "source_id": f"web_{len(results)+1}",
+                     "source": "web",
+                     "title": title,
+                     "url": url,
+                     "content": content
+                 })
+        return results
+
     async def search_web():
         if "web" not in sources:
             return []
-        results = []
-        
-        # Use the first 2 generated queries for web search to avoid rate limits/overload
-        queries_to_run = search_queries[:2]
         
-        for q in queries_to_run:
-            # Strip quotes from query as they break Firecrawl search
-            clean_q = q.strip('"').strip("'")
-            try:
-                print(f"Executing Web Search for: {clean_q}")
-                # Run blocking IO in thread
-                web_results = await asyncio.to_thread(firecrawl_service.search, clean_q, limit=3)
-                print(f"Raw Firecrawl Result for {clean_q}: {str(web_results)[:200]}...")
-                
-                # Handle Firecrawl v2 response
-                if hasattr(web_results, 'model_dump'):
-                    web_results = web_results.model_dump()
-                
-                # Extract data from 'web' or 'data' key
-                data = web_results.get('web') or web_results.get('data') or []
-                
-                if not data:
-                    print(f"No data found for query: {q}")
-                
-                for i, item in enumerate(data):
-                     # Extract title/url from metadata if not at top level
-                     metadata = item.get('metadata', {})
-                     title = item.get('title') or metadata.get('title') or 'No Title'
-                     url = item.get('url') or metadata.get('url') or 'No URL'
-                     # Fallback to description or snippet if markdown is not available
-                     content = item.get('markdown') or item.get('description') or item.get('snippet') or ''
-                     content = content[:2000]
+        # Search every generated query concurrently; firecrawl_service bounds the
+        # number of in-flight requests. Whatever has arrived by the deadline is used.
+        by_query: Dict[int, List[Dict[str, Any]]] = {}
 
-                     results.append({
-                         "source_id": f"web_{len(results)+1}",
-                         "source": "web",
-                         "title": title,
-                         "url": url,
-                         "content": content
-                     })
-            except Exception as e:
-                print(f"Web search failed for query '{q}': {e}")
-                import traceback
-                traceback.print_exc()
-                
-        return results
+        async def search_and_keep(i: int, q: str):
+            by_query[i] = await search_web_query(q)
+            # Keep the partial results current (in query order) as each search lands
+            partial["web"] = collect_web_items(by_query)
+
+        tasks = [asyncio.create_task(search_and_keep(i, q)) for i, q in enumerate(search_queries)]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=deadlines.get("web"))
+        finally:
+            # Also reached when the whole node runs out of budget
+            for task in tasks:
+                task.cancel()
+        for q, task in zip(search_queries, tasks):
+            if task in pending:
+                timed_out.append(f"web:{q}")
+        return collect_web_items(by_query)
 
     async def search_social():
         if "social" not in sources:
@@ -118,11 +155,8 @@ async def researcher_node(state: AgentState):
             # Search Reddit/Twitter via Firecrawl using the first query
             clean_q = search_queries[0].strip('"').strip("'")
             query = f"{clean_q} site:reddit.com OR site:x.com OR site:twitter.com"
-            social_results = await asyncio.to_thread(firecrawl_service.search, query, limit=3)
-            
-            # Handle Firecrawl v2 response
-            if hasattr(social_results, 'model_dump'):
-                social_results = social_results.model_dump()
+            social_results = await firecrawl_service.asearch(query, limit=3, seen_urls=scraped_urls)
+            search_stats.append(social_results.get("stats", {}))
             
             # Extract data from 'web' or 'data' key
             data = social_results.get('web') or social_results.get('data') or []
@@ -161,7 +195,8 @@ async def researcher_node(state: AgentState):
                     "source": "academic",
                     "title": item.get('title'),
                     "url": item.get('url'),
-                    "content": f"Summary: {item.get('summary')}\\nAuthors: {', '.join(item.get('authors', []))}"
+                    "content": f"Summary: {item.get('summary')}\\nAuthors: {', '.join(item.get('authors', []))}",
+                    "published": item.get('published')
                 })
         except Exception as e:
             print(f"Academic search failed: {e}")
@@ -170,78 +205,59 @@ async def researcher_node(state: AgentState):
     async def search_internal():
         if "internal" not in sources or not bins:
             return []
+        user_id = state.get("user_id")
+        if not user_id:
+            print("User ID missing for internal search")
+            return []
         results = []
         try:
-            # Embed the first 2 queries
-            queries_to_run = search_queries[:2]
-            
-            for q in queries_to_run:
-                # Use embed_query instead of embed_text, and run in thread
-                query_embedding = await asyncio.to_thread(embedding_service.embed_query, q)
-                
-                # Search in each bin
-                for bin_id in bins:
-                    # Construct namespace: {user_id}_{bin_id}
-                    # We need user_id from state.
-                    user_id = state.get("user_id")
-                    if not user_id:
-                        print("User ID missing for internal search")
-                        continue
-                        
-                    namespace = f"{user_id}_{bin_id}"
-                    print(f"Internal Search: Querying namespace {namespace}")
-                    
-                    try:
-                        query_response = await asyncio.to_thread(
-                            pinecone_service.query_vectors,
-                            vector=query_embedding,
-                            namespace=namespace,
-                            top_k=3
-                        )
-                        
-                        # Handle Pinecone response (dict or object)
-                        if hasattr(query_response, 'matches'):
-                            matches = query_response.matches
-                        elif isinstance(query_response, dict):
-                            matches = query_response.get('matches', [])
-                        else:
-                            matches = []
-                            
-                        print(f"Internal Search: Found {len(matches)} matches in bin {bin_id}")
-                    except Exception as e:
-                        print(f"Pinecone query failed for bin {bin_id}: {e}")
-                        matches = []
-                    
-                    for i, match in enumerate(matches):
-                        # Handle match object/dict
-                        if isinstance(match, dict):
-                            metadata = match.get('metadata', {})
-                        else:
-                            metadata = getattr(match, 'metadata', {})
-                            if hasattr(metadata, 'to_dict'):
-                                metadata = metadata.to_dict()
-                            
-                        results.append({
-                            "source_id": f"int_{bin_id[:4]}_{len(results)+1}",
-                            "source": "internal",
-                            "title": metadata.get('source', 'Internal Doc'),
-                            "url": "Internal Knowledge Base",
-                            "content": metadata.get('text', '')
-                        })
+            # One batched embedding call and concurrent searches over every bin
+            hits = await retrieval_service.search(search_queries[:2], user_id, bins, top_k=3)
+            for hit in hits:
+                metadata = hit["metadata"]
+                results.append({
+                    "source_id": f"int_{hit['bin_id'][:4]}_{len(results)+1}",
+                    "source": "internal",
+                    "title": metadata.get('source', 'Internal Doc'),
+                    "url": "Internal Knowledge Base",
+                    "content": metadata.get('text', '')
+                })
         except Exception as e:
             print(f"Internal search failed: {e}")
         return results
 
+    async def within_deadline(source_type: str, search):
+        # Soft deadline per source type: late results are cancelled, not awaited
+        try:
+            partial[source_type] = await asyncio.wait_for(search(), timeout=deadlines.get(source_type))
+        except asyncio.TimeoutError:
+            print(f"{source_type} search missed its {deadlines.get(source_type)}s deadline, continuing without it")
+            timed_out.append(source_type)
+            partial[source_type] = []
+        return partial[source_type]
+
     # Run all search tasks
     results_web, results_social, results_acad, results_internal = await asyncio.gather(
         search_web(),
-        search_social(),
-        search_academic(),
-        search_internal()
+        within_deadline("social", search_social),
+        within_deadline("academic", search_academic),
+        within_deadline("internal", search_internal)
     )
+    if timed_out:
+        print(f"Research timeouts: {timed_out}")
     
     # --- Step 3: Aggregate & Prioritize ---
+    final_results = aggregate_research(extra_context, results_internal, results_web, results_acad, results_social)
     
+    return {"research_data": final_results, "research_timeouts": timed_out, "search_phase_stats": search_stats}
+
+def aggregate_research(
+    extra_context: str,
+    internal: List[Dict[str, Any]],
+    web: List[Dict[str, Any]],
+    academic: List[Dict[str, Any]],
+    social: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
     final_results = []
     
     # 1. User Provided Context (Highest Priority)
@@ -255,11 +271,24 @@ async def researcher_node(state: AgentState):
         })
         
     # 2. Internal Knowledge (High Priority)
-    final_results.extend(results_internal)
+    final_results.extend(internal)
     
     # 3. External Sources
-    final_results.extend(results_web)
-    final_results.extend(results_acad)
-    final_results.extend(results_social)
-    
-    return {"research_data": final_results}
+    final_results.extend(web)
+    final_results.extend(academic)
+    final_results.extend(social)
+    return final_results
+
+def researcher_timeout_fallback(state: AgentState, partial: Dict[str, Any]) -> Dict[str, Any]:
+    # Whatever each source had returned when the node ran out of time
+    research = aggregate_research(
+        state.get("extra_context", ""),
+        partial.get("internal", []),
+        partial.get("web", []),
+        partial.get("academic", []),
+        partial.get("social", [])
+    )
+    timed_out = list(partial.get("timed_out", []))
+    timed_out += [s for s in ("internal", "web", "academic", "social")
+                  if s in state.get("research_sources", ["web", "internal"]) and s not in partial and s not in timed_out]
+    return {"research_data": research, "research_timeouts": timed_out + ["researcher"]}
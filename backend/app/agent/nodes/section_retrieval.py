@@ -0,0 +1,79 @@
+from typing import Any, Dict, List
+from langchain_core.runnables import RunnableConfig
+from app.agent.state import AgentState
+from app.services.retrieval_service import retrieval_service
+from app.services.context_pack_service import (
+    context_pack_service,
+    internal_chunks_from_hits,
+    targeted_source_prefix
+)
+
+SECTION_TOP_K = 3
+
+async def section_retrieval_node(state: AgentState, config: RunnableConfig):
+    """
+    Targeted internal retrieval for the approved outline.
+
+    Every section gets its own knowledge-base search on "title: intent", and
+    the hits are attached to research_data and to that section's source_ids.
+    Sections whose context pack already fetched them during the review are
+    reused; the rest are searched in one batched call.
+    """
+    outline = state.get("outline", [])
+    bins = state.get("selected_bins", [])
+    if "internal" not in state.get("research_sources", []) or not bins or not outline:
+        return {}
+
+    research = state.get("research_data", [])
+    known_ids = {r.get("source_id") for r in research}
+    thread_id = config.get("configurable", {}).get("thread_id") if config else None
+
+    chunks_by_section: Dict[str, List[Dict[str, Any]]] = {}
+    to_search = []
+    reused = 0
+    for section in outline:
+        prefix = targeted_source_prefix(section["id"])
+        if any(sid and sid.startswith(prefix) for sid in known_ids):
+            continue
+        cached = context_pack_service.finished_internal_chunks(thread_id, state, section)
+        if cached is not None:
+            chunks_by_section[section["id"]] = cached
+            reused += 1
+        else:
+            to_search.append(section)
+
+    if to_search:
+        try:
+            results = await retrieval_service.search_each(
+                [f"{s['title']}: {s['intent']}" for s in to_search],
+                state.get("user_id"),
+                bins,
+                top_k=SECTION_TOP_K
+            )
+            for section, hits in zip(to_search, results):
+                chunks_by_section[section["id"]] = internal_chunks_from_hits(section["id"], hits)
+        except Exception as e:
+            print(f"Section retrieval failed: {e}")
+
+    if not chunks_by_section:
+        return {}
+
+    new_sources = []
+    updated_outline = []
+    for section in outline:
+        chunks = chunks_by_section.get(section["id"], [])
+        if chunks:
+            section = {**section, "source_ids": list(section.get("source_ids", [])) + [c["source_id"] for c in chunks]}
+            new_sources.extend(c for c in chunks if c["source_id"] not in known_ids)
+        updated_outline.append(section)
+
+    print(f"Section Retrieval: attached {len(new_sources)} internal chunks across {len(chunks_by_section)} sections "
+          f"({len(to_search)} searched, {reused} reused from context packs)")
+    return {
+        "outline": updated_outline,
+        "research_data": research + new_sources
+    }
+
+def section_retrieval_timeout_fallback(state: AgentState, partial: Dict[str, Any]) -> Dict[str, Any]:
+    # Context packs still fetch per-section chunks on demand
+    return {}
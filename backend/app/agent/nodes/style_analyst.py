@@ -1,3 +1,4 @@
+import asyncio
 from app.agent.state import AgentState
 from app.services.firecrawl_service import firecrawl_service
 from app.services.llm_service import llm_service
@@ -14,10 +15,10 @@ async def analyze_style(urls: List[str], use_local: bool = False, model_provider
     scraped_content = []
     scraping_errors = []
     
-    for url in urls:
+    async def scrape_one(url: str):
         try:
             print(f"[Style Analyst] Scraping {url}...")
-            result = firecrawl_service.scrape(url)
+            result = await firecrawl_service.ascrape(url)
             
             # Handle both dict and Document object formats
             if result:
@@ -31,18 +32,20 @@ async def analyze_style(urls: List[str], use_local: bool = False, model_provider
                 if markdown_content:
                     content = markdown_content[:5000]
                     print(f"[Style Analyst] Successfully scraped {len(content)} chars from {url}")
-                    scraped_content.append(content)
-                else:
-                    error_msg = f"No markdown content in response from {url}"
-                    print(f"[Style Analyst] {error_msg}")
-                    scraping_errors.append(error_msg)
+                    return content, None
+                error_msg = f"No markdown content in response from {url}"
             else:
                 error_msg = f"Empty response from {url}"
-                print(f"[Style Analyst] {error_msg}")
-                scraping_errors.append(error_msg)
         except Exception as e:
             error_msg = f"Error scraping {url}: {str(e)}"
-            print(f"[Style Analyst] {error_msg}")
+        print(f"[Style Analyst] {error_msg}")
+        return None, error_msg
+    
+    # Scrape all tone URLs concurrently
+    for content, error_msg in await asyncio.gather(*[scrape_one(url) for url in urls]):
+        if content:
+            scraped_content.append(content)
+        else:
             scraping_errors.append(error_msg)
             
     if not scraped_content:
@@ -108,3 +111,6 @@ async def style_analyst_node(state: AgentState):
     style_profile = await analyze_style(urls, use_local=use_local, model_provider=model_provider, model_name=model_name)
         
     return {"style_profile": style_profile}
+
+def style_analyst_timeout_fallback(state: AgentState, partial: Dict[str, Any]) -> Dict[str, Any]:
+    return {"style_profile": state.get("style_profile") or {"tone": "neutral", "formatting": "standard", "note": "style_analysis_timed_out"}}
@@ -148,3 +148,11 @@ async def visuals_node(state: AgentState):
             update=updates,
             goto="publisher"
         )
+
+def visuals_timeout_fallback(state: AgentState, partial: dict):
+    # Skip the diagram and continue with the next section
+    next_idx = state.get("current_section_index", 0) + 1
+    return Command(
+        update={"current_section_index": next_idx},
+        goto="writer" if next_idx < len(state.get("outline", [])) else "publisher"
+    )
@@ -1,10 +1,12 @@
 from app.agent.state import AgentState
 from app.services.llm_service import llm_service
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig
 from langgraph.types import Command
 from app.utils.llm_logger import llm_logger
+from app.services.context_pack_service import context_pack_service
 
-async def writer_node(state: AgentState):
+async def writer_node(state: AgentState, config: RunnableConfig):
     outline = state["outline"]
     idx = state.get("current_section_index", 0)
     
@@ -12,24 +14,14 @@ async def writer_node(state: AgentState):
         return Command(goto="publisher")
         
     section = outline[idx]
-    style = state.get("style_profile", {})
     research = state.get("research_data", [])
-    internal_links = state.get("internal_links", [])
-    audience = state.get("target_audience", "General Audience")
-    section_word_budgets = state.get("section_word_budgets", {})
     
-    # Get word budget for this section
-    target_words = section_word_budgets.get(section["id"], 500)
-    
-    # Filter research data based on section source_ids
-    relevant_research = [
-        r for r in research 
-        if r.get("source_id") in section.get("source_ids", [])
-    ]
-    
-    # If no specific sources assigned, use top 3 from general research as fallback
-    if not relevant_research:
-        relevant_research = research[:3]
+    # Research, internal chunks, links and the static prompt prefix were
+    # precomputed while the outline was under review (or are built now if the
+    # section was edited).
+    run_thread_id = config.get("configurable", {}).get("thread_id") if config else None
+    pack = await context_pack_service.get_pack(run_thread_id, state, section)
+    target_words = pack["target_words"]
 
     # Check for critique feedback
     critique_feedback = state.get("critique_feedback", {}).get(section["id"])
@@ -47,46 +39,16 @@ async def writer_node(state: AgentState):
         # Take the last 500 characters to provide context for transition
         if previous_section_content:
             previous_section_content = "..." + previous_section_content[-500:]
-
-    context_str = "\n\n".join([
-        f"Source ID: {r.get('source_id')}\nTitle: {r.get('title')}\nContent: {r.get('content', '')[:500]}"
-        for r in relevant_research
-    ])
-    
-    links_str = "\n".join([f"- {l['title']}: {l['url']}" for l in internal_links])
     
     prompt = ChatPromptTemplate.from_template(
         """
-        Write the following section for a blog post.
-        
-        Section Title: {title}
-        Intent: {intent}
-        Target Audience: {audience}
+        {static_context}
         
-        ⚠️ STRICT WORD COUNT LIMIT: {target_words} words (±10% acceptable, NOT MORE)
-        Maximum allowed: {max_words} words
-        Minimum required: {min_words} words
-        
-        Style Guide: {style}
-
         Previous Section (For smooth transition):
         {previous_content}
         
-        Internal Links (Insert these naturally if relevant, using [Title](url)):
-        {links}
-        
         {feedback_instruction}
         
-        Research Context (You MUST cite these using [source_id] at the end of sentences where appropriate):
-        {context}
-        
-        CRITICAL CONSTRAINTS: 
-        - You MUST write between {min_words} and {max_words} words for this section
-        - This is a HARD LIMIT - exceeding {max_words} words will break the overall blog length target
-        - Be concise and focused - quality over quantity
-        - When writing, give more weight to information from internal sources (IDs starting with 'int_')
-        - If you have more to say, prioritize the most important points to fit the limit
-        
         Write only the content for this section. Use Markdown. Do not include the Section Title in the output.
         """
     )
@@ -98,21 +60,9 @@ async def writer_node(state: AgentState):
     )
     chain = prompt | llm
     
-    # Calculate word count limits (±10%)
-    min_words = int(target_words * 0.9)
-    max_words = int(target_words * 1.1)
-    
     prompt_vars = {
-        "title": section["title"],
-        "intent": section["intent"],
-        "style": str(style),
+        "static_context": pack["static_context"],
         "previous_content": previous_section_content,
-        "links": links_str,
-        "context": context_str,
-        "audience": audience,
-        "target_words": target_words,
-        "min_words": min_words,
-        "max_words": max_words,
         "feedback_instruction": feedback_instruction
     }
     response = await chain.ainvoke(prompt_vars)
@@ -154,15 +104,39 @@ async def writer_node(state: AgentState):
     
     draft_sections = state.get("draft_sections", {}).copy()
     draft_sections[section["id"]] = response.content
+    update = {"draft_sections": draft_sections}
+    
+    # Register the section's targeted internal chunks so the publisher can resolve their citations
+    known_ids = {r.get("source_id") for r in research}
+    new_sources = [c for c in pack["internal_chunks"] if c["source_id"] not in known_ids]
+    if new_sources:
+        update["research_data"] = research + new_sources
     
     # If this was a rewrite (we have retried at least once), skip the critic and go to visuals
     if retry_count > 0:
         return Command(
-            update={"draft_sections": draft_sections},
+            update=update,
             goto="visuals"
         )
     
     return Command(
-        update={"draft_sections": draft_sections},
+        update=update,
         goto="critic"
     )
+
+def writer_timeout_fallback(state: AgentState, partial: dict):
+    # Keep whatever draft the section already has and move on without a
+    # critique round. A section with no draft is left out of the post (the
+    # publisher skips it) and reported through truncated_sections.
+    outline = state["outline"]
+    idx = state.get("current_section_index", 0)
+    if idx >= len(outline):
+        return Command(goto="publisher")
+    section_id = outline[idx]["id"]
+    update = {"truncated_sections": [section_id]}
+    if state.get("draft_sections", {}).get(section_id):
+        return Command(update=update, goto="visuals")
+
+    # Nothing to illustrate either: skip visuals for the missing section
+    update["current_section_index"] = idx + 1
+    return Command(update=update, goto="writer" if idx + 1 < len(outline) else "publisher")
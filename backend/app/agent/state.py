@@ -3,6 +3,12 @@ from typing_extensions import Annotated as AnnotatedExt
 from pydantic import BaseModel, Field
 import operator
 
+def merge_counts(left: Dict[str, int], right: Dict[str, int]) -> Dict[str, int]:
+    merged = dict(left or {})
+    for key, count in (right or {}).items():
+        merged[key] = merged.get(key, 0) + count
+    return merged
+
 class Section(TypedDict):
     id: str
     title: str
@@ -31,6 +37,7 @@ class AgentState(TypedDict):
     model_name: str = "claude-haiku-4-5"
     research_sources: List[str] # ['web', 'social', 'academic', 'internal']
     deep_research_mode: bool = False # Added for Deep Research Toggle
+    fast_query_mode: bool # Generate search queries from keyphrases instead of an LLM call
     
     blog_size: str # 'small', 'medium', 'large'
     target_word_count: int # 2500, 5500, 10000
@@ -40,14 +47,30 @@ class AgentState(TypedDict):
     target_audience: str
     extra_context: str
 
+    # Written concurrently by the parallel opening phase (style_analyst,
+    # internal_indexer and research each own their keys)
     style_profile: Dict[str, Any]
     research_data: List[Dict[str, Any]]
+    research_timeouts: Annotated[List[str], operator.add] # Source types (or web:<query>) that missed their deadline
+    search_phase_stats: Annotated[List[Dict[str, Any]], operator.add] # Per-query snippet vs scrape latency/bytes
+    research_pruning: Dict[str, Any] # Quality pruning summary from the planner (kept/pruned items, token counts)
+    run_deadline: float # Epoch seconds by which the run should finish; bounds every node's budget
+    node_timeouts: Annotated[Dict[str, int], merge_counts] # Node name -> times it overran its budget
     
     # Deep Research State - use operator.add to handle concurrent updates
     deep_research_results: Annotated[List[ResearchResult], operator.add]
     research_loop_count: int
     is_sufficient: bool
+    coverage_summary: str # Running summary of findings already reflected on
+    reflected_results_count: int # How many deep_research_results the summary covers
     generated_queries: List[str] # For the deep research loop
+    executed_queries: List[Dict[str, Any]] # {"query", "embedding"} for every query already searched
+    skipped_query_count: int # Near-duplicate queries dropped across loops
+    research_started_at: float # Epoch seconds when the deep research loop began
+    research_search_count: int # Searches issued so far, checked against the per-run budget
+    seen_research_urls: List[str] # URLs already found, used to measure marginal gain
+    research_loop_metrics: List[Dict[str, Any]] # Per-loop gain: new URLs/passages, term coverage
+    research_stop_reason: str # Why the deep research loop ended
     
     internal_links: List[Dict[str, str]]  # Added for Internal Indexer
     
@@ -56,7 +79,26 @@ class AgentState(TypedDict):
     current_section_index: int
     
     draft_sections: Dict[str, str]
+    truncated_sections: Annotated[List[str], operator.add] # Section ids the writer ran out of budget on
     critique_feedback: Dict[str, str]
     section_retries: Dict[str, int]  # Added for Reflexion Loop
     
     final_content: str
+
+class DeepResearchOutput(TypedDict):
+    """Keys the deep research subgraph hands back to the main graph."""
+    research_data: List[Dict[str, Any]]
+    deep_research_results: Annotated[List[ResearchResult], operator.add]
+    research_loop_count: int
+    is_sufficient: bool
+    coverage_summary: str
+    reflected_results_count: int
+    generated_queries: List[str]
+    executed_queries: List[Dict[str, Any]]
+    skipped_query_count: int
+    research_started_at: float
+    research_search_count: int
+    seen_research_urls: List[str]
+    research_loop_metrics: List[Dict[str, Any]]
+    research_stop_reason: str
+    search_phase_stats: Annotated[List[Dict[str, Any]], operator.add]
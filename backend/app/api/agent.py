@@ -18,6 +18,9 @@ from app.core.models import User, StyleProfile, Thread, ThreadStatus, KnowledgeB
 from datetime import datetime, timezone
 import os
 from app.utils.workflow_summary import generate_summary_for_thread
+from app.services.context_pack_service import context_pack_service
+from app.utils.singleflight import singleflight_stats
+from app.agent.budget import new_run_deadline
 from fastapi.encoders import jsonable_encoder
 
 def log_to_file(thread_id: str, category: str, payload: Any):
@@ -51,6 +54,7 @@ class RunRequest(BaseModel):
     style_profile: Optional[Dict[str, Any]] = None
     research_sources: List[str] = ["web", "internal"] # Default to web and internal
     deep_research_mode: bool = False
+    fast_query_mode: bool = False # Keyphrase-based query generation, no LLM call before searching
     blog_size: str = "medium" # small, medium, large
     
     research_guidelines: List[str] = []
@@ -169,6 +173,7 @@ async def stream_agent(
         "model_name": request.model_name,
         "research_sources": request.research_sources,
         "deep_research_mode": request.deep_research_mode,
+        "fast_query_mode": request.fast_query_mode,
         "blog_size": request.blog_size,
         "research_guidelines": request.research_guidelines,
         "target_audience": request.target_audience,
@@ -176,16 +181,31 @@ async def stream_agent(
         "style_profile": request.style_profile or {},
         "current_section_index": 0,
         "draft_sections": {},
+        "truncated_sections": [],
         "critique_feedback": {},
         "section_retries": {},
         # Initialize fields that will be set by nodes
         "research_data": [],
+        "research_timeouts": [],
+        "search_phase_stats": [],
+        "research_pruning": {},
+        "run_deadline": new_run_deadline(),
+        "node_timeouts": {},
         "internal_links": [],
         "outline": [],
         "deep_research_results": [],
         "research_loop_count": 0,
         "is_sufficient": False,
+        "coverage_summary": "",
+        "reflected_results_count": 0,
         "generated_queries": [],
+        "executed_queries": [],
+        "skipped_query_count": 0,
+        "research_started_at": 0.0,
+        "research_search_count": 0,
+        "seen_research_urls": [],
+        "research_loop_metrics": [],
+        "research_stop_reason": "",
         "target_word_count": 0,  # Will be set by planner based on blog_size
         "section_word_budgets": {},  # Will be set by planner
         "final_content": ""
@@ -266,6 +286,9 @@ async def stream_agent(
                     
                     log_to_file(thread_id, "interrupt", payload)
                     
+                    # Build per-section writer context while the user reviews the outline
+                    context_pack_service.precompute(thread_id, snapshot.values)
+                    
                     yield {
                         "event": "interrupt",
                         "data": json.dumps({"type": "human_approval", "payload": payload})
@@ -305,7 +328,9 @@ async def resume_agent(
     async def event_generator():
         # Construct the Command to resume
         resume_command = Command(
-            resume={"approved_outline": request.approved_outline}
+            resume={"approved_outline": request.approved_outline},
+            # Time spent waiting for approval doesn't count against the run
+            update={"run_deadline": new_run_deadline()}
         )
         
         log_to_file(request.thread_id, "resume_command", request.approved_outline)
@@ -344,6 +369,16 @@ async def resume_agent(
                     await db.commit()
                     
                     log_to_file(request.thread_id, "workflow_complete", event["data"].get("output"))
+
+                    # Report sections the writer couldn't finish and nodes that ran out of time
+                    snapshot = await runner.graph.aget_state(config)
+                    budget_report = {
+                        "truncated_sections": snapshot.values.get("truncated_sections", []),
+                        "node_timeouts": snapshot.values.get("node_timeouts", {}),
+                    }
+                    log_to_file(request.thread_id, "budget_report", budget_report)
+                    if budget_report["truncated_sections"] or budget_report["node_timeouts"]:
+                        print(f"⏱️ Run finished over budget: {budget_report}")
                     
                     # Generate Markdown summary automatically
                     try:
@@ -354,7 +389,7 @@ async def resume_agent(
                     
                     yield {
                         "event": "end",
-                        "data": json.dumps({"output": event["data"].get("output")})
+                        "data": json.dumps({"output": event["data"].get("output"), **budget_report})
                     }
 
         except Exception as e:
@@ -378,6 +413,13 @@ async def analyze_style_endpoint(
     style_profile = await analyze_style(request.urls, use_local=request.use_local)
     return style_profile
 
+@router.get("/singleflight-stats")
+async def get_singleflight_stats(current_user: User = Depends(deps.get_current_user)):
+    """
+    Calls issued vs. coalesced per external-call flight (searches, page fetches, embeddings, sitemap crawls).
+    """
+    return singleflight_stats()
+
 @router.get("/state/{thread_id}")
 async def get_state(thread_id: str):
     if not runner.graph:
@@ -6,8 +6,10 @@ from app.api import deps
 from app.core.database import get_db
 from app.core.models import KnowledgeBin, User, Document, DocumentStatus
 from app.schemas import BinCreate, BinResponse, DocumentResponse, BinUpdate
-from app.services.pinecone_service import pinecone_service
+from app.services.vector_store_service import vector_store
+from app.services.namespace_version_service import namespace_version_service
 from app.services.ingestion_service import process_document_task
+import asyncio
 import uuid
 import os
 
@@ -77,7 +79,7 @@ async def delete_bin(
     Delete a Knowledge Bin and all associated documents.
     
     - Verifies ownership.
-    - Deletes the corresponding Pinecone namespace (all vectors).
+    - Deletes the corresponding vector store namespace (all vectors).
     - Deletes the Bin record from the database (cascading delete removes Documents).
     """
     result = await db.execute(select(KnowledgeBin).where(KnowledgeBin.id == bin_id, KnowledgeBin.user_id == current_user.id))
@@ -86,12 +88,14 @@ async def delete_bin(
         raise HTTPException(status_code=404, detail="Bin not found")
     
     try:
-        # Delete from Pinecone
+        # Delete from the vector store
         namespace = f"{current_user.id}_{bin.id}"
-        pinecone_service.delete_namespace(namespace)
+        await asyncio.to_thread(vector_store.delete_namespace, namespace)
         
         await db.delete(bin)
         await db.commit()
+        # After the commit, so a search can't re-cache pre-delete results under the new version
+        await asyncio.to_thread(namespace_version_service.bump, namespace)
         return bin
     except Exception as e:
         await db.rollback()
@@ -117,13 +121,15 @@ async def delete_document(
         raise HTTPException(status_code=404, detail="Document not found")
     
     try:
-        # Delete vectors from Pinecone
+        # Delete vectors from the vector store
         # Namespace is {user_id}_{bin_id}
         namespace = f"{current_user.id}_{doc.bin_id}"
-        pinecone_service.delete_vectors(namespace=namespace, filter={"doc_id": str(doc_id)})
+        await asyncio.to_thread(vector_store.delete_vectors, namespace, filter={"doc_id": str(doc_id)})
         
         await db.delete(doc)
         await db.commit()
+        # After the commit, so a search can't re-cache pre-delete results under the new version
+        await asyncio.to_thread(namespace_version_service.bump, namespace)
         return doc
     except Exception as e:
         await db.rollback()
@@ -1,3 +1,4 @@
+from typing import Dict
 from pydantic_settings import BaseSettings
 from pydantic import validator
 
@@ -5,16 +6,74 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Content Strategist Agent"
     OPENAI_API_KEY: str
     FIRECRAWL_API_KEY: str
-    PINECONE_API_KEY: str
+    PINECONE_API_KEY: str = ""
     PINECONE_ENV: str = "us-east-1"
     PINECONE_INDEX_NAME: str = "content-strategist"
+    PINECONE_UPSERT_MAX_BATCH_BYTES: int = 1_500_000 # Stay under Pinecone's 2MB request limit
+    PINECONE_UPSERT_MAX_BATCH_VECTORS: int = 200
+    PINECONE_UPSERT_CONCURRENCY: int = 4
+    VECTOR_STORE: str = "pinecone" # "pinecone", "local" (in-process exact search) or "pgvector" (vector_chunks table)
+    LOCAL_VECTOR_STORE_PATH: str = "data/vectors"
+    PGVECTOR_EF_SEARCH: int = 64 # HNSW candidate list size per query (recall vs latency)
     DATABASE_URL: str
     USE_LOCAL_LLM: bool = False
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "qwen2.5"
     USE_LOCAL_EMBEDDINGS: bool = False
     LOCAL_EMBEDDING_MODEL: str = "nomic-embed-text"
+    EMBEDDING_DIMENSION: int = 1536 # 1536 for text-embedding-3-small, 768 for nomic-embed-text; sizes the Pinecone index and pgvector column
+    EMBEDDING_CACHE_SIZE: int = 20000 # In-process LRU entries
+    EMBEDDING_CACHE_PERSIST: bool = True # Also cache vectors in the embedding_cache table
     
+    # Research
+    FIRECRAWL_MAX_CONCURRENCY: int = 4
+    SCRAPE_ENGINE: str = "firecrawl" # "firecrawl" or "local" (Firecrawl search + local page extraction)
+    LOCAL_SCRAPE_MAX_CHARS: int = 2000 # Stop reading a search-result page after this much main content
+    LOCAL_SCRAPE_PAGE_MAX_CHARS: int = 5000 # Same, for direct scrapes (style analysis)
+    LOCAL_SCRAPE_PER_DOMAIN_CONCURRENCY: int = 2
+    SEARCH_SCRAPE_TOP_N: int = 2 # Per query, only this many results (after URL dedup + relevance) are scraped
+    SEARCH_PROVIDER: str = "firecrawl" # "firecrawl" or "local" (offline FTS index built with build_search_index.py)
+    LOCAL_SEARCH_INDEX_PATH: str = "data/search_index.db"
+    PAGE_CACHE_TTL_SECONDS: int = 86400 # Scraped pages older than this are revalidated (ETag/Last-Modified) or refetched
+    PAGE_CACHE_PERSIST: bool = True # Store scraped pages (zstd-compressed) in the page_cache table
+    ARXIV_MAX_CONCURRENCY: int = 2
+    # Soft deadline (seconds) per source type; late results are dropped
+    RESEARCH_SOURCE_DEADLINES: Dict[str, float] = {"web": 30.0, "social": 20.0, "academic": 15.0, "internal": 10.0}
+    
+    # Internal Retrieval
+    INTERNAL_SEARCH_MAX_CONCURRENCY: int = 8 # Concurrent (query, bin) vector searches
+    INTERNAL_SEARCH_CACHE_SIZE: int = 1000 # Cached per-namespace results (with candidate vectors); 0 disables the cache
+    INTERNAL_SEARCH_FETCH_MULTIPLIER: int = 4 # Candidates fetched per (query, bin) = top_k * this, then MMR picks top_k
+    INTERNAL_SEARCH_MMR_LAMBDA: float = 0.7 # 1.0 = pure relevance, lower = more diversity
+    INTERNAL_SEARCH_MAX_PER_DOC: int = 2 # Per query, at most this many chunks from one document
+    
+    # Deep Research
+    QUERY_DEDUP_THRESHOLD: float = 0.9 # Cosine similarity above which a query counts as already searched
+    DEEP_RESEARCH_MAX_LOOPS: int = 4
+    DEEP_RESEARCH_TIME_BUDGET_SECONDS: float = 300.0
+    DEEP_RESEARCH_MAX_SEARCHES: int = 20
+    DEEP_RESEARCH_MIN_NEW_URLS: int = 2 # Stop when a loop finds fewer new URLs than this...
+    DEEP_RESEARCH_MIN_COVERAGE_GAIN: float = 0.05 # ...and topic-term coverage grew by less than this
+    
+    # Planner
+    PLANNER_DIGEST_MIN_SOURCES: int = 15 # Above this many sources the planner sees a clustered digest
+    PLANNER_DIGEST_CLUSTERS: int = 8
+    PLANNER_DIGEST_TITLES_PER_CLUSTER: int = 4
+    RESEARCH_TOKEN_BUDGET: int = 12000 # Research kept for planning/writing after quality pruning
+    RESEARCH_SOURCE_QUOTAS: Dict[str, float] = {"internal": 0.4, "web": 0.35, "academic": 0.15, "social": 0.1}
+    RESEARCH_MIN_QUALITY: float = 0.3
+
+    # Run Budgets
+    RUN_DEADLINE_SECONDS: int = 1800 # Wall-clock budget for a run, reset when the outline is approved
+    NODE_MIN_BUDGET_SECONDS: int = 10 # Grace period a node still gets once the run deadline has passed
+    NODE_MIN_BUDGETS: Dict[str, int] = {"writer": 120} # Per-node grace periods; a section can't be written in 10s
+    NODE_DEFAULT_BUDGET_SECONDS: int = 120
+    NODE_TIME_BUDGETS: Dict[str, int] = {
+        "internal_indexer": 60, "style_analyst": 90, "researcher": 120, "planner": 180,
+        "section_retrieval": 30, "writer": 240, "critic": 120, "visuals": 120,
+        "deep_research": 420 # DEEP_RESEARCH_TIME_BUDGET_SECONDS plus time to finish the last loop
+    }
+
     # Model Providers
     ANTHROPIC_API_KEY: str = ""
     GOOGLE_API_KEY: str = ""
@@ -31,6 +31,11 @@ async def get_db():
 
 async def init_db():
     """Initialize database tables (Async)"""
+    # Tables that need the pgvector extension are only created for the pgvector store
+    tables = [
+        t for t in Base.metadata.sorted_tables
+        if not t.info.get("requires_pgvector") or settings.VECTOR_STORE == "pgvector"
+    ]
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
 
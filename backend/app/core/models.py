@@ -1,10 +1,12 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Enum, Boolean, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, Enum, Boolean, Text, LargeBinary, Integer, Index
+from sqlalchemy.types import UserDefinedType
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 import enum
 import uuid
 from app.core.database import Base
+from app.core.config import settings
 
 class DocumentStatus(str, enum.Enum):
     UPLOADED = "uploaded"
@@ -94,3 +96,70 @@ class InternalIndex(Base):
     title = Column(String, nullable=True)
     last_scraped = Column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
 
+class EmbeddingCache(Base):
+    __tablename__ = "embedding_cache"
+    
+    key = Column(String(64), primary_key=True) # sha256 of model + normalized text
+    model = Column(String, nullable=False)
+    vector = Column(LargeBinary, nullable=False) # float32 bytes
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+
+
+class PageCache(Base):
+    __tablename__ = "page_cache"
+    
+    key = Column(String(64), primary_key=True) # sha256 of the canonical URL
+    url = Column(Text, nullable=False)
+    title = Column(Text, nullable=True)
+    markdown = Column(LargeBinary, nullable=False) # zstd-compressed UTF-8
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    fetched_at = Column(DateTime, nullable=False)
+
+
+class Chunk(Base):
+    __tablename__ = "chunks"
+    
+    id = Column(String, primary_key=True) # Same id as the chunk's vector
+    doc_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    seq = Column(Integer, nullable=False) # Position of the chunk within its document
+    page = Column(Integer, nullable=True)
+    chunk_index = Column(Integer, nullable=False) # Position within the page
+    text = Column(Text, nullable=False)
+
+    __table_args__ = (Index("ix_chunks_doc_id_seq", "doc_id", "seq"),)
+
+
+class NamespaceVersion(Base):
+    __tablename__ = "namespace_versions"
+    
+    namespace = Column(String, primary_key=True) # "{user_id}_{bin_id}"
+    version = Column(Integer, nullable=False, default=0) # Bumped whenever the namespace's vectors change
+
+
+class Vector(UserDefinedType):
+    """pgvector column type (DDL only; vectors are read and written as '[x,y,...]' text)."""
+    cache_ok = True
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+
+    def get_col_spec(self, **kw):
+        return f"vector({self.dimension})"
+
+
+class VectorChunk(Base):
+    # Only created where pgvector is installed (see its migration), so
+    # init_db() creates it only for VECTOR_STORE=pgvector and autogenerate
+    # leaves it alone. The column is sized by EMBEDDING_DIMENSION when the
+    # table is created; changing the embedding model needs a new table.
+    __tablename__ = "vector_chunks"
+    __table_args__ = {"info": {"requires_pgvector": True}}
+    
+    # A Pinecone namespace "{user_id}_{bin_id}" maps to (user_id, bin_id)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    bin_id = Column(UUID(as_uuid=True), ForeignKey("knowledge_bins.id", ondelete="CASCADE"), primary_key=True)
+    id = Column(String, primary_key=True)
+    doc_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=True, index=True)
+    metadata_ = Column("metadata", JSONB, nullable=False, default=dict)
+    embedding = Column(Vector(settings.EMBEDDING_DIMENSION), nullable=False)
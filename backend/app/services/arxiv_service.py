@@ -1,14 +1,26 @@
+import asyncio
 import httpx
 import xml.etree.ElementTree as ET
 from typing import List, Dict, Any
+from app.core.config import settings
+from app.utils.singleflight import SingleFlight
 
 class ArxivService:
     BASE_URL = "https://export.arxiv.org/api/query"
 
+    def __init__(self):
+        # arXiv asks clients to keep request rates low
+        self.semaphore = asyncio.Semaphore(settings.ARXIV_MAX_CONCURRENCY)
+        self.flight = SingleFlight("arxiv_search")
+
     async def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
         Search Arxiv for papers related to the query.
+        Identical concurrent searches share one request.
         """
+        return await self.flight.do((query, limit), lambda: self._search(query, limit))
+
+    async def _search(self, query: str, limit: int) -> List[Dict[str, Any]]:
         params = {
             "search_query": f"all:{query}",
             "start": 0,
@@ -17,7 +29,7 @@ class ArxivService:
             "sortOrder": "descending"
         }
         
-        async with httpx.AsyncClient() as client:
+        async with self.semaphore, httpx.AsyncClient() as client:
             try:
                 response = await client.get(self.BASE_URL, params=params, timeout=10.0)
                 response.raise_for_status()
@@ -0,0 +1,85 @@
+from typing import Any, Dict, List
+
+from psycopg2.extras import execute_values
+
+from app.services.postgres_service import postgres_service
+
+
+class ChunkStoreService:
+    """
+    Chunk text lives in the `chunks` table, keyed by vector id; the vector
+    index only carries minimal metadata (doc_id, page).
+
+    Search hits are hydrated with one bulk `WHERE id = ANY(...)` query. Every
+    chunk also records its position in the document (seq).
+    """
+
+    def __init__(self):
+        self.stats = {"hydrated": 0, "dropped": 0}
+
+    def store(self, doc_id: str, chunks: List[Dict[str, Any]]):
+        """chunks: [{"id", "text", "page", "chunk_index"}] in document order."""
+        if not chunks:
+            return
+        with postgres_service.get_cursor() as cur:
+            execute_values(
+                cur,
+                "INSERT INTO chunks (id, doc_id, seq, page, chunk_index, text) VALUES %s ON CONFLICT (id) DO NOTHING",
+                [
+                    (c["id"], doc_id, seq, c.get("page"), c.get("chunk_index", 0), c["text"])
+                    for seq, c in enumerate(chunks)
+                ]
+            )
+
+    def fetch(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Chunk id -> {"text", "source", "page", "chunk_index", "doc_id", "seq"}."""
+        if not ids:
+            return {}
+        with postgres_service.get_cursor() as cur:
+            cur.execute(
+                """
+                SELECT c.id, c.text, d.filename, c.page, c.chunk_index, c.doc_id, c.seq
+                FROM chunks c JOIN documents d ON d.id = c.doc_id
+                WHERE c.id = ANY(%s)
+                """,
+                (list(ids),)
+            )
+            return {
+                chunk_id: {
+                    "text": text, "source": filename, "page": page,
+                    "chunk_index": chunk_index, "doc_id": str(doc_id), "seq": seq
+                }
+                for chunk_id, text, filename, page, chunk_index, doc_id, seq in cur.fetchall()
+            }
+
+    def hydrate(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Fill in the text (and source/page) of search hits whose vector metadata
+        doesn't carry it. Vectors indexed before the chunk store keep their
+        inline metadata and are left alone. Hits whose text can't be found
+        (chunk missing or the fetch failed) are dropped and counted in stats.
+        """
+        missing = list({h["id"] for h in hits if h.get("id") and "text" not in h["metadata"]})
+        chunks: Dict[str, Dict[str, Any]] = {}
+        if missing and postgres_service.connection_pool:
+            try:
+                chunks = self.fetch(missing)
+            except Exception as e:
+                print(f"Chunk hydration failed: {e}")
+
+        hydrated = []
+        for hit in hits:
+            if "text" not in hit["metadata"]:
+                chunk = chunks.get(hit.get("id"))
+                if not chunk:
+                    continue
+                hit["metadata"] = {**hit["metadata"], **chunk}
+            hydrated.append(hit)
+        self.stats["hydrated"] += len(chunks)
+        if len(hydrated) < len(hits):
+            self.stats["dropped"] += len(hits) - len(hydrated)
+            print(f"Chunk hydration: dropped {len(hits) - len(hydrated)} hits without text")
+        return hydrated
+
+
+chunk_store_service = ChunkStoreService()
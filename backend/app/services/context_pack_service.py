@@ -0,0 +1,283 @@
+import asyncio
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from cachetools import LRUCache
+
+from app.services.research_index_service import research_index_service
+from app.services.retrieval_service import retrieval_service
+
+MIN_SECTION_SOURCES = 3
+MAX_SECTION_LINKS = 10
+
+# Everything in the writer prompt that does not change between drafts of a
+# section. Keeping it first (and identical across retries) also lets providers
+# reuse their prompt cache.
+SECTION_CONTEXT_TEMPLATE = """
+Write the following section for a blog post.
+
+Section Title: {title}
+Intent: {intent}
+Target Audience: {audience}
+
+⚠️ STRICT WORD COUNT LIMIT: {target_words} words (±10% acceptable, NOT MORE)
+Maximum allowed: {max_words} words
+Minimum required: {min_words} words
+
+Style Guide: {style}
+
+Internal Links (Insert these naturally if relevant, using [Title](url)):
+{links}
+
+Research Context (You MUST cite these using [source_id] at the end of sentences where appropriate):
+{context}
+
+CRITICAL CONSTRAINTS:
+- You MUST write between {min_words} and {max_words} words for this section
+- This is a HARD LIMIT - exceeding {max_words} words will break the overall blog length target
+- Be concise and focused - quality over quantity
+- When writing, give more weight to information from internal sources (IDs starting with 'int_')
+- If you have more to say, prioritize the most important points to fit the limit
+"""
+
+_WORD_RE = re.compile(r"[a-z0-9]{3,}")
+
+
+def _tokens(text: str) -> set:
+    return set(_WORD_RE.findall(text.lower()))
+
+
+def targeted_source_prefix(section_id: str) -> str:
+    """Source-ID prefix of the internal chunks retrieved for one section."""
+    return f"int_{section_id}_"
+
+
+def internal_chunks_from_hits(section_id: str, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "source_id": f"{targeted_source_prefix(section_id)}{i+1}",
+            "source": "internal",
+            "title": hit["metadata"].get("source", "Internal Doc"),
+            "url": "Internal Knowledge Base",
+            "content": hit["metadata"].get("text", "")
+        }
+        for i, hit in enumerate(hits)
+    ]
+
+
+def section_fingerprint(section: Dict[str, Any], target_words: int) -> str:
+    """Changes whenever the user edits anything a pack depends on."""
+    # The section's own targeted chunks are part of the pack, not an input to it
+    prefix = targeted_source_prefix(section.get("id", ""))
+    payload = json.dumps({
+        "id": section.get("id"),
+        "title": section.get("title"),
+        "intent": section.get("intent"),
+        "source_ids": [sid for sid in section.get("source_ids", []) if not sid.startswith(prefix)],
+        "target_words": target_words
+    }, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def select_internal_links(links: List[Dict[str, str]], section: Dict[str, Any], limit: int = MAX_SECTION_LINKS) -> List[Dict[str, str]]:
+    """Internal links whose title/slug shares the most words with the section."""
+    wanted = _tokens(f"{section.get('title', '')} {section.get('intent', '')}")
+    if not wanted:
+        return []
+    scored = []
+    for link in links:
+        overlap = len(wanted & _tokens(f"{link.get('title', '')} {link.get('url', '')}"))
+        if overlap:
+            scored.append((overlap, link))
+    scored.sort(key=lambda pair: pair[0], reverse=True)
+    return [link for _, link in scored[:limit]]
+
+
+class ContextPackService:
+    """
+    Per-section writer context, precomputed while the run waits at human approval.
+
+    A pack holds the section's ranked research, its targeted internal chunks,
+    the relevant internal links and the rendered static prompt prefix. Packs
+    are keyed by thread and section and carry a fingerprint of the section, so
+    editing one section in the approved outline only rebuilds that pack.
+    """
+
+    def __init__(self, max_threads: int = 200):
+        self._packs: LRUCache = LRUCache(maxsize=max_threads)
+
+    @staticmethod
+    def _attached_chunks(state: Dict[str, Any], section: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Already retrieved for this section (see section_retrieval_node)
+        prefix = targeted_source_prefix(section["id"])
+        return [r for r in state.get("research_data", []) if (r.get("source_id") or "").startswith(prefix)]
+
+    async def _search_sections(self, state: Dict[str, Any], sections: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Section id -> targeted internal chunks, for all sections in one batched search."""
+        sections = [section for section in sections if not self._attached_chunks(state, section)]
+        if not sections or "internal" not in state.get("research_sources", []) or not state.get("selected_bins"):
+            return {}
+        per_section = await retrieval_service.search_each(
+            [f"{section['title']}: {section['intent']}" for section in sections],
+            state.get("user_id"),
+            state.get("selected_bins", []),
+            top_k=3
+        )
+        return {section["id"]: internal_chunks_from_hits(section["id"], hits) for section, hits in zip(sections, per_section)}
+
+    async def _internal_chunks(
+        self,
+        state: Dict[str, Any],
+        section: Dict[str, Any],
+        batch: Optional[asyncio.Task] = None
+    ) -> List[Dict[str, Any]]:
+        attached = self._attached_chunks(state, section)
+        if attached:
+            return attached
+        if "internal" not in state.get("research_sources", []) or not state.get("selected_bins"):
+            return []
+        if batch is not None:
+            # Shared by every section of the precompute; one section timing out must not cancel it
+            return (await asyncio.shield(batch)).get(section["id"], [])
+        hits = await retrieval_service.search(
+            [f"{section['title']}: {section['intent']}"],
+            state.get("user_id"),
+            state.get("selected_bins", []),
+            top_k=3
+        )
+        return internal_chunks_from_hits(section["id"], hits)
+
+    async def _rank_research(self, research: List[Dict[str, Any]], section: Dict[str, Any]) -> List[Dict[str, Any]]:
+        research_by_id = {r.get("source_id"): r for r in research if r.get("source_id")}
+        relevant = [
+            research_by_id[sid] for sid in dict.fromkeys(section.get("source_ids", []))
+            if sid in research_by_id
+        ]
+
+        # Fill gaps with the sources most similar to this section's intent
+        if len(relevant) < MIN_SECTION_SOURCES:
+            try:
+                ranked = await research_index_service.rank_for_sections(research, [section], top_k=MIN_SECTION_SOURCES * 2)
+                chosen = {r.get("source_id") for r in relevant}
+                for sid in ranked.get(section["id"], []):
+                    if len(relevant) >= MIN_SECTION_SOURCES:
+                        break
+                    if sid not in chosen:
+                        relevant.append(research_by_id[sid])
+                        chosen.add(sid)
+            except Exception as e:
+                print(f"Research ranking failed for section {section['id']}: {e}")
+
+        # Last resort: top 3 from general research
+        return relevant or research[:MIN_SECTION_SOURCES]
+
+    async def build_pack(
+        self,
+        state: Dict[str, Any],
+        section: Dict[str, Any],
+        internal_batch: Optional[asyncio.Task] = None
+    ) -> Dict[str, Any]:
+        """internal_batch: a pending _search_sections() covering this section, if any."""
+        target_words = state.get("section_word_budgets", {}).get(section["id"], 500)
+
+        research_task = self._rank_research(state.get("research_data", []), section)
+        chunks_task = self._internal_chunks(state, section, internal_batch)
+        relevant_research, internal_chunks = await asyncio.gather(research_task, chunks_task, return_exceptions=True)
+        if isinstance(relevant_research, Exception):
+            print(f"Research ranking failed for section {section['id']}: {relevant_research}")
+            relevant_research = state.get("research_data", [])[:MIN_SECTION_SOURCES]
+        if isinstance(internal_chunks, Exception):
+            print(f"Targeted internal retrieval failed for section {section['id']}: {internal_chunks}")
+            internal_chunks = []
+
+        known_ids = {r.get("source_id") for r in relevant_research}
+        sources = relevant_research + [c for c in internal_chunks if c["source_id"] not in known_ids]
+        links = select_internal_links(state.get("internal_links", []), section)
+
+        context_str = "\n\n".join([
+            f"Source ID: {r.get('source_id')}\nTitle: {r.get('title')}\nContent: {(r.get('content') or '')[:500]}"
+            for r in sources
+        ])
+        links_str = "\n".join([f"- {l['title']}: {l['url']}" for l in links])
+
+        static_context = SECTION_CONTEXT_TEMPLATE.format(
+            title=section["title"],
+            intent=section["intent"],
+            audience=state.get("target_audience") or "General Audience",
+            target_words=target_words,
+            min_words=int(target_words * 0.9),
+            max_words=int(target_words * 1.1),
+            style=str(state.get("style_profile", {})),
+            links=links_str,
+            context=context_str
+        )
+
+        return {
+            "fingerprint": section_fingerprint(section, target_words),
+            "research": relevant_research,
+            "internal_chunks": internal_chunks,
+            "links": links,
+            "target_words": target_words,
+            "static_context": static_context
+        }
+
+    def precompute(self, thread_id: str, state: Dict[str, Any]):
+        """Start building packs for every outlined section in the background."""
+        packs = self._packs.get(thread_id) or {}
+        stale = []
+        for section in state.get("outline", []):
+            target_words = state.get("section_word_budgets", {}).get(section["id"], 500)
+            fingerprint = section_fingerprint(section, target_words)
+            existing = packs.get(section["id"])
+            if existing and existing[0] == fingerprint and not existing[1].cancelled():
+                continue
+            stale.append((section, fingerprint))
+        if stale:
+            # Targeted internal chunks for every section come from one batched search
+            batch = asyncio.create_task(self._search_sections(state, [section for section, _ in stale]))
+            for section, fingerprint in stale:
+                packs[section["id"]] = (fingerprint, asyncio.create_task(self.build_pack(state, section, batch)))
+        self._packs[thread_id] = packs
+        print(f"ContextPackService: precomputing {len(packs)} section packs for thread {thread_id}")
+
+    def finished_internal_chunks(self, thread_id: Optional[str], state: Dict[str, Any], section: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Internal chunks of an already built, still valid pack; None if there is none yet."""
+        packs = self._packs.get(thread_id) if thread_id else None
+        entry = packs.get(section["id"]) if packs else None
+        target_words = state.get("section_word_budgets", {}).get(section["id"], 500)
+        if not entry or entry[0] != section_fingerprint(section, target_words):
+            return None
+        task = entry[1]
+        if not task.done() or task.cancelled() or task.exception():
+            return None
+        return task.result()["internal_chunks"]
+
+    async def get_pack(self, thread_id: Optional[str], state: Dict[str, Any], section: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Return the section's pack, reusing the precomputed one when the section
+        is unchanged. Edited, missing or cancelled packs are rebuilt (and stored).
+        """
+        target_words = state.get("section_word_budgets", {}).get(section["id"], 500)
+        fingerprint = section_fingerprint(section, target_words)
+        packs = self._packs.get(thread_id) if thread_id else None
+
+        if packs is not None:
+            entry = packs.get(section["id"])
+            if entry and entry[0] == fingerprint and not entry[1].cancelled():
+                try:
+                    # Shielded: a writer that runs out of budget must not cancel the shared pack
+                    return await asyncio.shield(entry[1])
+                except Exception as e:
+                    print(f"Precomputed pack for section {section['id']} failed: {e}")
+
+        task = asyncio.create_task(self.build_pack(state, section))
+        if thread_id:
+            packs = packs if packs is not None else {}
+            packs[section["id"]] = (fingerprint, task)
+            self._packs[thread_id] = packs
+        return await asyncio.shield(task)
+
+
+context_pack_service = ContextPackService()
@@ -1,25 +1,132 @@
+import hashlib
+import re
+import threading
+import numpy as np
+from cachetools import LRUCache
+from psycopg2.extras import execute_values
 from langchain_openai import OpenAIEmbeddings
 from langchain_ollama import OllamaEmbeddings
 from app.core.config import settings
+from app.services.postgres_service import postgres_service
+from app.utils.singleflight import ThreadSingleFlight
 
 class EmbeddingService:
+    """
+    Embeddings with a two-level cache keyed by (model, normalized text).
+
+    Level 1 is an in-process LRU; level 2 is the `embedding_cache` table in
+    Postgres. Vectors are stored as float32 bytes in both tiers, and only the
+    texts missing from both are sent to the embedding provider. A text that
+    another request is already embedding is waited for rather than sent twice.
+    """
+
     def __init__(self):
         if settings.USE_LOCAL_EMBEDDINGS:
             print(f"Using Local Embeddings: {settings.LOCAL_EMBEDDING_MODEL}")
+            self.model_name = settings.LOCAL_EMBEDDING_MODEL
             self.embeddings = OllamaEmbeddings(
                 model=settings.LOCAL_EMBEDDING_MODEL,
                 base_url=settings.OLLAMA_BASE_URL
             )
         else:
+            self.model_name = "text-embedding-3-small"
             self.embeddings = OpenAIEmbeddings(
-                model="text-embedding-3-small",
+                model=self.model_name,
                 api_key=settings.OPENAI_API_KEY
             )
+        self._memory = LRUCache(maxsize=settings.EMBEDDING_CACHE_SIZE)
+        self._lock = threading.Lock()
+        self._flight = ThreadSingleFlight("embeddings")
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return re.sub(r"\s+", " ", text).strip()
+
+    def _key(self, normalized_text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\x00{normalized_text}".encode("utf-8")).hexdigest()
+
+    def _load_persistent(self, keys: list[str]) -> dict[str, bytes]:
+        if not settings.EMBEDDING_CACHE_PERSIST or not postgres_service.connection_pool or not keys:
+            return {}
+        try:
+            with postgres_service.get_cursor() as cur:
+                cur.execute("SELECT key, vector FROM embedding_cache WHERE key = ANY(%s)", (keys,))
+                return {key: bytes(vector) for key, vector in cur.fetchall()}
+        except Exception as e:
+            print(f"Embedding cache lookup failed: {e}")
+            return {}
+
+    def _store_persistent(self, entries: dict[str, bytes]):
+        if not settings.EMBEDDING_CACHE_PERSIST or not postgres_service.connection_pool or not entries:
+            return
+        try:
+            with postgres_service.get_cursor() as cur:
+                execute_values(
+                    cur,
+                    "INSERT INTO embedding_cache (key, model, vector) VALUES %s ON CONFLICT (key) DO NOTHING",
+                    [(key, self.model_name, vector) for key, vector in entries.items()]
+                )
+        except Exception as e:
+            print(f"Embedding cache store failed: {e}")
+
+    def _embed_cached(self, texts: list[str]) -> list[list[float]]:
+        normalized = [self._normalize(t) for t in texts]
+        keys = [self._key(t) for t in normalized]
+
+        found: dict[str, bytes] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    found[key] = self._memory[key]
+
+        missing = [k for k in dict.fromkeys(keys) if k not in found]
+        if missing:
+            from_db = self._load_persistent(missing)
+            found.update(from_db)
+            missing = [k for k in missing if k not in from_db]
+
+        fresh: dict[str, bytes] = {}
+        if missing:
+            text_by_key = dict(zip(keys, normalized))
+            # Texts another thread is already embedding are awaited, not re-sent
+            owned, waiting = self._flight.claim(missing)
+            try:
+                if owned:
+                    vectors = self.embeddings.embed_documents([text_by_key[k] for k in owned])
+                    for key, vector in zip(owned, vectors):
+                        fresh[key] = np.asarray(vector, dtype=np.float32).tobytes()
+                    with self._lock:
+                        self._memory.update(fresh)
+                    self._store_persistent(fresh)
+            finally:
+                self._flight.release(owned)
+
+            for key, event in waiting.items():
+                event.wait(timeout=60)
+                with self._lock:
+                    vector = self._memory.get(key)
+                if vector is None:
+                    # The owner failed; embed it ourselves
+                    vector = np.asarray(self.embeddings.embed_query(text_by_key[key]), dtype=np.float32).tobytes()
+                    fresh[key] = vector
+                found[key] = vector
+            found.update(fresh)
+
+        with self._lock:
+            for key in keys:
+                self._memory[key] = found[key]
+
+        hits = len(texts) - len(missing)
+        if len(texts) > 1 or missing:
+            print(f"EmbeddingService: {hits}/{len(texts)} cache hits, embedded {len(fresh)}")
+        return [np.frombuffer(found[k], dtype=np.float32).tolist() for k in keys]
 
     def embed_documents(self, texts: list[str]) -> list[list[float]]:
-        return self.embeddings.embed_documents(texts)
+        if not texts:
+            return []
+        return self._embed_cached(texts)
 
     def embed_query(self, text: str) -> list[float]:
-        return self.embeddings.embed_query(text)
+        return self._embed_cached([text])[0]
 
 embedding_service = EmbeddingService()
@@ -1,13 +1,64 @@
+import asyncio
+import json
+import re
+import time
+from typing import Any, Dict, List, Optional, Set
 from firecrawl import Firecrawl
 from app.core.config import settings
+from app.services.page_extractor import PageExtractor
+from app.services.page_cache_service import page_cache_service
+from app.services.local_search_index import LocalSearchIndex
+from app.utils.urls import canonicalize_url
+from app.utils.singleflight import SingleFlight
+
+def _as_dict(obj) -> Dict[str, Any]:
+    if hasattr(obj, 'model_dump'):
+        return obj.model_dump()
+    return obj if isinstance(obj, dict) else {}
+
+def _relevance(query: str, item: Dict[str, Any]) -> float:
+    """Share of query words that appear in the result's title/description."""
+    words = set(re.findall(r"[a-z0-9]{3,}", query.lower()))
+    if not words:
+        return 0.0
+    text = f"{item.get('title') or ''} {item.get('description') or ''}".lower()
+    return sum(1 for w in words if w in text) / len(words)
 
 class FirecrawlService:
+    """
+    Web search and page scraping.
+
+    asearch() runs in two phases: a cheap snippet-only search, then a scrape of
+    just the top results that survive URL dedup and relevance ranking. With
+    SCRAPE_ENGINE="local" the scrape phase uses the local PageExtractor instead
+    of Firecrawl's scraper. All scrapes go through the shared page cache.
+    With SEARCH_PROVIDER="local" searches hit the offline full-text index
+    instead, and nothing leaves the machine.
+    """
+
     def __init__(self):
         self.app = Firecrawl(api_key=settings.FIRECRAWL_API_KEY)
+        # Shared by every run so concurrent searches stay within provider limits
+        self.semaphore = asyncio.Semaphore(settings.FIRECRAWL_MAX_CONCURRENCY)
+        # Identical searches from concurrent runs share one provider call
+        self.search_flight = SingleFlight("firecrawl_search")
+        self.use_local_scraper = settings.SCRAPE_ENGINE == "local"
+        self.extractor = PageExtractor(
+            max_chars=settings.LOCAL_SCRAPE_MAX_CHARS,
+            per_domain_concurrency=settings.LOCAL_SCRAPE_PER_DOMAIN_CONCURRENCY
+        )
+        self.local_index = None
+        if settings.SEARCH_PROVIDER == "local":
+            self.local_index = LocalSearchIndex(settings.LOCAL_SEARCH_INDEX_PATH, max_content_chars=settings.LOCAL_SCRAPE_MAX_CHARS)
 
-    def search(self, query: str, limit: int = 5):
+    def search(self, query: str, limit: int = 5, scrape: bool = True):
         print(f"FirecrawlService: Searching for '{query}'")
+        if self.local_index is not None:
+            # Offline index results already carry their content
+            return {"web": self.local_index.search(query, limit=limit)}
         try:
+            if self.use_local_scraper or not scrape:
+                return self.app.search(query, limit=limit)
             return self.app.search(
                 query, 
                 limit=limit,
@@ -17,10 +68,97 @@ class FirecrawlService:
             print(f"FirecrawlService Error: {e}")
             raise e
 
+    async def _snippet_search(self, query: str, limit: int):
+        async with self.semaphore:
+            return await asyncio.to_thread(self.search, query, limit, False)
+
+    async def _fetch_page(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+        """Uncached scrape in the page cache's format. Conditional headers only apply to the local engine."""
+        if self.use_local_scraper:
+            return await self.extractor.extract(url, max_chars=settings.LOCAL_SCRAPE_PAGE_MAX_CHARS, headers=headers)
+        async with self.semaphore:
+            result = _as_dict(await asyncio.to_thread(self.scrape, url))
+        if not result.get('markdown'):
+            return None
+        metadata = result.get('metadata') or {}
+        # Firecrawl does not pass on validators, so these entries simply expire
+        return {"url": url, "title": metadata.get('title') or '', "markdown": result['markdown'], "etag": None, "last_modified": None}
+
+    async def _scrape_markdown(self, url: str) -> Optional[str]:
+        page = await page_cache_service.get(url, self._fetch_page)
+        if not page:
+            return None
+        if self.use_local_scraper:
+            return page["markdown"][:settings.LOCAL_SCRAPE_MAX_CHARS]
+        return page["markdown"]
+
+    async def asearch(self, query: str, limit: int = 5, scrape_top: Optional[int] = None, seen_urls: Optional[Set[str]] = None):
+        """
+        Two-phase search. Returns {"web": items, "stats": {...}} where only the
+        selected items carry scraped `markdown`; the rest keep their snippet.
+
+        seen_urls (canonical form) is shared across concurrent calls of one run
+        so the same page is not scraped twice; it is updated in place.
+        """
+        scrape_top = settings.SEARCH_SCRAPE_TOP_N if scrape_top is None else scrape_top
+        seen_urls = seen_urls if seen_urls is not None else set()
+
+        # Phase 1: snippets only
+        started = time.perf_counter()
+        results = _as_dict(await self.search_flight.do((query, limit), lambda: self._snippet_search(query, limit)))
+        # Copies, since coalesced callers get the same response and items are mutated below
+        items = [dict(_as_dict(i)) for i in (results.get('web') or results.get('data') or [])]
+        snippet_ms = (time.perf_counter() - started) * 1000
+        snippet_bytes = len(json.dumps(items, default=str).encode("utf-8"))
+
+        # Dedup by canonical URL, then rank what is left by relevance to the query
+        candidates = []
+        for item in items:
+            key = canonicalize_url(item.get('url') or '')
+            if key and key not in seen_urls:
+                candidates.append(item)
+        candidates.sort(key=lambda i: _relevance(query, i), reverse=True)
+        selected = candidates[:scrape_top]
+        for item in selected:
+            seen_urls.add(canonicalize_url(item['url']))
+
+        # Phase 2: scrape only the selected pages that came back without content, concurrently
+        to_scrape = [i for i in selected if not i.get('markdown')]
+        started = time.perf_counter()
+        pages = await asyncio.gather(*[self._scrape_markdown(i['url']) for i in to_scrape], return_exceptions=True)
+        scrape_bytes = 0
+        for item, markdown in zip(to_scrape, pages):
+            if isinstance(markdown, Exception):
+                print(f"FirecrawlService: scrape failed for {item['url']}: {markdown}")
+                continue
+            if markdown:
+                item['markdown'] = markdown
+                scrape_bytes += len(markdown.encode("utf-8"))
+        scrape_ms = (time.perf_counter() - started) * 1000
+
+        stats = {
+            "query": query,
+            "results": len(items),
+            "scraped": len(to_scrape),
+            "snippet_ms": round(snippet_ms),
+            "snippet_bytes": snippet_bytes,
+            "scrape_ms": round(scrape_ms),
+            "scrape_bytes": scrape_bytes
+        }
+        print(f"FirecrawlService: two-phase search stats {stats}")
+        return {"web": items, "stats": stats}
+
     def scrape(self, url: str):
         return self.app.scrape(
             url, 
             formats=["markdown"]
         )
 
+    async def ascrape(self, url: str):
+        """Non-blocking, cached scrape; returns {"markdown", "metadata"} or None."""
+        page = await page_cache_service.get(url, self._fetch_page)
+        if not page:
+            return None
+        return {"markdown": page["markdown"], "metadata": {"title": page["title"], "url": page["url"]}}
+
 firecrawl_service = FirecrawlService()
@@ -6,7 +6,9 @@ from app.core.models import Document, DocumentStatus
 from app.services.pdf_service import pdf_service
 from app.services.chunking_service import chunking_service
 from app.services.embedding_service import embedding_service
-from app.services.pinecone_service import pinecone_service
+from app.services.vector_store_service import vector_store
+from app.services.chunk_store_service import chunk_store_service
+from app.services.namespace_version_service import namespace_version_service
 from app.core.database import AsyncSessionLocal
 
 logger = logging.getLogger(__name__)
@@ -19,8 +21,8 @@ async def process_document_task(doc_id: uuid.UUID, file_content: bytes, filename
     1. Update status to PARSING.
     2. Extract text from PDF (CPU bound).
     3. Chunk text (CPU bound).
-    4. Embed chunks (IO bound).
-    5. Upsert to Pinecone (IO bound).
+    4. Embed chunks (IO bound) and store their text in the chunks table.
+    5. Upsert to the vector store (IO bound).
     6. Update status to READY.
     
     Handles errors by updating status to FAILED and logging the exception.
@@ -68,25 +70,34 @@ async def process_document_task(doc_id: uuid.UUID, file_content: bytes, filename
             except Exception as e:
                 raise ValueError(f"Embedding failed: {str(e)}")
             
-            # 4. Prepare Vectors for Pinecone
+            # 4. Prepare Vectors and store chunk text
+            # The text goes to the chunks table; vectors carry only doc_id and page
             vectors = []
+            chunk_rows = []
             for i, chunk in enumerate(chunks):
                 vector_id = str(uuid.uuid4())
-                vectors.append((
-                    vector_id,
-                    embeddings[i],
-                    {
-                        "text": chunk["text"],
-                        **chunk["metadata"],
-                        "doc_id": str(doc_id)
-                    }
-                ))
+                page = chunk["metadata"].get("page")
+                vectors.append((vector_id, embeddings[i], {"doc_id": str(doc_id), "page": page}))
+                chunk_rows.append({
+                    "id": vector_id,
+                    "text": chunk["text"],
+                    "page": page,
+                    "chunk_index": chunk["metadata"].get("chunk_index", 0)
+                })
+            try:
+                await asyncio.to_thread(chunk_store_service.store, str(doc_id), chunk_rows)
+            except Exception as e:
+                raise ValueError(f"Chunk store failed: {str(e)}")
                 
-            # 5. Upsert to Pinecone (IO bound but sync client)
+            # 5. Upsert to the vector store (batched, concurrent)
             try:
-                await asyncio.to_thread(pinecone_service.upsert_vectors, vectors, namespace)
+                upsert_stats = await vector_store.aupsert_vectors(vectors, namespace)
+                logger.info(
+                    f"Upserted {upsert_stats['vectors']} vectors for document {doc_id} in {upsert_stats['batches']} batches "
+                    f"({upsert_stats['vectors_per_second']} vectors/s)"
+                )
             except Exception as e:
-                raise ValueError(f"Pinecone upsert failed: {str(e)}")
+                raise ValueError(f"Vector upsert failed: {str(e)}")
             
             # Update status to READY
             doc.status = DocumentStatus.READY
@@ -103,3 +114,6 @@ async def process_document_task(doc_id: uuid.UUID, file_content: bytes, filename
                 await db.commit()
             except Exception as commit_error:
                 logger.error(f"Failed to save error state for document {doc_id}: {commit_error}")
+        finally:
+            # Vectors (or the document's status) changed: invalidate cached searches of this bin
+            await asyncio.to_thread(namespace_version_service.bump, namespace)
@@ -0,0 +1,199 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+STOPWORDS = {
+    "a", "about", "above", "after", "again", "against", "all", "also", "am", "an", "and", "any", "are", "as",
+    "at", "be", "because", "been", "before", "being", "below", "between", "both", "but", "by", "can", "could",
+    "did", "do", "does", "doing", "down", "during", "each", "etc", "every", "few", "for", "from", "further",
+    "get", "gets", "had", "has", "have", "having", "he", "her", "here", "hers", "him", "his", "how", "i", "if",
+    "in", "include", "including", "into", "is", "it", "its", "just", "let", "like", "make", "many", "me",
+    "more", "most", "much", "must", "my", "need", "no", "nor", "not", "now", "of", "off", "on", "once", "only",
+    "or", "other", "our", "ours", "out", "over", "own", "please", "same", "she", "should", "so", "some", "such",
+    "than", "that", "the", "their", "theirs", "them", "then", "there", "these", "they", "this", "those",
+    "through", "to", "too", "under", "until", "up", "use", "using", "very", "want", "was", "we", "were", "what",
+    "when", "where", "which", "while", "who", "whom", "why", "will", "with", "would", "you", "your", "yours",
+    "focus", "mention", "cover", "discuss", "explain", "write", "article", "blog", "post", "topic", "readers",
+}
+
+# Generic blog/web prose. Words common here (guide, benefits, best...) carry
+# little information about a specific topic and are down-weighted via IDF.
+BACKGROUND_CORPUS = (
+    "The complete guide to getting started, with tips, best practices and common mistakes to avoid.",
+    "In this post we explain the benefits and drawbacks and how it works in practice.",
+    "Everything you need to know about the latest trends and what they mean for the future.",
+    "A step by step tutorial for beginners with examples and an overview of the basics.",
+    "Why it matters for businesses, teams and customers, and how to improve results.",
+    "We compare the top tools, platforms and solutions and review their features and pricing.",
+    "Key statistics, data and research findings from recent industry reports and surveys.",
+    "How to choose the right approach, strategy and framework for your use case.",
+    "Frequently asked questions, answers and expert advice from professionals in the field.",
+    "The history, evolution and current state of the technology and the market.",
+    "Pros and cons, advantages and disadvantages, and real world case studies.",
+    "Top ten ways to save time, reduce costs and increase productivity and growth.",
+    "What is it, how does it work, and what are the most important things to consider.",
+    "An introduction to the concepts, terminology and key ideas behind the system.",
+    "Lessons learned, challenges and opportunities for companies and developers.",
+    "The ultimate checklist and template to plan, build, launch and measure success.",
+    "New research shows how performance, quality and security have changed over the years.",
+    "Our analysis of the impact on users, people and organizations around the world.",
+    "A simple explanation of the process, the benefits and the risks involved.",
+    "Best practices for managing data, software, content and marketing in modern teams.",
+)
+
+# Query suffixes keyed by words that may appear in the target audience
+AUDIENCE_MODIFIERS = (
+    ({"developer", "developers", "engineer", "engineers", "technical", "programmer", "programmers", "researcher", "researchers"},
+     ["implementation details", "benchmarks"]),
+    ({"executive", "executives", "business", "manager", "managers", "leader", "leaders", "founder", "founders", "cfo", "cto", "ceo"},
+     ["business impact ROI", "case study"]),
+    ({"marketer", "marketers", "marketing", "seo", "growth"},
+     ["strategy examples", "metrics"]),
+    ({"beginner", "beginners", "student", "students", "general", "newcomer", "newcomers", "non-technical"},
+     ["explained simply", "getting started guide"]),
+)
+DEFAULT_MODIFIERS = ["latest statistics", "expert analysis"]
+GENERIC_PHRASE_PENALTY = 0.25
+DATA_WORDS = {"statistic", "statistics", "data", "numbers", "figures", "metrics", "percent", "percentage", "survey", "study", "studies"}
+
+_SPLIT_RE = re.compile(r"[.,;:!?()\[\]{}\"\n\t|/\\]+|\s[-–—]\s")
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#.\-']*[a-z0-9+#]|[a-z0-9]")
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+class KeyphraseService:
+    """
+    LLM-free search query generation.
+
+    Candidate phrases are RAKE-style runs of non-stopwords; each word is scored
+    by its degree/frequency ratio times its IDF against a small background corpus
+    of generic web prose, so topic-specific terms outrank filler. The best phrases
+    are combined with the topic and audience modifiers into search queries.
+    """
+
+    def __init__(self, corpus=BACKGROUND_CORPUS):
+        docs = [set(_words(doc)) for doc in corpus]
+        df = Counter(w for doc in docs for w in doc)
+        self._num_docs = len(docs)
+        self._df = df
+
+    def idf(self, word: str) -> float:
+        return math.log((self._num_docs + 1) / (self._df.get(word, 0) + 1)) + 1.0
+
+    @staticmethod
+    def _candidates(text: str) -> List[List[str]]:
+        phrases = []
+        for fragment in _SPLIT_RE.split(text.lower()):
+            current: List[str] = []
+            for word in _words(fragment):
+                if word in STOPWORDS or word.isdigit() and len(word) < 4:
+                    if current:
+                        phrases.append(current)
+                    current = []
+                else:
+                    current.append(word)
+            if current:
+                phrases.append(current)
+        # Very long runs are usually sentences without stopwords, not phrases
+        return [p[:4] for p in phrases]
+
+    def extract(self, texts: Dict[str, str], weights: Optional[Dict[str, float]] = None, top_n: int = 8) -> List[str]:
+        """
+        Ranked keyphrases from several named texts (e.g. topic, guidelines).
+        weights multiplies the score of phrases found in each text.
+        """
+        weights = weights or {}
+        candidates = {name: self._candidates(text or "") for name, text in texts.items()}
+
+        freq: Counter = Counter()
+        degree: Counter = Counter()
+        for phrases in candidates.values():
+            for phrase in phrases:
+                for word in phrase:
+                    freq[word] += 1
+                    degree[word] += len(phrase)
+
+        scores: Dict[str, float] = {}
+        for name, phrases in candidates.items():
+            for phrase in phrases:
+                key = " ".join(phrase)
+                score = sum(degree[w] / freq[w] * self.idf(w) for w in phrase) * weights.get(name, 1.0)
+                if all(w in self._df for w in phrase):
+                    # Made only of generic words ("complete guide", "best practices")
+                    score *= GENERIC_PHRASE_PENALTY
+                scores[key] = max(scores.get(key, 0.0), score)
+
+        ranked = sorted(scores, key=lambda k: scores[k], reverse=True)
+        # Drop phrases fully contained in a higher ranked one
+        selected: List[str] = []
+        for phrase in ranked:
+            if any(f" {phrase} " in f" {kept} " for kept in selected):
+                continue
+            selected.append(phrase)
+            if len(selected) >= top_n:
+                break
+        return selected
+
+    @staticmethod
+    def audience_modifiers(audience: str) -> List[str]:
+        words = set(_words(audience or ""))
+        for keys, modifiers in AUDIENCE_MODIFIERS:
+            if words & keys:
+                return modifiers
+        return DEFAULT_MODIFIERS
+
+    def generate_queries(
+        self,
+        topic: str,
+        guidelines: Optional[List[str]] = None,
+        extra_context: str = "",
+        audience: str = "",
+        num_queries: int = 4,
+        exclude: Optional[List[str]] = None
+    ) -> List[str]:
+        """3-5 search queries built from keyphrases; exclude skips queries already run."""
+        guidelines = guidelines or []
+        topic_phrases = self.extract({"topic": topic}, top_n=4)
+        phrases = self.extract(
+            {"topic": topic, "guidelines": "\n".join(guidelines), "extra_context": extra_context},
+            weights={"topic": 2.0, "guidelines": 1.5, "extra_context": 1.0},
+            top_n=num_queries * 3
+        )
+        # Short topics already read like a query; long ones are reduced to their top phrases
+        topic_words = _words(topic)
+        if len(topic_words) <= 8 or not topic_phrases:
+            core = " ".join(topic_words) or topic.strip()
+        else:
+            core = " ".join(topic_phrases[:2])
+        core_words = set(core.split())
+        modifiers = self.audience_modifiers(audience)
+
+        candidates = [core]
+        if DATA_WORDS & set(_words(" ".join(guidelines))):
+            candidates.append(f"{core} statistics")
+        # Phrases that add something beyond the core make the follow-up queries
+        for phrase in phrases:
+            if not set(phrase.split()) <= core_words:
+                candidates.append(f"{core} {phrase}")
+        for modifier in modifiers:
+            candidates.append(f"{core} {modifier}")
+
+        excluded = {q.lower().strip() for q in exclude or []}
+        queries: List[str] = []
+        for query in candidates:
+            if query.lower() in excluded or query in queries:
+                continue
+            queries.append(query)
+        # Keep a mix: keyphrase queries first, then at least one audience query
+        if len(queries) > num_queries:
+            audience_queries = [q for q in queries if any(q.endswith(m) for m in modifiers)]
+            head = [q for q in queries if q not in audience_queries][:num_queries - 1]
+            queries = head + audience_queries[:1] if audience_queries else queries[:num_queries]
+        return queries
+
+
+keyphrase_service = KeyphraseService()
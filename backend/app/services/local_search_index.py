@@ -0,0 +1,149 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    content TEXT NOT NULL DEFAULT '',
+    content_hash TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, content, content='documents', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    INSERT INTO documents_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+END;
+"""
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _content_hash(title: str, content: str) -> str:
+    return hashlib.sha1(f"{title}\x00{content}".encode("utf-8")).hexdigest()
+
+
+def fts_query(query: str) -> str:
+    """
+    Turn a free-text search query into a safe FTS5 expression: every term is
+    quoted (so FTS operators in user text are inert) and OR-ed, letting bm25
+    rank documents that match more terms first. Search-engine operators like
+    `site:reddit.com` are dropped.
+    """
+    terms = []
+    for token in query.split():
+        if ":" in token or token.upper() in {"OR", "AND", "NOT"}:
+            continue
+        terms.extend(_TERM_RE.findall(token.lower()))
+    return " OR ".join(f'"{t}"' for t in dict.fromkeys(terms))
+
+
+class LocalSearchIndex:
+    """
+    Offline full-text search over an imported document corpus (SQLite FTS5).
+
+    Documents are keyed by URL and carry a content hash, so re-importing a
+    corpus only rewrites the documents that changed. search() returns items
+    shaped like Firecrawl search results ({"url", "title", "description",
+    "markdown"}), so research nodes consume them unchanged.
+    """
+
+    def __init__(self, path: str, snippet_tokens: int = 32, max_content_chars: int = 2000):
+        self.path = path
+        self.snippet_tokens = snippet_tokens
+        self.max_content_chars = max_content_chars
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections are per thread; searches run via asyncio.to_thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path)
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def upsert_documents(self, docs: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Add or refresh documents ({"url", "title", "content"}); unchanged ones are skipped."""
+        conn = self._conn()
+        stats = {"added": 0, "updated": 0, "unchanged": 0}
+        now = time.time()
+        with conn:
+            for doc in docs:
+                url = doc.get("url")
+                if not url:
+                    continue
+                title = doc.get("title") or ""
+                content = doc.get("content") or ""
+                digest = _content_hash(title, content)
+                row = conn.execute("SELECT content_hash FROM documents WHERE url = ?", (url,)).fetchone()
+                if row is None:
+                    conn.execute(
+                        "INSERT INTO documents (url, title, content, content_hash, updated_at) VALUES (?, ?, ?, ?, ?)",
+                        (url, title, content, digest, now)
+                    )
+                    stats["added"] += 1
+                elif row[0] != digest:
+                    conn.execute(
+                        "UPDATE documents SET title = ?, content = ?, content_hash = ?, updated_at = ? WHERE url = ?",
+                        (title, content, digest, now, url)
+                    )
+                    stats["updated"] += 1
+                else:
+                    stats["unchanged"] += 1
+        return stats
+
+    def remove_missing(self, keep_urls: Iterable[str]) -> int:
+        """Delete documents whose URL is not in keep_urls (after a full re-import)."""
+        conn = self._conn()
+        keep = set(keep_urls)
+        stale = [url for (url,) in conn.execute("SELECT url FROM documents") if url not in keep]
+        with conn:
+            conn.executemany("DELETE FROM documents WHERE url = ?", [(u,) for u in stale])
+        return len(stale)
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        expression = fts_query(query)
+        if not expression:
+            return []
+        rows = self._conn().execute(
+            f"""
+            SELECT d.url, d.title, snippet(documents_fts, 1, '', '', '...', {int(self.snippet_tokens)}),
+                   substr(d.content, 1, ?), bm25(documents_fts, 5.0, 1.0)
+            FROM documents_fts
+            JOIN documents d ON d.id = documents_fts.rowid
+            WHERE documents_fts MATCH ?
+            ORDER BY bm25(documents_fts, 5.0, 1.0)
+            LIMIT ?
+            """,
+            (self.max_content_chars, expression, limit)
+        ).fetchall()
+        return [
+            {"url": url, "title": title, "description": snippet, "markdown": content, "score": -rank}
+            for url, title, snippet, content, rank in rows
+        ]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,213 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.services.vector_store import VectorRecord, VectorStore, matches_filter
+from app.utils.vector_math import normalize_rows, to_matrix
+
+
+class _Namespace:
+    def __init__(self, ids: List[str], metadata: List[Dict[str, Any]], vectors: np.ndarray):
+        self.ids = ids
+        self.metadata = metadata
+        self.vectors = vectors
+        self.rows = {vector_id: row for row, vector_id in enumerate(ids)}
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store: exact cosine search with NumPy, no network hop.
+
+    Each namespace lives in its own directory as a normalized float32 matrix
+    (vectors-<n>.npy, opened memory-mapped so only the pages a query touches
+    are read) plus ids/metadata in records.json, which names the matrix file.
+    Every upsert or delete copies the whole namespace and rewrites both files,
+    so indexing a document costs O(namespace size); that is fine for a
+    knowledge bin but not for bulk loads one vector at a time. Writers are
+    serialized and do their disk work without holding the lock queries take:
+    queries on a loaded namespace only wait for the in-memory swap.
+    Exact search is a single matmul, which stays in the low milliseconds up to
+    a few hundred thousand chunks per namespace - far beyond a knowledge bin.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.Lock() # Guards _namespaces only; never held across disk I/O
+        self._write_lock = threading.Lock() # Serializes writers so concurrent upserts don't drop rows
+
+    def _dir(self, namespace: str) -> str:
+        return os.path.join(self.path, re.sub(r"[^A-Za-z0-9_.-]", "_", namespace))
+
+    def _read(self, namespace: str) -> Optional[_Namespace]:
+        directory = self._dir(namespace)
+        for _ in range(3):
+            try:
+                with open(os.path.join(directory, "records.json"), "r", encoding="utf-8") as f:
+                    records = json.load(f)
+                vectors = np.load(os.path.join(directory, records.get("vectors", "vectors.npy")), mmap_mode="r")
+            except FileNotFoundError:
+                # A writer replaced the files between our two reads; try the new pair
+                continue
+            return _Namespace(records["ids"], records["metadata"], vectors)
+        return None
+
+    def _load(self, namespace: str) -> Optional[_Namespace]:
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+        if ns is not None:
+            return ns
+        ns = self._read(namespace)
+        if ns is None:
+            return None
+        with self._lock:
+            # A writer may have swapped in a newer namespace while we read
+            return self._namespaces.setdefault(namespace, ns)
+
+    def _swap(self, namespace: str, ns: Optional[_Namespace]):
+        with self._lock:
+            if ns is None:
+                self._namespaces.pop(namespace, None)
+            else:
+                self._namespaces[namespace] = ns
+
+    def _save(self, namespace: str, ids: List[str], metadata: List[Dict[str, Any]], vectors: np.ndarray):
+        if not ids:
+            self._drop(namespace)
+            return
+        directory = self._dir(namespace)
+        os.makedirs(directory, exist_ok=True)
+        # A fresh matrix file per write: readers holding the old one keep a valid mmap
+        vectors_name = f"vectors-{time.time_ns()}.npy"
+        np.save(os.path.join(directory, vectors_name), vectors.astype(np.float32))
+        with open(os.path.join(directory, "records.tmp.json"), "w", encoding="utf-8") as f:
+            json.dump({"ids": ids, "metadata": metadata, "vectors": vectors_name}, f)
+        os.replace(os.path.join(directory, "records.tmp.json"), os.path.join(directory, "records.json"))
+        self._swap(namespace, _Namespace(
+            ids, metadata, np.load(os.path.join(directory, vectors_name), mmap_mode="r")
+        ))
+        self._remove_stale(directory, keep=vectors_name)
+
+    def _remove_stale(self, directory: str, keep: Optional[str] = None):
+        for name in os.listdir(directory):
+            if name != keep and name.startswith("vectors") and name.endswith(".npy"):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass # Still mapped on platforms that forbid it; removed by the next write
+
+    def _drop(self, namespace: str):
+        self._swap(namespace, None)
+        directory = self._dir(namespace)
+        if not os.path.isdir(directory):
+            return
+        if os.path.exists(os.path.join(directory, "records.json")):
+            os.remove(os.path.join(directory, "records.json"))
+        self._remove_stale(directory)
+        if not os.listdir(directory):
+            os.rmdir(directory)
+
+    def upsert_vectors(self, vectors: List[VectorRecord], namespace: str):
+        """
+        vectors: list of (id, embedding, metadata) tuples; existing ids are overwritten
+        """
+        if not vectors:
+            return
+        new = normalize_rows(to_matrix([v[1] for v in vectors]))
+        with self._write_lock:
+            ns = self._load(namespace)
+            if ns is None:
+                ids, metadata, matrix = [], [], np.zeros((0, new.shape[1]), dtype=np.float32)
+                rows: Dict[str, int] = {}
+            else:
+                if ns.vectors.shape[1] != new.shape[1]:
+                    raise ValueError(
+                        f"Dimension mismatch for namespace {namespace}: {new.shape[1]} != {ns.vectors.shape[1]}"
+                    )
+                ids, metadata, matrix, rows = list(ns.ids), list(ns.metadata), np.array(ns.vectors), dict(ns.rows)
+
+            appended = []
+            for (vector_id, _, meta), row in zip(vectors, new):
+                if vector_id in rows:
+                    matrix[rows[vector_id]] = row
+                    metadata[rows[vector_id]] = dict(meta or {})
+                else:
+                    rows[vector_id] = len(ids)
+                    ids.append(vector_id)
+                    metadata.append(dict(meta or {}))
+                    appended.append(row)
+            if appended:
+                matrix = np.vstack([matrix, np.asarray(appended, dtype=np.float32)])
+            self._save(namespace, ids, metadata, matrix)
+
+    def query_vectors(
+        self,
+        vector,
+        namespace: str,
+        top_k: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+        include_values: bool = False
+    ):
+        ns = self._load(namespace)
+        if ns is None or not ns.ids or top_k <= 0:
+            return {"matches": []}
+
+        query = normalize_rows(to_matrix([vector]))[0]
+        scores = np.asarray(ns.vectors @ query)
+        if filter:
+            allowed = np.array([matches_filter(m, filter) for m in ns.metadata], dtype=bool)
+            scores = np.where(allowed, scores, -np.inf)
+
+        k = min(top_k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        matches = []
+        for i in best:
+            if not np.isfinite(scores[i]):
+                continue
+            match = {"id": ns.ids[i], "score": float(scores[i]), "metadata": ns.metadata[i]}
+            if include_values:
+                # Stored rows are normalized; cosine similarity doesn't care
+                match["values"] = np.asarray(ns.vectors[i]).tolist()
+            matches.append(match)
+        return {"matches": matches}
+
+    def delete_vectors(self, namespace: str, filter: dict = None, ids: list = None):
+        """
+        Delete vectors by filter or ids.
+        """
+        if not filter and not ids:
+            return
+        with self._write_lock:
+            ns = self._load(namespace)
+            if ns is None:
+                return
+            if filter:
+                keep = [row for row, meta in enumerate(ns.metadata) if not matches_filter(meta, filter)]
+            else:
+                doomed = set(ids)
+                keep = [row for row, vector_id in enumerate(ns.ids) if vector_id not in doomed]
+            if len(keep) == len(ns.ids):
+                return
+            self._save(
+                namespace,
+                [ns.ids[r] for r in keep],
+                [ns.metadata[r] for r in keep],
+                np.asarray(ns.vectors[keep], dtype=np.float32)
+            )
+
+    def delete_namespace(self, namespace: str):
+        """
+        Delete all vectors in a namespace
+        """
+        with self._write_lock:
+            self._drop(namespace)
+
+    def count(self, namespace: str) -> int:
+        ns = self._load(namespace)
+        return len(ns.ids) if ns else 0
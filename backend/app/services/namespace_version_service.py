@@ -0,0 +1,47 @@
+from typing import Dict, List, Optional
+
+from app.services.postgres_service import postgres_service
+
+
+class NamespaceVersionService:
+    """
+    A version counter per vector namespace, in the `namespace_versions` table.
+
+    Anything that changes a namespace's vectors (ingestion, document or bin
+    deletion) bumps it; caches key their entries by the version they saw, so
+    an entry from before a change can never be served again, in any process.
+    """
+
+    def get(self, namespaces: List[str]) -> Optional[Dict[str, int]]:
+        """Current versions (0 for never-bumped namespaces), or None if Postgres is unavailable."""
+        if not postgres_service.connection_pool:
+            return None
+        try:
+            with postgres_service.get_cursor() as cur:
+                cur.execute(
+                    "SELECT namespace, version FROM namespace_versions WHERE namespace = ANY(%s)",
+                    (list(namespaces),)
+                )
+                versions = dict(cur.fetchall())
+        except Exception as e:
+            print(f"Namespace version lookup failed: {e}")
+            return None
+        return {ns: versions.get(ns, 0) for ns in namespaces}
+
+    def bump(self, namespace: str):
+        if not postgres_service.connection_pool:
+            return
+        try:
+            with postgres_service.get_cursor() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO namespace_versions (namespace, version) VALUES (%s, 1)
+                    ON CONFLICT (namespace) DO UPDATE SET version = namespace_versions.version + 1
+                    """,
+                    (namespace,)
+                )
+        except Exception as e:
+            print(f"Namespace version bump failed for {namespace}: {e}")
+
+
+namespace_version_service = NamespaceVersionService()
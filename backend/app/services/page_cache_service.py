@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import zstandard
+from cachetools import LRUCache
+
+from app.core.config import settings
+from app.services.postgres_service import postgres_service
+from app.utils.urls import canonicalize_url
+from app.utils.singleflight import SingleFlight
+
+# fetch(url, headers) -> {"url", "title", "markdown", "etag", "last_modified", ...} or None.
+# With conditional headers a 304 comes back as {"status_code": 304, ...}.
+PageFetcher = Callable[[str, Optional[Dict[str, str]]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+def page_key(url: str) -> str:
+    return hashlib.sha256(canonicalize_url(url).encode("utf-8")).hexdigest()
+
+
+def _epoch(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _utc_naive(epoch: float) -> datetime:
+    return datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None)
+
+
+class PageCacheService:
+    """
+    Scraped pages keyed by canonical URL, shared by style analysis and research.
+
+    Entries are served as-is for PAGE_CACHE_TTL_SECONDS. After that, pages that
+    sent an ETag/Last-Modified are revalidated with a conditional request (a 304
+    just refreshes fetched_at); pages without validators are fetched again.
+    Markdown is stored zstd-compressed in the `page_cache` table, with a small
+    in-process LRU in front of it.
+    """
+
+    def __init__(self, ttl_seconds: int = 86400, memory_size: int = 500):
+        self.ttl_seconds = ttl_seconds
+        self._memory: LRUCache = LRUCache(maxsize=memory_size)
+        self.stats = {"hits": 0, "revalidated": 0, "refetched": 0, "misses": 0}
+        self._flight = SingleFlight("page_fetch")
+
+    @property
+    def _persist(self) -> bool:
+        return settings.PAGE_CACHE_PERSIST and postgres_service.connection_pool is not None
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self._persist:
+            return None
+        try:
+            with postgres_service.get_cursor() as cur:
+                cur.execute(
+                    "SELECT url, title, markdown, etag, last_modified, fetched_at FROM page_cache WHERE key = %s",
+                    (key,)
+                )
+                row = cur.fetchone()
+        except Exception as e:
+            print(f"Page cache lookup failed: {e}")
+            return None
+        if not row:
+            return None
+        url, title, markdown, etag, last_modified, fetched_at = row
+        return {
+            "url": url,
+            "title": title or "",
+            "markdown": zstandard.decompress(bytes(markdown)).decode("utf-8"),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": _epoch(fetched_at)
+        }
+
+    def _store(self, key: str, entry: Dict[str, Any]):
+        if not self._persist:
+            return
+        try:
+            with postgres_service.get_cursor() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO page_cache (key, url, title, markdown, etag, last_modified, fetched_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (key) DO UPDATE SET
+                        url = EXCLUDED.url, title = EXCLUDED.title, markdown = EXCLUDED.markdown,
+                        etag = EXCLUDED.etag, last_modified = EXCLUDED.last_modified,
+                        fetched_at = EXCLUDED.fetched_at
+                    """,
+                    (
+                        key, entry["url"], entry["title"],
+                        zstandard.compress(entry["markdown"].encode("utf-8"), 3),
+                        entry["etag"], entry["last_modified"], _utc_naive(entry["fetched_at"])
+                    )
+                )
+        except Exception as e:
+            print(f"Page cache store failed: {e}")
+
+    def _touch(self, key: str, fetched_at: float):
+        if not self._persist:
+            return
+        try:
+            with postgres_service.get_cursor() as cur:
+                cur.execute("UPDATE page_cache SET fetched_at = %s WHERE key = %s", (_utc_naive(fetched_at), key))
+        except Exception as e:
+            print(f"Page cache refresh failed: {e}")
+
+    async def _save(self, key: str, url: str, page: Dict[str, Any]) -> Dict[str, Any]:
+        entry = {
+            "url": url,
+            "title": page.get("title") or "",
+            "markdown": page["markdown"],
+            "etag": page.get("etag"),
+            "last_modified": page.get("last_modified"),
+            "fetched_at": time.time()
+        }
+        self._memory[key] = entry
+        await asyncio.to_thread(self._store, key, entry)
+        return entry
+
+    async def get(self, url: str, fetch: PageFetcher) -> Optional[Dict[str, Any]]:
+        """Return the cached page for url, revalidating or fetching it through `fetch` as needed."""
+        key = page_key(url)
+        # Concurrent requests for the same page share one lookup/fetch
+        return await self._flight.do(key, lambda: self._get(key, url, fetch))
+
+    async def _get(self, key: str, url: str, fetch: PageFetcher) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            entry = await asyncio.to_thread(self._load, key)
+            if entry:
+                self._memory[key] = entry
+
+        if entry and time.time() - entry["fetched_at"] < self.ttl_seconds:
+            self.stats["hits"] += 1
+            return entry
+
+        if entry and (entry["etag"] or entry["last_modified"]):
+            headers = {}
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+            page = await fetch(url, headers)
+            if page and page.get("status_code") == 304:
+                self.stats["revalidated"] += 1
+                entry["fetched_at"] = time.time()
+                await asyncio.to_thread(self._touch, key, entry["fetched_at"])
+                return entry
+        else:
+            page = await fetch(url, None)
+
+        self.stats["refetched" if entry else "misses"] += 1
+        if not page or not page.get("markdown"):
+            # Keep serving the stale copy rather than nothing
+            return entry
+        return await self._save(key, url, page)
+
+
+page_cache_service = PageCacheService(ttl_seconds=settings.PAGE_CACHE_TTL_SECONDS)
@@ -0,0 +1,239 @@
+import asyncio
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+import httpx
+
+
+class MainContentParser(HTMLParser):
+    """
+    Incremental HTML -> markdown converter.
+
+    Text is collected twice: for the whole <body> and for <main>/<article>
+    only. Boilerplate containers (nav, header, footer, scripts...) are skipped.
+    `done` flips once enough text has been captured so the caller can stop
+    reading the response early.
+    """
+
+    SKIP_TAGS = {"script", "style", "noscript", "svg", "nav", "header", "footer", "aside", "form", "iframe", "template", "button"}
+    MAIN_TAGS = {"main", "article"}
+    BLOCK_TAGS = {"p", "div", "section", "blockquote", "table", "tr", "ul", "ol", "dl"}
+    VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "source", "wbr", "area", "base", "col", "embed", "param", "track"}
+
+    def __init__(self, base_url: str = "", max_chars: int = 2000):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.max_chars = max_chars
+        self.title = ""
+        self._in_title = False
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._pre_depth = 0
+        self._body: List[str] = []
+        self._main: List[str] = []
+        self._body_chars = 0
+        self._main_chars = 0
+        self._link: Optional[Dict[str, Any]] = None
+
+    @property
+    def done(self) -> bool:
+        # Stop once <main>/<article> has enough text, or the page body has far
+        # more than we need and no main container has shown up.
+        return self._main_chars >= self.max_chars or (
+            self._main_chars == 0 and self._body_chars >= self.max_chars * 3
+        )
+
+    def _emit(self, text: str):
+        if self._link is not None:
+            self._link["text"].append(text)
+            return
+        self._body.append(text)
+        self._body_chars += len(text)
+        if self._main_depth:
+            self._main.append(text)
+            self._main_chars += len(text)
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+            return
+        if tag in self.SKIP_TAGS:
+            if tag not in self.VOID_TAGS:
+                self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+        if tag in self.MAIN_TAGS:
+            self._main_depth += 1
+        if re.fullmatch(r"h[1-6]", tag):
+            self._emit("\n\n" + "#" * int(tag[1]) + " ")
+        elif tag == "li":
+            self._emit("\n- ")
+        elif tag == "br":
+            self._emit("\n")
+        elif tag == "pre":
+            self._pre_depth += 1
+            self._emit("\n\n```\n")
+        elif tag in self.BLOCK_TAGS:
+            self._emit("\n\n")
+        elif tag == "a" and self._link is None:
+            href = dict(attrs).get("href") or ""
+            self._link = {"href": urljoin(self.base_url, href) if href else "", "text": []}
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+            return
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self._skip_depth:
+            return
+        if tag == "a" and self._link is not None:
+            link, self._link = self._link, None
+            text = "".join(link["text"]).strip()
+            if text and link["href"].startswith("http"):
+                self._emit(f"[{text}]({link['href']})")
+            elif text:
+                self._emit(text)
+        elif tag == "pre":
+            self._pre_depth = max(0, self._pre_depth - 1)
+            self._emit("\n```\n\n")
+        elif tag in self.MAIN_TAGS:
+            self._main_depth = max(0, self._main_depth - 1)
+        elif re.fullmatch(r"h[1-6]", tag) or tag in self.BLOCK_TAGS:
+            self._emit("\n\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+            return
+        if self._skip_depth:
+            return
+        if not self._pre_depth:
+            data = re.sub(r"\s+", " ", data)
+            if not data.strip():
+                if data:
+                    self._emit(" ")
+                return
+        self._emit(data)
+
+    @staticmethod
+    def _clean(parts: List[str]) -> str:
+        text = "".join(parts)
+        text = re.sub(r"[ \t]+\n", "\n", text)
+        text = re.sub(r"\n[ \t]+", "\n", text)
+        text = re.sub(r"\n{3,}", "\n\n", text)
+        return text.strip()
+
+    @property
+    def markdown(self) -> str:
+        main = self._clean(self._main)
+        # Fall back to the whole body when there is no usable main container
+        text = main if len(main) >= 200 else self._clean(self._body)
+        return text[:self.max_chars]
+
+
+class PageExtractor:
+    """
+    Local replacement for Firecrawl's page scraping.
+
+    Pages are fetched with one pooled async client, at most
+    `per_domain_concurrency` requests per host, and parsed while streaming so
+    the download stops as soon as `max_chars` of main content are captured.
+    """
+
+    def __init__(
+        self,
+        max_chars: int = 2000,
+        per_domain_concurrency: int = 2,
+        max_connections: int = 20,
+        timeout: float = 10.0,
+        user_agent: str = "Mozilla/5.0 (compatible; ContentStrategistBot/1.0)"
+    ):
+        self.max_chars = max_chars
+        self.per_domain_concurrency = per_domain_concurrency
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self._client: Optional[httpx.AsyncClient] = None
+        self._domain_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers={"User-Agent": self.user_agent},
+                follow_redirects=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections)
+            )
+        return self._client
+
+    def _semaphore(self, url: str) -> asyncio.Semaphore:
+        domain = urlparse(url).netloc.lower()
+        if domain not in self._domain_semaphores:
+            self._domain_semaphores[domain] = asyncio.Semaphore(self.per_domain_concurrency)
+        return self._domain_semaphores[domain]
+
+    async def extract(self, url: str, max_chars: Optional[int] = None, headers: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a page and return {"url", "title", "markdown", "status_code",
+        "etag", "last_modified", "bytes"}, or None if it is not usable HTML.
+        A 304 response (conditional request) is returned with empty markdown.
+        """
+        max_chars = max_chars or self.max_chars
+        async with self._semaphore(url):
+            try:
+                async with self._get_client().stream("GET", url, headers=headers) as response:
+                    result = {
+                        "url": str(response.url),
+                        "status_code": response.status_code,
+                        "etag": response.headers.get("etag"),
+                        "last_modified": response.headers.get("last-modified"),
+                        "title": "",
+                        "markdown": "",
+                        "bytes": 0
+                    }
+                    if response.status_code == 304:
+                        return result
+                    content_type = response.headers.get("content-type", "")
+                    if response.status_code != 200 or "html" not in content_type:
+                        return None
+
+                    parser = MainContentParser(base_url=str(response.url), max_chars=max_chars)
+                    async for chunk in response.aiter_text():
+                        result["bytes"] += len(chunk)
+                        parser.feed(chunk)
+                        if parser.done:
+                            break
+                    parser.close()
+            except Exception as e:
+                print(f"PageExtractor: failed to fetch {url}: {e}")
+                return None
+
+        result["title"] = parser.title.strip()
+        result["markdown"] = parser.markdown
+        return result
+
+    async def extract_many(self, urls: List[str], max_chars: Optional[int] = None) -> List[Optional[Dict[str, Any]]]:
+        return await asyncio.gather(*[self.extract(u, max_chars=max_chars) for u in urls])
+
+    async def enrich_results(self, items: List[Dict[str, Any]], max_chars: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Fill in `markdown` for search results that only carry a URL (and maybe a
+        snippet), so any URL-returning search provider can feed research.
+        """
+        todo = [i for i in items if i.get("url") and not i.get("markdown")]
+        pages = await self.extract_many([i["url"] for i in todo], max_chars=max_chars)
+        for item, page in zip(todo, pages):
+            if page and page["markdown"]:
+                item["markdown"] = page["markdown"]
+                item.setdefault("title", page["title"])
+        return items
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
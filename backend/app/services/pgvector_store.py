@@ -0,0 +1,221 @@
+import json
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from psycopg.types.json import Jsonb
+from psycopg_pool import ConnectionPool
+
+from app.services.vector_store import VectorRecord, VectorStore
+
+COLUMN_FILTERS = {"doc_id": "c.doc_id"}
+
+
+def split_namespace(namespace: str) -> Tuple[str, str]:
+    """"{user_id}_{bin_id}" -> (user_id, bin_id)."""
+    user_id, _, bin_id = namespace.partition("_")
+    try:
+        return str(uuid.UUID(user_id)), str(uuid.UUID(bin_id))
+    except ValueError:
+        raise ValueError(f"Namespace {namespace!r} is not '<user_id>_<bin_id>'")
+
+
+def vector_literal(vector) -> str:
+    return "[" + ",".join(map(str, np.asarray(vector, dtype=np.float32).tolist())) + "]"
+
+
+def filter_sql(filter: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+    """Translate a Pinecone-style metadata filter into a WHERE fragment on vector_chunks c."""
+    clauses, params = [], []
+    for field, condition in (filter or {}).items():
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        column = COLUMN_FILTERS.get(field)
+        for op, expected in condition.items():
+            if column:
+                if op in ("$eq", "$ne"):
+                    clauses.append(f"{column} {'=' if op == '$eq' else 'IS DISTINCT FROM'} %s::uuid")
+                    params.append(str(expected))
+                elif op in ("$in", "$nin"):
+                    clauses.append(f"{'NOT ' if op == '$nin' else ''}({column} = ANY(%s::uuid[]))")
+                    params.append([str(e) for e in expected])
+            elif op in ("$eq", "$ne"):
+                clauses.append(f"{'NOT ' if op == '$ne' else ''}(c.metadata @> %s)")
+                params.append(Jsonb({field: expected}))
+            elif op in ("$in", "$nin"):
+                clauses.append(f"{'NOT ' if op == '$nin' else ''}(c.metadata -> %s <@ %s)")
+                params.extend([field, Jsonb(list(expected))])
+            else:
+                raise ValueError(f"Unsupported filter operator {op}")
+    return "".join(f" AND {c}" for c in clauses), params
+
+
+class PgVectorStore(VectorStore):
+    """
+    Vectors in Postgres (pgvector) next to the users, bins and documents they belong to.
+
+    The namespace "{user_id}_{bin_id}" maps to columns of vector_chunks, which
+    cascade-delete with their bin and document, so deleting either can never
+    leave orphaned vectors behind. Queries use the HNSW cosine index and join
+    documents in the same statement, so chunks of documents that are still
+    ingesting or failed are never returned. Upserts stream rows with COPY into
+    a temp table and merge them with one INSERT ... ON CONFLICT.
+    """
+
+    def __init__(self, dsn: str, ef_search: int = 64, max_connections: int = 10):
+        self.dsn = dsn
+        self.ef_search = ef_search
+        self.max_connections = max_connections
+        self._pool: Optional[ConnectionPool] = None
+        self._iterative_scan = False
+        self._dimension: Optional[int] = None
+        self._init_lock = threading.Lock()
+
+    @property
+    def pool(self) -> ConnectionPool:
+        if self._pool is None:
+            with self._init_lock:
+                if self._pool is None:
+                    pool = ConnectionPool(self.dsn, min_size=1, max_size=self.max_connections, open=True)
+                    with pool.connection() as conn:
+                        version = conn.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'").fetchone()
+                        if version is None or conn.execute("SELECT to_regclass('vector_chunks')").fetchone()[0] is None:
+                            pool.close()
+                            raise RuntimeError("vector_chunks is missing: run the migrations on a Postgres with pgvector")
+                        # pgvector 0.8+ keeps scanning the HNSW graph until enough rows pass the namespace filter
+                        self._iterative_scan = tuple(int(p) for p in version[0].split(".")[:2]) >= (0, 8)
+                        # vector(n) stores its dimension as the type modifier
+                        self._dimension = conn.execute(
+                            "SELECT atttypmod FROM pg_attribute WHERE attrelid = 'vector_chunks'::regclass AND attname = 'embedding'"
+                        ).fetchone()[0]
+                    self._pool = pool
+        return self._pool
+
+    def _check_dimension(self, embedding):
+        self.pool  # reads the column's dimension
+        if self._dimension and self._dimension > 0 and len(embedding) != self._dimension:
+            raise ValueError(
+                f"Embedding has {len(embedding)} dimensions but vector_chunks.embedding is vector({self._dimension}); "
+                f"set EMBEDDING_DIMENSION to match the embedding model and recreate the table"
+            )
+
+    def _search_settings(self, conn):
+        conn.execute(f"SET LOCAL hnsw.ef_search = {int(self.ef_search)}")
+        if self._iterative_scan:
+            conn.execute("SET LOCAL hnsw.iterative_scan = relaxed_order")
+
+    def upsert_vectors(self, vectors: List[VectorRecord], namespace: str):
+        """
+        vectors: list of (id, embedding, metadata) tuples
+        """
+        if not vectors:
+            return
+        user_id, bin_id = split_namespace(namespace)
+        self._check_dimension(vectors[0][1])
+        with self.pool.connection() as conn, conn.transaction():
+            conn.execute(
+                "CREATE TEMP TABLE vector_chunks_stage (LIKE vector_chunks INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            with conn.cursor() as cur:
+                with cur.copy("COPY vector_chunks_stage (user_id, bin_id, id, doc_id, metadata, embedding) FROM STDIN") as copy:
+                    for vector_id, embedding, metadata in vectors:
+                        metadata = metadata or {}
+                        copy.write_row((
+                            user_id, bin_id, vector_id, metadata.get("doc_id"),
+                            json.dumps(metadata), vector_literal(embedding)
+                        ))
+                cur.execute("""
+                    INSERT INTO vector_chunks (user_id, bin_id, id, doc_id, metadata, embedding)
+                    SELECT user_id, bin_id, id, doc_id, metadata, embedding FROM vector_chunks_stage
+                    ON CONFLICT (user_id, bin_id, id) DO UPDATE
+                    SET doc_id = EXCLUDED.doc_id, metadata = EXCLUDED.metadata, embedding = EXCLUDED.embedding
+                """)
+
+    def _query(
+        self,
+        vector,
+        namespaces: List[str],
+        top_k: int,
+        filter: Optional[Dict[str, Any]],
+        include_values: bool = False
+    ) -> List[Dict[str, Any]]:
+        if not namespaces or top_k <= 0:
+            return []
+        pairs = [split_namespace(ns) for ns in namespaces]
+        self._check_dimension(vector)
+        where, params = filter_sql(filter)
+        literal = vector_literal(vector)
+        sql = f"""
+            SELECT c.id, c.user_id, c.bin_id, c.metadata, 1 - (c.embedding <=> %s::vector) AS score,
+                   {"c.embedding::text" if include_values else "NULL"}
+            FROM vector_chunks c
+            LEFT JOIN documents d ON d.id = c.doc_id
+            WHERE (c.user_id, c.bin_id) IN (SELECT * FROM unnest(%s::uuid[], %s::uuid[]))
+              AND (c.doc_id IS NULL OR d.status = 'READY'){where}
+            ORDER BY c.embedding <=> %s::vector
+            LIMIT %s
+        """
+        with self.pool.connection() as conn, conn.transaction():
+            self._search_settings(conn)
+            rows = conn.execute(
+                sql,
+                [literal, [p[0] for p in pairs], [p[1] for p in pairs], *params, literal, top_k]
+            ).fetchall()
+        matches = []
+        for vector_id, user_id, bin_id, metadata, score, values in rows:
+            match = {"id": vector_id, "score": float(score), "metadata": metadata, "namespace": f"{user_id}_{bin_id}"}
+            if include_values:
+                match["values"] = [float(v) for v in values.strip("[]").split(",")]
+            matches.append(match)
+        return matches
+
+    def query_vectors(
+        self,
+        vector,
+        namespace: str,
+        top_k: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+        include_values: bool = False
+    ):
+        matches = self._query(vector, [namespace], top_k, filter, include_values)
+        for match in matches:
+            match.pop("namespace")
+        return {"matches": matches}
+
+    def query_namespaces(self, vector, namespaces: List[str], top_k: int = 5, filter: Optional[Dict[str, Any]] = None):
+        # One statement across all bins instead of a query per namespace
+        return {"matches": self._query(vector, namespaces, top_k, filter)}
+
+    def delete_vectors(self, namespace: str, filter: dict = None, ids: list = None):
+        """
+        Delete vectors by filter or ids.
+        """
+        user_id, bin_id = split_namespace(namespace)
+        if filter:
+            where, params = filter_sql(filter)
+        elif ids:
+            where, params = " AND c.id = ANY(%s)", [list(ids)]
+        else:
+            return
+        with self.pool.connection() as conn:
+            conn.execute(
+                f"DELETE FROM vector_chunks c WHERE c.user_id = %s AND c.bin_id = %s{where}",
+                [user_id, bin_id, *params]
+            )
+
+    def count(self, namespace: str) -> int:
+        user_id, bin_id = split_namespace(namespace)
+        with self.pool.connection() as conn:
+            return conn.execute(
+                "SELECT count(*) FROM vector_chunks WHERE user_id = %s AND bin_id = %s", [user_id, bin_id]
+            ).fetchone()[0]
+
+    def delete_namespace(self, namespace: str):
+        """
+        Delete all vectors in a namespace
+        """
+        user_id, bin_id = split_namespace(namespace)
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM vector_chunks WHERE user_id = %s AND bin_id = %s", [user_id, bin_id])
+
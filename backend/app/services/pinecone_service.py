@@ -1,15 +1,49 @@
 from pinecone import Pinecone, ServerlessSpec
 from app.core.config import settings
+import asyncio
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from tenacity import retry, stop_after_attempt, wait_exponential
+from app.services.vector_store import VectorStore, batch_vectors, upsert_metrics
 
-class PineconeService:
+batch_retry = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    before_sleep=lambda state: state.args[0]._count_retry()
+)
+
+class PineconeService(VectorStore):
     def __init__(self):
-        self.pc = Pinecone(api_key=settings.PINECONE_API_KEY)
         self.index_name = settings.PINECONE_INDEX_NAME
-        self.dimension = 1536
-        self._ensure_index_exists()
-        self.index = self.pc.Index(self.index_name)
+        self.dimension = settings.EMBEDDING_DIMENSION
+        self._pc = None
+        self._index = None
+        self._index_host = None
+        self._async_index = None
+        self._async_loop = None
+        self._init_lock = threading.Lock()
+        self.max_batch_bytes = settings.PINECONE_UPSERT_MAX_BATCH_BYTES
+        self.max_batch_vectors = settings.PINECONE_UPSERT_MAX_BATCH_VECTORS
+        self.upsert_concurrency = settings.PINECONE_UPSERT_CONCURRENCY
+        self.upsert_stats = {"vectors": 0, "batches": 0, "retries": 0, "seconds": 0.0}
+
+    @property
+    def pc(self):
+        if self._pc is None:
+            self._pc = Pinecone(api_key=settings.PINECONE_API_KEY)
+        return self._pc
+
+    @property
+    def index(self):
+        # Connected on first use rather than at import, so the app starts
+        # (and other vector stores work) without reaching Pinecone
+        if self._index is None:
+            with self._init_lock:
+                if self._index is None:
+                    self._ensure_index_exists()
+                    self._index = self.pc.Index(self.index_name)
+        return self._index
 
     def _ensure_index_exists(self):
         if self.index_name not in self.pc.list_indexes().names():
@@ -27,14 +61,95 @@ class PineconeService:
             while not self.pc.describe_index(self.index_name).status['ready']:
                 time.sleep(1)
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    def _resolve_host(self):
+        if self._index_host is None:
+            self.index  # make sure the index exists
+            self._index_host = self.pc.describe_index(self.index_name).host
+        return self._index_host
+
+    async def _async_index_for_loop(self):
+        # The async client holds an aiohttp session bound to the running loop:
+        # one pooled client per loop, reused by every query
+        loop = asyncio.get_running_loop()
+        if self._async_index is None or self._async_loop is not loop:
+            # Creating/describing the index are blocking control-plane calls
+            host = self._index_host or await asyncio.to_thread(self._resolve_host)
+            if self._async_index is not None and self._async_loop is loop:
+                return self._async_index  # created by a concurrent caller meanwhile
+            old, old_loop = self._async_index, self._async_loop
+            self._async_index = self.pc.IndexAsyncio(host=host)
+            self._async_loop = loop
+            if old is not None:
+                await self._close_async_index(old, old_loop)
+        return self._async_index
+
+    async def _close_async_index(self, index, loop):
+        # The session can only be closed on the loop that owns it; if that loop
+        # is closed, the session went down with it
+        if loop.is_closed() or not loop.is_running():
+            return
+        try:
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(index.close(), loop))
+        except Exception as e:
+            print(f"Closing the previous Pinecone async client failed: {e}")
+
+    def _count_retry(self):
+        self.upsert_stats["retries"] += 1
+
+    def _record(self, metrics):
+        # retries are counted as they happen (_count_retry)
+        for key in ("vectors", "batches"):
+            self.upsert_stats[key] += metrics[key]
+        self.upsert_stats["seconds"] = round(self.upsert_stats["seconds"] + metrics["seconds"], 3)
+        print(f"Pinecone upsert: {metrics['vectors']} vectors in {metrics['batches']} batches, "
+              f"{metrics['seconds']}s ({metrics['vectors_per_second']} vectors/s)")
+        return metrics
+
+    @batch_retry
+    def _upsert_batch(self, batch, namespace):
+        self.index.upsert(vectors=batch, namespace=namespace, show_progress=False)
+
+    @batch_retry
+    async def _aupsert_batch(self, index, batch, namespace):
+        await index.upsert(vectors=batch, namespace=namespace, show_progress=False)
+
     def upsert_vectors(self, vectors, namespace):
         """
         vectors: list of (id, embedding, metadata) tuples
+
+        Sent as size-aware batches (under Pinecone's request size limit) with
+        bounded parallelism; a failing batch is retried on its own.
         """
-        self.index.upsert(vectors=vectors, namespace=namespace)
+        started = time.perf_counter()
+        retries_before = self.upsert_stats["retries"]
+        batches = batch_vectors(vectors, self.max_batch_bytes, self.max_batch_vectors)
+        if len(batches) <= 1:
+            for batch in batches:
+                self._upsert_batch(batch, namespace)
+        else:
+            with ThreadPoolExecutor(max_workers=self.upsert_concurrency) as pool:
+                list(pool.map(lambda batch: self._upsert_batch(batch, namespace), batches))
+        return self._record(upsert_metrics(
+            len(vectors), len(batches), started, self.upsert_stats["retries"] - retries_before
+        ))
+
+    async def aupsert_vectors(self, vectors, namespace):
+        started = time.perf_counter()
+        retries_before = self.upsert_stats["retries"]
+        batches = batch_vectors(vectors, self.max_batch_bytes, self.max_batch_vectors)
+        index = await self._async_index_for_loop()
+        semaphore = asyncio.Semaphore(self.upsert_concurrency)
+
+        async def send(batch):
+            async with semaphore:
+                await self._aupsert_batch(index, batch, namespace)
 
-    def query_vectors(self, vector, namespace, top_k=5):
+        await asyncio.gather(*[send(batch) for batch in batches])
+        return self._record(upsert_metrics(
+            len(vectors), len(batches), started, self.upsert_stats["retries"] - retries_before
+        ))
+
+    def query_vectors(self, vector, namespace, top_k=5, filter=None, include_values=False):
         # Ensure vector is a list of floats
         if hasattr(vector, 'tolist'):
             vector = vector.tolist()
@@ -43,6 +158,21 @@ class PineconeService:
             namespace=namespace,
             vector=vector,
             top_k=top_k,
+            filter=filter,
+            include_values=include_values,
+            include_metadata=True
+        )
+
+    async def aquery_vectors(self, vector, namespace, top_k=5, filter=None, include_values=False):
+        if hasattr(vector, 'tolist'):
+            vector = vector.tolist()
+        index = await self._async_index_for_loop()
+        return await index.query(
+            namespace=namespace,
+            vector=vector,
+            top_k=top_k,
+            filter=filter,
+            include_values=include_values,
             include_metadata=True
         )
 
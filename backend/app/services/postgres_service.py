@@ -7,9 +7,11 @@ class PostgresService:
     def __init__(self):
         self.connection_pool = None
         try:
-            self.connection_pool = psycopg2.pool.SimpleConnectionPool(
+            # psycopg2 needs a plain postgresql:// DSN
+            dsn = settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+            self.connection_pool = psycopg2.pool.ThreadedConnectionPool(
                 1, 20,
-                dsn=settings.DATABASE_URL
+                dsn=dsn
             )
             print("PostgreSQL connection pool created successfully")
         except (Exception, psycopg2.DatabaseError) as error:
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from cachetools import LRUCache
+
+from app.services.embedding_service import embedding_service
+from app.utils.vector_math import to_matrix, normalize_rows, top_k_indices, spherical_kmeans
+
+
+def _research_text(item: Dict[str, Any]) -> str:
+    """Text used to represent a research item in embedding space."""
+    return f"{item.get('title') or ''}\n{(item.get('content') or '')[:1000]}".strip()
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ResearchIndex:
+    """
+    Embedding matrix over a fixed list of research items.
+
+    Rows are L2-normalized so a single matmul against the (normalized)
+    section intents yields cosine similarities for every source at once.
+    """
+
+    def __init__(self, research: List[Dict[str, Any]], matrix: np.ndarray):
+        self.research = research
+        self.source_ids = [r.get("source_id") for r in research]
+        self.matrix = normalize_rows(matrix)
+        self.by_id = {r.get("source_id"): r for r in research if r.get("source_id")}
+
+    def __len__(self):
+        return len(self.research)
+
+    def score(self, query_matrix: np.ndarray) -> np.ndarray:
+        """(num_queries x num_sources) cosine similarity matrix."""
+        if len(self) == 0 or query_matrix.size == 0:
+            return np.zeros((query_matrix.shape[0], len(self)), dtype=np.float32)
+        return normalize_rows(query_matrix) @ self.matrix.T
+
+    def rank(self, query_matrix: np.ndarray, top_k: int = 5) -> List[List[str]]:
+        """Top-k source_ids for each query row, most similar first."""
+        scores = self.score(query_matrix)
+        return [[self.source_ids[i] for i in row] for row in top_k_indices(scores, top_k)]
+
+
+class ResearchIndexService:
+    """
+    Builds ResearchIndex objects and ranks research against section intents.
+
+    Embeddings are cached by text hash, so rebuilding the index for the same
+    research (planner re-runs, writer rewrites) costs no extra embedding calls.
+    """
+
+    def __init__(self, cache_size: int = 5000):
+        self._cache: LRUCache = LRUCache(maxsize=cache_size)
+
+    async def _embed(self, texts: List[str]) -> np.ndarray:
+        keys = [_text_key(t) for t in texts]
+        missing = list(dict.fromkeys(k for k in keys if k not in self._cache))
+
+        if missing:
+            texts_by_key = dict(zip(keys, texts))
+            missing_texts = [texts_by_key[k] for k in missing]
+            vectors = await asyncio.to_thread(embedding_service.embed_documents, missing_texts)
+            for key, vector in zip(missing, vectors):
+                self._cache[key] = np.asarray(vector, dtype=np.float32)
+
+        return to_matrix([self._cache[k] for k in keys])
+
+    async def build_index(self, research: List[Dict[str, Any]]) -> ResearchIndex:
+        research = [r for r in research if r.get("source_id")]
+        if not research:
+            return ResearchIndex([], np.zeros((0, 0), dtype=np.float32))
+        matrix = await self._embed([_research_text(r) for r in research])
+        return ResearchIndex(research, matrix)
+
+    async def embed_texts(self, texts: List[str]) -> np.ndarray:
+        return await self._embed(texts)
+
+    async def embed_intents(self, sections: List[Dict[str, Any]]) -> np.ndarray:
+        return await self._embed([f"{s.get('title', '')}: {s.get('intent', '')}" for s in sections])
+
+    async def rank_for_sections(
+        self,
+        research: List[Dict[str, Any]],
+        sections: List[Dict[str, Any]],
+        top_k: int = 5,
+        index: Optional[ResearchIndex] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Map each section id to its top-k most relevant source_ids.
+
+        All sections are scored against all sources in one batched operation.
+        """
+        if not sections:
+            return {}
+        index = index or await self.build_index(research)
+        if len(index) == 0:
+            return {s["id"]: [] for s in sections}
+        intents = await self.embed_intents(sections)
+        ranked = index.rank(intents, top_k=top_k)
+        return {s["id"]: ids for s, ids in zip(sections, ranked)}
+
+    async def cluster(
+        self,
+        research: List[Dict[str, Any]],
+        num_clusters: int,
+        index: Optional[ResearchIndex] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Group research into at most num_clusters clusters of similar sources.
+
+        Each cluster is {"source_ids", "members", "representative"}, where the
+        representative is the member closest to the centroid and members are
+        ordered by similarity to it. Largest clusters come first.
+        """
+        index = index or await self.build_index(research)
+        if len(index) == 0:
+            return []
+        labels, centroids = spherical_kmeans(index.matrix, num_clusters)
+        similarity = np.sum(index.matrix * centroids[labels], axis=1)
+
+        clusters = []
+        for c in range(centroids.shape[0]):
+            rows = np.flatnonzero(labels == c)
+            if rows.size == 0:
+                continue
+            rows = rows[np.argsort(-similarity[rows])]
+            members = [index.research[i] for i in rows]
+            clusters.append({
+                "source_ids": [m.get("source_id") for m in members],
+                "members": members,
+                "representative": members[0]
+            })
+        clusters.sort(key=lambda c: len(c["members"]), reverse=True)
+        return clusters
+
+
+research_index_service = ResearchIndexService()
@@ -0,0 +1,239 @@
+import asyncio
+import hashlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from cachetools import LRUCache
+
+from app.core.config import settings
+from app.services.embedding_service import embedding_service
+from app.services.vector_store_service import vector_store
+from app.services.chunk_store_service import chunk_store_service
+from app.services.namespace_version_service import namespace_version_service
+from app.utils.vector_math import mmr_select
+
+
+def _match_fields(match) -> Dict[str, Any]:
+    """Normalize a vector store match (dict or object) to id/score/metadata/values."""
+    if isinstance(match, dict):
+        fields = {
+            "id": match.get("id"),
+            "score": match.get("score") or 0.0,
+            "metadata": match.get("metadata") or {}
+        }
+        values = match.get("values")
+    else:
+        metadata = getattr(match, "metadata", None) or {}
+        if hasattr(metadata, "to_dict"):
+            metadata = metadata.to_dict()
+        fields = {
+            "id": getattr(match, "id", None),
+            "score": getattr(match, "score", 0.0) or 0.0,
+            "metadata": metadata
+        }
+        values = getattr(match, "values", None)
+    # Kept as float32 (for MMR) and dropped before hits leave the service
+    fields["values"] = np.asarray(values, dtype=np.float32) if values is not None and len(values) else None
+    return fields
+
+
+def _doc_key(hit: Dict[str, Any]):
+    metadata = hit["metadata"]
+    return metadata.get("doc_id") or metadata.get("source") or hit["id"]
+
+
+def _vector_hash(vector) -> str:
+    return hashlib.sha1(np.asarray(vector, dtype=np.float32).tobytes()).hexdigest()
+
+
+def _response_matches(response) -> list:
+    if hasattr(response, "matches"):
+        return response.matches or []
+    if isinstance(response, dict):
+        return response.get("matches", [])
+    return []
+
+
+class RetrievalService:
+    """
+    Internal knowledge-base search shared by the researcher and deep research.
+
+    All queries are embedded in one batch, every (query, bin) search is issued
+    concurrently under a semaphore, and the hits are merged into one globally
+    ranked list, so latency is bounded by a single round-trip instead of their sum.
+    Only the final hits are hydrated with their chunk text, in one bulk query.
+
+    Each (query, bin) search over-fetches candidates with their vectors, and
+    a maximal-marginal-relevance pass picks the final top_k per query, at most
+    max_per_doc per document, so overlapping chunks of the same page don't
+    crowd out other knowledge.
+
+    Per-namespace results are cached by (namespace, namespace version, query
+    vector hash, top_k). Ingestion and deletions bump the namespace version,
+    so a cached result is only ever served for the exact vectors it came from.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        cache_size: int = 0,
+        fetch_multiplier: int = 1,
+        mmr_lambda: float = 0.7,
+        max_per_doc: Optional[int] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.fetch_multiplier = max(1, fetch_multiplier)
+        self.mmr_lambda = mmr_lambda
+        self.max_per_doc = max_per_doc
+        self._cache = LRUCache(maxsize=cache_size) if cache_size else None
+        self.cache_stats = {"hits": 0, "misses": 0}
+
+    async def _query_all(self, queries: List[str], user_id: str, bin_ids: List[str], top_k: int) -> List[List[Dict[str, Any]]]:
+        """Diversified hits for every query: at most top_k per query, across all bins."""
+        namespaces = [f"{user_id}_{bin_id}" for bin_id in bin_ids]
+        if self._cache is not None:
+            embeddings, versions = await asyncio.gather(
+                asyncio.to_thread(embedding_service.embed_documents, queries),
+                asyncio.to_thread(namespace_version_service.get, namespaces)
+            )
+        else:
+            embeddings, versions = await asyncio.to_thread(embedding_service.embed_documents, queries), None
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        fetch_k = top_k * self.fetch_multiplier
+
+        async def query_bin(query_idx: int, bin_id: str):
+            namespace = f"{user_id}_{bin_id}"
+            # Without a version (Postgres unavailable) results can't be validated, so skip the cache
+            key = (namespace, versions[namespace], _vector_hash(embeddings[query_idx]), fetch_k) if versions else None
+            cached = self._cache.get(key) if key else None
+            if cached is not None:
+                self.cache_stats["hits"] += 1
+                return [
+                    {**m, "metadata": dict(m["metadata"]), "bin_id": bin_id, "query": queries[query_idx]}
+                    for m in cached
+                ]
+            if key:
+                self.cache_stats["misses"] += 1
+            async with semaphore:
+                try:
+                    response = await vector_store.aquery_vectors(
+                        embeddings[query_idx],
+                        namespace=namespace,
+                        top_k=fetch_k,
+                        include_values=fetch_k > top_k
+                    )
+                except Exception as e:
+                    print(f"Internal search failed for namespace {namespace}: {e}")
+                    return []
+            matches = [_match_fields(m) for m in _response_matches(response)]
+            if key:
+                self._cache[key] = matches
+            return [
+                {**m, "metadata": dict(m["metadata"]), "bin_id": bin_id, "query": queries[query_idx]}
+                for m in matches
+            ]
+
+        batches = await asyncio.gather(*[
+            query_bin(qi, bin_id)
+            for qi in range(len(queries))
+            for bin_id in bin_ids
+        ])
+        per_query: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        for n, hits in enumerate(batches):
+            per_query[n // len(bin_ids)].extend(hits)
+        return [self._diversify(embeddings[qi], hits, top_k) for qi, hits in enumerate(per_query)]
+
+    def _diversify(self, query_vector, hits: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        """MMR selection of top_k hits (per-document capped); the vectors are dropped afterwards."""
+        candidates = self._merge(hits, len(hits))
+        if len(candidates) > top_k and all(h["values"] is not None for h in candidates):
+            picked = mmr_select(
+                np.asarray(query_vector, dtype=np.float32),
+                np.stack([h["values"] for h in candidates]),
+                top_k,
+                lambda_mult=self.mmr_lambda,
+                groups=[_doc_key(h) for h in candidates],
+                max_per_group=self.max_per_doc
+            )
+            candidates = [candidates[i] for i in picked]
+        else:
+            # No vectors to compare (e.g. a backend without include_values): relevance order, still capped
+            candidates = self._merge(candidates, top_k, self.max_per_doc)
+        return [{k: v for k, v in h.items() if k != "values"} for h in candidates]
+
+    @staticmethod
+    def _merge(hits: List[Dict[str, Any]], limit: int, max_per_doc: Optional[int] = None) -> List[Dict[str, Any]]:
+        best: Dict[Any, Dict[str, Any]] = {}
+        for hit in hits:
+            key = (hit["bin_id"], hit["id"]) if hit["id"] else id(hit)
+            if key not in best or hit["score"] > best[key]["score"]:
+                best[key] = hit
+        ranked = sorted(best.values(), key=lambda h: h["score"], reverse=True)
+        if max_per_doc:
+            per_doc: Dict[Any, int] = {}
+            capped = []
+            for hit in ranked:
+                doc = (hit["bin_id"], _doc_key(hit))
+                if per_doc.get(doc, 0) < max_per_doc:
+                    per_doc[doc] = per_doc.get(doc, 0) + 1
+                    capped.append(hit)
+            ranked = capped
+        return ranked[:limit]
+
+    async def search(
+        self,
+        queries: List[str],
+        user_id: str,
+        bin_ids: List[str],
+        top_k: int = 3,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns hits sorted by score: {"id", "score", "bin_id", "query", "metadata"}.
+
+        Duplicate vectors found by several queries are kept once with their best
+        score. limit defaults to top_k per query.
+        """
+        queries = [q for q in queries if q]
+        if not queries or not bin_ids or not user_id:
+            return []
+        limit = limit or top_k * len(queries)
+
+        per_query = await self._query_all(queries, user_id, bin_ids, top_k)
+        ranked = self._merge([hit for hits in per_query for hit in hits], limit, self.max_per_doc)
+        ranked = await asyncio.to_thread(chunk_store_service.hydrate, ranked)
+        print(f"Internal Search: {len(queries)} queries x {len(bin_ids)} bins -> {len(ranked)} hits")
+        return ranked
+
+    async def search_each(
+        self,
+        queries: List[str],
+        user_id: str,
+        bin_ids: List[str],
+        top_k: int = 3
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Like search(), but keeps each query's hits separate: one ranked list of at
+        most top_k hits per input query (same order), still from a single
+        batched embedding call and one concurrent fan-out.
+        """
+        if not queries or not bin_ids or not user_id:
+            return [[] for _ in queries]
+        active = [q for q in queries if q]
+        per_query = dict(zip(active, await self._query_all(active, user_id, bin_ids, top_k))) if active else {}
+        results = [self._merge(per_query.get(q, []), top_k) if q else [] for q in queries]
+        # One hydration query for every query's hits
+        hydrated = await asyncio.to_thread(chunk_store_service.hydrate, [hit for hits in results for hit in hits])
+        kept = {id(hit) for hit in hydrated}
+        results = [[hit for hit in hits if id(hit) in kept] for hits in results]
+        print(f"Internal Search: {len(active)} per-query searches x {len(bin_ids)} bins -> {sum(map(len, results))} hits")
+        return results
+
+
+retrieval_service = RetrievalService(
+    max_concurrency=settings.INTERNAL_SEARCH_MAX_CONCURRENCY,
+    cache_size=settings.INTERNAL_SEARCH_CACHE_SIZE,
+    fetch_multiplier=settings.INTERNAL_SEARCH_FETCH_MULTIPLIER,
+    mmr_lambda=settings.INTERNAL_SEARCH_MMR_LAMBDA,
+    max_per_doc=settings.INTERNAL_SEARCH_MAX_PER_DOC
+)
@@ -0,0 +1,207 @@
+import math
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.services.research_index_service import research_index_service
+
+# Domains whose content is usually primary, reviewed or official
+HIGH_REPUTATION_DOMAINS = {
+    "arxiv.org", "nature.com", "science.org", "acm.org", "ieee.org", "nih.gov", "who.int", "wikipedia.org",
+    "github.com", "openai.com", "anthropic.com", "deepmind.google", "research.google", "microsoft.com",
+    "mit.edu", "stanford.edu", "harvard.edu", "reuters.com", "apnews.com", "economist.com", "ft.com",
+    "nytimes.com", "bbc.co.uk", "statista.com", "mckinsey.com", "gartner.com", "developer.mozilla.org",
+}
+HIGH_REPUTATION_SUFFIXES = (".gov", ".edu", ".ac.uk", ".int")
+# Aggregators and content farms: rarely worth a slot in the prompt
+LOW_REPUTATION_DOMAINS = {
+    "pinterest.com", "quora.com", "answers.com", "slideshare.net", "scribd.com", "coursehero.com",
+    "studocu.com", "ehow.com", "wikihow.com", "facebook.com", "instagram.com", "tiktok.com",
+}
+
+PLACEHOLDER_TITLES = {"", "no title", "untitled", "none"}
+BOILERPLATE_MARKERS = (
+    "cookie", "subscribe", "sign in", "sign up", "log in", "privacy policy", "terms of service",
+    "all rights reserved", "newsletter", "advertisement", "share this", "related posts", "skip to content",
+)
+MIN_CONTENT_CHARS = 80
+ALWAYS_KEEP_SOURCES = {"user"}
+
+WEIGHTS = {"length": 0.25, "boilerplate": 0.15, "domain": 0.2, "recency": 0.1, "similarity": 0.3}
+
+
+def estimate_tokens(item: Dict[str, Any]) -> int:
+    return (len(item.get("content") or "") + len(item.get("title") or "")) // 4 + 10
+
+
+def _domain(url: str) -> str:
+    host = (urlparse(url or "").hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def rejection_reason(item: Dict[str, Any]) -> Optional[str]:
+    """Why an item is unusable outright, or None."""
+    content = (item.get("content") or "").strip()
+    title = (item.get("title") or "").strip().lower()
+    if not content:
+        return "empty content"
+    if len(content) < MIN_CONTENT_CHARS and (title in PLACEHOLDER_TITLES or content.lower() == title):
+        return "snippet too small"
+    return None
+
+
+def length_score(content: str) -> float:
+    # Saturates around 1.5k chars: beyond that extra text adds little for planning
+    return min(1.0, math.log1p(len(content)) / math.log1p(1500))
+
+
+def boilerplate_score(content: str) -> float:
+    """1.0 for clean prose, lower the more lines look like navigation, links or chrome."""
+    lines = [l.strip() for l in content.splitlines() if l.strip()]
+    if not lines:
+        return 0.0
+    noisy = 0
+    for line in lines:
+        lower = line.lower()
+        links = len(re.findall(r"\]\(https?://", line))
+        if any(m in lower for m in BOILERPLATE_MARKERS) or (links and len(line) < 80 * links) or len(line) < 20:
+            noisy += 1
+    return 1.0 - noisy / len(lines)
+
+
+def domain_score(item: Dict[str, Any]) -> float:
+    if item.get("source") in ("internal", "user"):
+        return 1.0
+    domain = _domain(item.get("url") or "")
+    if not domain:
+        return 0.5
+    if any(domain == d or domain.endswith("." + d) for d in HIGH_REPUTATION_DOMAINS) or domain.endswith(HIGH_REPUTATION_SUFFIXES):
+        return 1.0
+    if any(domain == d or domain.endswith("." + d) for d in LOW_REPUTATION_DOMAINS):
+        return 0.1
+    return 0.5
+
+
+def recency_score(item: Dict[str, Any], now: Optional[datetime] = None) -> float:
+    """1.0 for the last year, decaying to 0.2 at ten years; 0.5 when undated."""
+    published = item.get("published") or item.get("published_date") or item.get("date")
+    if not published:
+        return 0.5
+    match = re.search(r"(19|20)\d{2}", str(published))
+    if not match:
+        return 0.5
+    now = now or datetime.now(timezone.utc)
+    age_years = max(0, now.year - int(match.group(0)))
+    return max(0.2, 1.0 - 0.08 * max(0, age_years - 1))
+
+
+class SourceQualityService:
+    """
+    Scores research items and prunes them to a token budget before planning.
+
+    Each item gets a weighted score from content length, boilerplate ratio,
+    domain reputation, recency and cosine similarity to the topic. Items are
+    then kept best-first within per-source-type quotas of the budget, and any
+    budget a source type leaves unused goes to the best remaining items.
+    """
+
+    async def score(self, research: List[Dict[str, Any]], topic: str) -> List[Dict[str, Any]]:
+        similarity = [0.5] * len(research)
+        try:
+            index = await research_index_service.build_index(research)
+            if len(index):
+                topic_vector = await research_index_service.embed_texts([topic])
+                by_id = dict(zip(index.source_ids, index.score(topic_vector)[0].tolist()))
+                similarity = [max(0.0, by_id.get(r.get("source_id"), 0.5)) for r in research]
+        except Exception as e:
+            print(f"Source similarity scoring failed: {e}")
+
+        scored = []
+        for item, sim in zip(research, similarity):
+            content = item.get("content") or ""
+            components = {
+                "length": length_score(content),
+                "boilerplate": boilerplate_score(content),
+                "domain": domain_score(item),
+                "recency": recency_score(item),
+                "similarity": sim
+            }
+            scored.append({
+                "item": item,
+                "score": round(sum(WEIGHTS[k] * v for k, v in components.items()), 4),
+                "components": components,
+                "reason": rejection_reason(item),
+                "tokens": estimate_tokens(item)
+            })
+        return scored
+
+    async def prune(
+        self,
+        research: List[Dict[str, Any]],
+        topic: str,
+        token_budget: int,
+        quotas: Dict[str, float],
+        min_score: float = 0.0
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Returns (kept_items, pruned) where pruned entries are
+        {"source_id", "title", "source", "score", "reason"}. Kept items keep
+        their original order.
+        """
+        scored = await self.score(research, topic)
+        keep = set()
+        pruned: Dict[int, str] = {}
+        used = 0
+
+        for i, entry in enumerate(scored):
+            if entry["item"].get("source") in ALWAYS_KEEP_SOURCES:
+                keep.add(i)
+                used += entry["tokens"]
+            elif entry["reason"]:
+                pruned[i] = entry["reason"]
+            elif entry["score"] < min_score:
+                pruned[i] = "low quality"
+
+        candidates = sorted(
+            (i for i in range(len(scored)) if i not in keep and i not in pruned),
+            key=lambda i: scored[i]["score"],
+            reverse=True
+        )
+
+        # Pass 1: each source type within its quota
+        type_used: Dict[str, int] = {}
+        for i in candidates:
+            source = scored[i]["item"].get("source") or "web"
+            quota = int(token_budget * quotas.get(source, 0.0))
+            tokens = scored[i]["tokens"]
+            if type_used.get(source, 0) + tokens <= quota and used + tokens <= token_budget:
+                keep.add(i)
+                type_used[source] = type_used.get(source, 0) + tokens
+                used += tokens
+
+        # Pass 2: unused budget goes to the best remaining items of any type
+        for i in candidates:
+            if i in keep:
+                continue
+            if used + scored[i]["tokens"] <= token_budget:
+                keep.add(i)
+                used += scored[i]["tokens"]
+            else:
+                pruned[i] = "over budget"
+
+        kept_items = [scored[i]["item"] for i in range(len(scored)) if i in keep]
+        pruned_entries = [
+            {
+                "source_id": scored[i]["item"].get("source_id"),
+                "title": scored[i]["item"].get("title"),
+                "source": scored[i]["item"].get("source"),
+                "score": scored[i]["score"],
+                "reason": reason
+            }
+            for i, reason in sorted(pruned.items())
+        ]
+        return kept_items, pruned_entries
+
+
+source_quality_service = SourceQualityService()
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# (id, embedding, metadata)
+VectorRecord = Tuple[str, Sequence[float], Dict[str, Any]]
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evaluate a Pinecone-style metadata filter: {"field": value} or
+    {"field": {"$eq"|"$ne"|"$in"|"$nin": value}}, with all fields AND-ed.
+    """
+    if not filter:
+        return True
+    for field, condition in filter.items():
+        value = metadata.get(field)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, expected in condition.items():
+            if op == "$eq" and value != expected:
+                return False
+            if op == "$ne" and value == expected:
+                return False
+            if op == "$in" and value not in expected:
+                return False
+            if op == "$nin" and value in expected:
+                return False
+    return True
+
+
+def estimate_record_bytes(record: VectorRecord) -> int:
+    """Approximate JSON request size of one record (floats serialize to ~20 chars)."""
+    vector_id, embedding, metadata = record
+    return len(vector_id) + 20 * len(embedding) + len(json.dumps(metadata or {})) + 64
+
+
+def batch_vectors(vectors: List[VectorRecord], max_bytes: int, max_vectors: int) -> List[List[VectorRecord]]:
+    """Split records into consecutive batches under both a request-size and a count limit."""
+    batches: List[List[VectorRecord]] = []
+    current: List[VectorRecord] = []
+    current_bytes = 0
+    for record in vectors:
+        size = estimate_record_bytes(record)
+        if current and (current_bytes + size > max_bytes or len(current) >= max_vectors):
+            batches.append(current)
+            current, current_bytes = [], 0
+        current.append(record)
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def upsert_metrics(vectors: int, batches: int, started: float, retries: int = 0) -> Dict[str, Any]:
+    seconds = time.perf_counter() - started
+    return {
+        "vectors": vectors,
+        "batches": batches,
+        "retries": retries,
+        "seconds": round(seconds, 3),
+        "vectors_per_second": round(vectors / seconds, 1) if seconds > 0 else float(vectors)
+    }
+
+
+class VectorStore(ABC):
+    """
+    Storage for chunk embeddings, partitioned by namespace ({user_id}_{bin_id}).
+
+    Queries return Pinecone-shaped responses ({"matches": [{"id", "score",
+    "metadata"}]}, plus "values" with include_values=True) so callers work
+    against any backend unchanged. The async
+    variants default to running the sync calls in a thread; backends with a
+    native async client override them.
+    """
+
+    @abstractmethod
+    def upsert_vectors(self, vectors: List[VectorRecord], namespace: str):
+        ...
+
+    @abstractmethod
+    def query_vectors(
+        self,
+        vector,
+        namespace: str,
+        top_k: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+        include_values: bool = False
+    ):
+        ...
+
+    @abstractmethod
+    def delete_vectors(self, namespace: str, filter: dict = None, ids: list = None):
+        ...
+
+    @abstractmethod
+    def delete_namespace(self, namespace: str):
+        ...
+
+    async def aupsert_vectors(self, vectors: List[VectorRecord], namespace: str) -> Dict[str, Any]:
+        """Upsert and return throughput metrics ({"vectors", "batches", "seconds", "vectors_per_second", ...})."""
+        started = time.perf_counter()
+        await asyncio.to_thread(self.upsert_vectors, vectors, namespace)
+        return upsert_metrics(len(vectors), 1, started)
+
+    async def aquery_vectors(
+        self,
+        vector,
+        namespace: str,
+        top_k: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+        include_values: bool = False
+    ):
+        return await asyncio.to_thread(self.query_vectors, vector, namespace, top_k, filter, include_values)
+
+    def query_namespaces(
+        self,
+        vector,
+        namespaces: List[str],
+        top_k: int = 5,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Top matches across several namespaces; each match also carries its "namespace"."""
+        matches = []
+        for namespace in namespaces:
+            response = self.query_vectors(vector, namespace=namespace, top_k=top_k, filter=filter)
+            raw = response.get("matches", []) if isinstance(response, dict) else (getattr(response, "matches", None) or [])
+            for match in raw:
+                if not isinstance(match, dict):
+                    metadata = getattr(match, "metadata", None) or {}
+                    match = {
+                        "id": match.id,
+                        "score": match.score,
+                        "metadata": metadata.to_dict() if hasattr(metadata, "to_dict") else metadata
+                    }
+                matches.append({**match, "namespace": namespace})
+        matches.sort(key=lambda m: m["score"] or 0.0, reverse=True)
+        return {"matches": matches[:top_k]}
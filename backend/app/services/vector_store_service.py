@@ -0,0 +1,20 @@
+from app.core.config import settings
+from app.services.vector_store import VectorStore
+
+
+def create_vector_store() -> VectorStore:
+    if settings.VECTOR_STORE == "local":
+        from app.services.local_vector_store import LocalVectorStore
+        return LocalVectorStore(settings.LOCAL_VECTOR_STORE_PATH)
+    if settings.VECTOR_STORE == "pgvector":
+        from app.services.pgvector_store import PgVectorStore
+        # psycopg needs a plain postgresql:// DSN
+        return PgVectorStore(
+            settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://"),
+            ef_search=settings.PGVECTOR_EF_SEARCH
+        )
+    from app.services.pinecone_service import pinecone_service
+    return pinecone_service
+
+
+vector_store = create_vector_store()
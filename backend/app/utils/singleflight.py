@@ -0,0 +1,87 @@
+"""
+Singleflight - Coalesce identical concurrent calls into one in-flight request
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Tuple
+
+_registry: Dict[str, Any] = {}
+
+
+def singleflight_stats() -> Dict[str, Dict[str, int]]:
+    """Per-flight counters: `calls` actually issued and `coalesced` callers that shared one."""
+    return {name: {"calls": flight.calls, "coalesced": flight.coalesced} for name, flight in _registry.items()}
+
+
+class SingleFlight:
+    """
+    While a call for `key` is in flight, later callers await the same task
+    instead of starting their own. The task is shielded, so a caller that
+    times out or is cancelled does not cancel it for the others, and the key
+    is released as soon as it finishes (results are not cached).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        _registry[name] = self
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._release(key, t))
+        return await asyncio.shield(task)
+
+    def _release(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Nobody may be left awaiting a failed task; mark its error as retrieved
+        if not task.cancelled():
+            task.exception()
+
+
+class ThreadSingleFlight:
+    """
+    Per-key variant for blocking code running in worker threads.
+
+    claim() splits keys into the ones this caller must compute and the ones
+    another thread is already computing (with an Event to wait on); the owner
+    must call release() with its keys once their results are visible.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, threading.Event] = {}
+        _registry[name] = self
+
+    def claim(self, keys: Iterable[Hashable]) -> Tuple[List[Hashable], Dict[Hashable, threading.Event]]:
+        owned: List[Hashable] = []
+        waiting: Dict[Hashable, threading.Event] = {}
+        with self._lock:
+            for key in keys:
+                event = self._inflight.get(key)
+                if event is not None:
+                    waiting[key] = event
+                else:
+                    self._inflight[key] = threading.Event()
+                    owned.append(key)
+            self.calls += len(owned)
+            self.coalesced += len(waiting)
+        return owned, waiting
+
+    def release(self, keys: Iterable[Hashable]):
+        with self._lock:
+            for key in keys:
+                event = self._inflight.pop(key, None)
+                if event is not None:
+                    event.set()
@@ -0,0 +1,34 @@
+"""
+URL Helpers - Canonical URL form used for dedup and cache keys
+"""
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+TRACKING_PARAMS = {"gclid", "fbclid", "mc_cid", "mc_eid", "ref", "ref_src", "igshid"}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL so trivially different links to the same page compare equal:
+    lowercase scheme/host, no default port, no fragment, no tracking params,
+    sorted query string and no trailing slash on non-root paths.
+    """
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ]
+    return urlunsplit((scheme, host, path, urlencode(sorted(query)), ""))
@@ -0,0 +1,126 @@
+"""
+Vector Math Helpers - Small NumPy utilities shared by the retrieval code paths
+"""
+from typing import Hashable, List, Optional, Sequence
+
+import numpy as np
+
+
+def to_matrix(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    """Stack a list of embeddings into a float32 matrix (n x dim)."""
+    if len(vectors) == 0:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so dot products become cosine similarities."""
+    if matrix.size == 0:
+        return matrix
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def cosine_similarity_matrix(queries: np.ndarray, items: np.ndarray) -> np.ndarray:
+    """
+    Cosine similarity of every query row against every item row.
+
+    Returns a (num_queries x num_items) matrix computed in one batched matmul.
+    """
+    if queries.size == 0 or items.size == 0:
+        return np.zeros((queries.shape[0], items.shape[0]), dtype=np.float32)
+    return normalize_rows(queries) @ normalize_rows(items).T
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> List[List[int]]:
+    """Indices of the k highest scores for each row, best first."""
+    if scores.size == 0 or k <= 0:
+        return [[] for _ in range(scores.shape[0])]
+    k = min(k, scores.shape[1])
+    # argpartition keeps this O(n) per row before sorting the k winners
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    rows = np.arange(scores.shape[0])[:, None]
+    order = np.argsort(-scores[rows, part], axis=1)
+    return part[rows, order].tolist()
+
+
+def mmr_select(
+    query: np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.7,
+    groups: Optional[Sequence[Hashable]] = None,
+    max_per_group: Optional[int] = None
+) -> List[int]:
+    """
+    Maximal marginal relevance: pick k candidate rows, each maximizing
+    lambda * sim(query) - (1 - lambda) * max sim(already picked).
+
+    Near-duplicates of a picked row (e.g. overlapping chunks) score low, so
+    the selection covers more distinct content. With groups, at most
+    max_per_group rows are picked per group. Returns indices in pick order.
+    """
+    n = candidates.shape[0]
+    if n == 0 or k <= 0:
+        return []
+    items = normalize_rows(candidates.astype(np.float32))
+    relevance = items @ normalize_rows(query.reshape(1, -1).astype(np.float32))[0]
+    pairwise = items @ items.T
+    redundancy = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    group_ids = None
+    if groups is not None and max_per_group:
+        group_ids = np.unique(np.asarray([str(g) for g in groups]), return_inverse=True)[1]
+        group_counts = np.zeros(group_ids.max() + 1, dtype=np.int64)
+
+    selected: List[int] = []
+    while len(selected) < min(k, n) and available.any():
+        scores = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, pairwise[best])
+        if group_ids is not None:
+            group_counts[group_ids[best]] += 1
+            if group_counts[group_ids[best]] >= max_per_group:
+                available[group_ids == group_ids[best]] = False
+    return selected
+
+
+def spherical_kmeans(matrix: np.ndarray, k: int, iterations: int = 20, seed: int = 0):
+    """
+    k-means on L2-normalized rows using cosine similarity (k-means++ seeding).
+
+    Returns (labels, centroids). Deterministic for a given seed so the same
+    research always produces the same clusters.
+    """
+    n = matrix.shape[0]
+    if n == 0 or k <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, matrix.shape[1] if matrix.ndim == 2 else 0), dtype=np.float32)
+    k = min(k, n)
+    points = normalize_rows(matrix.astype(np.float32))
+    rng = np.random.default_rng(seed)
+
+    # k-means++: spread the initial centroids out by cosine distance
+    centroids = [points[rng.integers(n)]]
+    for _ in range(1, k):
+        distance = 1.0 - np.max(points @ np.stack(centroids).T, axis=1)
+        distance = np.clip(distance, 0.0, None)
+        total = distance.sum()
+        index = rng.choice(n, p=distance / total) if total > 0 else rng.integers(n)
+        centroids.append(points[index])
+    centroids = np.stack(centroids)
+
+    labels = np.full(n, -1, dtype=np.int64)
+    for _ in range(iterations):
+        new_labels = np.argmax(points @ centroids.T, axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for c in range(k):
+            members = points[labels == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids = normalize_rows(centroids)
+    return labels, centroids
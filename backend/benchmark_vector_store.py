@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Vector Store Benchmark - Query latency and recall of the vector store backends
+
+Loads a synthetic corpus (clustered random vectors, so neighbours are
+meaningful) into a scratch namespace and times top-k queries. Exact search
+over the same corpus is the ground truth for recall@k, so the local store
+scores 1.0 by construction and the recall of Pinecone and pgvector shows what
+their approximate (HNSW) indexes give up.
+
+pgvector rows belong to a real bin, so --pgvector takes the namespace
+("<user_id>_<bin_id>") of an existing bin, which must be empty: the benchmark
+refuses to run otherwise. Only the rows it inserted are deleted afterwards.
+
+Usage:
+    python benchmark_vector_store.py [--vectors N] [--dim D] [--queries Q] [--top-k K] [--pinecone] [--pgvector NAMESPACE]
+
+Example:
+    python benchmark_vector_store.py --vectors 50000 --dim 1536 --pinecone --pgvector <user_id>_<bin_id>
+"""
+import argparse
+import statistics
+import tempfile
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services.local_vector_store import LocalVectorStore
+from app.services.vector_store import VectorStore
+from app.utils.vector_math import normalize_rows, top_k_indices
+
+
+def make_corpus(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, n // 200), dim))
+    return (centers[rng.integers(0, len(centers), n)] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+def match_ids(response) -> List[str]:
+    matches = response.get("matches", []) if isinstance(response, dict) else (response.matches or [])
+    return [m["id"] if isinstance(m, dict) else m.id for m in matches]
+
+
+def run(
+    store: VectorStore,
+    name: str,
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    top_k: int,
+    truth: List[List[str]],
+    namespace: Optional[str] = None
+) -> Dict:
+    scratch = namespace is None
+    namespace = namespace or f"benchmark_{uuid.uuid4().hex[:8]}"
+    latencies, recalls = [], []
+    try:
+        started = time.perf_counter()
+        for start in range(0, len(corpus), 100):
+            store.upsert_vectors(
+                [(f"v{i}", corpus[i].tolist(), {"group": i // 10}) for i in range(start, min(start + 100, len(corpus)))],
+                namespace
+            )
+        upsert_seconds = time.perf_counter() - started
+
+        for query, expected in zip(queries, truth):
+            started = time.perf_counter()
+            ids = match_ids(store.query_vectors(query.tolist(), namespace=namespace, top_k=top_k))
+            latencies.append((time.perf_counter() - started) * 1000)
+            recalls.append(len(set(ids) & set(expected)) / len(expected))
+    finally:
+        if scratch:
+            store.delete_namespace(namespace)
+        else:
+            # A real bin: remove only the benchmark's own rows
+            for start in range(0, len(corpus), 1000):
+                store.delete_vectors(namespace, ids=[f"v{i}" for i in range(start, min(start + 1000, len(corpus)))])
+
+    latencies.sort()
+    return {
+        "backend": name,
+        "upsert_s": round(upsert_seconds, 2),
+        "upsert_per_s": round(len(corpus) / upsert_seconds),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+        f"recall@{top_k}": round(statistics.mean(recalls), 4)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vector store query latency and recall")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--pinecone", action="store_true", help="Also benchmark the configured Pinecone index")
+    parser.add_argument("--pgvector", metavar="NAMESPACE", help="Also benchmark pgvector (DATABASE_URL) in this bin's namespace")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.vectors, args.dim)
+    queries = make_corpus(args.queries, args.dim, seed=1)
+    exact = top_k_indices(normalize_rows(queries) @ normalize_rows(corpus).T, args.top_k)
+    truth = [[f"v{i}" for i in row] for row in exact]
+
+    results = []
+    with tempfile.TemporaryDirectory() as path:
+        results.append(run(LocalVectorStore(path), "local", corpus, queries, args.top_k, truth))
+    if args.pinecone:
+        from app.services.pinecone_service import pinecone_service
+        # Pinecone is eventually consistent: give fresh upserts time to become queryable
+        original_upsert = pinecone_service.upsert_vectors
+
+        def upsert_and_settle(vectors, namespace):
+            original_upsert(vectors, namespace)
+            if vectors[-1][0] == f"v{args.vectors - 1}":
+                time.sleep(10)
+
+        pinecone_service.upsert_vectors = upsert_and_settle
+        results.append(run(pinecone_service, "pinecone", corpus, queries, args.top_k, truth))
+    if args.pgvector:
+        from app.core.config import settings
+        from app.services.pgvector_store import PgVectorStore
+        store = PgVectorStore(
+            settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://"),
+            ef_search=settings.PGVECTOR_EF_SEARCH
+        )
+        if store.count(args.pgvector) != 0:
+            parser.error(f"bin {args.pgvector} already has vectors; benchmark pgvector against an empty bin")
+        results.append(run(store, "pgvector", corpus, queries, args.top_k, truth, namespace=args.pgvector))
+
+    print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries, top_k={args.top_k}")
+    for row in results:
+        print("  " + "  ".join(f"{k}={v}" for k, v in row.items()))
+
+
+if __name__ == "__main__":
+    main()
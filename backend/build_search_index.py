@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Search Index Builder - Build or refresh the offline index used by SEARCH_PROVIDER=local
+
+Documents can come from a JSONL export ({"url", "title", "content"} per line),
+a directory of .md/.txt/.html files, or a list of URLs to crawl. Re-running
+the builder is incremental: unchanged documents are skipped.
+
+Usage:
+    python build_search_index.py [--index PATH] [--jsonl FILE] [--dir DIR] [--urls FILE] [--prune]
+
+Example:
+    python build_search_index.py --dir ./corpus --urls seed_urls.txt --prune
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from app.services.local_search_index import LocalSearchIndex
+from app.services.page_extractor import MainContentParser, PageExtractor
+
+MAX_DOCUMENT_CHARS = 20000
+
+
+def read_jsonl(path: str) -> Iterator[Dict[str, str]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_directory(path: str) -> Iterator[Dict[str, str]]:
+    for file in sorted(Path(path).rglob("*")):
+        if file.suffix.lower() not in {".md", ".markdown", ".txt", ".html", ".htm"}:
+            continue
+        text = file.read_text(encoding="utf-8", errors="ignore")
+        title = file.stem.replace("-", " ").replace("_", " ").title()
+        if file.suffix.lower() in {".html", ".htm"}:
+            parser = MainContentParser(max_chars=MAX_DOCUMENT_CHARS)
+            parser.feed(text)
+            parser.close()
+            title = parser.title.strip() or title
+            text = parser.markdown
+        else:
+            for line in text.splitlines():
+                if line.startswith("# "):
+                    title = line[2:].strip()
+                    break
+        yield {"url": file.resolve().as_uri(), "title": title, "content": text[:MAX_DOCUMENT_CHARS]}
+
+
+async def crawl_urls(urls: List[str]) -> List[Dict[str, str]]:
+    extractor = PageExtractor(max_chars=MAX_DOCUMENT_CHARS)
+    try:
+        pages = await extractor.extract_many(urls)
+    finally:
+        await extractor.aclose()
+    return [
+        {"url": url, "title": page["title"], "content": page["markdown"]}
+        for url, page in zip(urls, pages) if page and page["markdown"]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline full-text search index")
+    parser.add_argument("--index", default=os.environ.get("LOCAL_SEARCH_INDEX_PATH", "data/search_index.db"))
+    parser.add_argument("--jsonl", action="append", default=[], help="JSONL file with url/title/content")
+    parser.add_argument("--dir", action="append", default=[], help="Directory of .md/.txt/.html files")
+    parser.add_argument("--urls", action="append", default=[], help="Text file with one URL per line to crawl")
+    parser.add_argument("--prune", action="store_true", help="Remove indexed documents missing from this import")
+    args = parser.parse_args()
+
+    if not (args.jsonl or args.dir or args.urls):
+        parser.print_help()
+        sys.exit(1)
+
+    docs: List[Dict[str, str]] = []
+    for path in args.jsonl:
+        docs.extend(read_jsonl(path))
+    for path in args.dir:
+        docs.extend(read_directory(path))
+    for path in args.urls:
+        with open(path, "r", encoding="utf-8") as f:
+            urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        docs.extend(asyncio.run(crawl_urls(urls)))
+
+    index = LocalSearchIndex(args.index)
+    stats = index.upsert_documents(docs)
+    if args.prune:
+        stats["removed"] = index.remove_missing(d["url"] for d in docs if d.get("url"))
+    print(f"Index {args.index}: {stats} ({index.count()} documents)")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+from langgraph.types import Command
+
+from app.agent.budget import _count_timeout, partial_results, remaining_budget, with_budget
+from app.agent.nodes.researcher import researcher_timeout_fallback
+from app.agent.nodes.writer import writer_timeout_fallback
+
+
+def run(node, state, config=None):
+    return asyncio.run(node(state, config or {}))
+
+
+def test_fast_node_result_passes_through():
+    async def node(state):
+        assert 0 < remaining_budget() <= 5
+        return {"done": True}
+
+    assert run(with_budget("fast", node, lambda s, p: {}, budget_seconds=5), {}) == {"done": True}
+    assert remaining_budget() is None
+
+
+def test_slow_node_returns_fallback_with_partial_results():
+    async def node(state):
+        partial_results()["found"] = ["a"]
+        await asyncio.sleep(5)
+        return {"found": ["a", "b"]}
+
+    def fallback(state, partial):
+        return {"found": partial["found"]}
+
+    result = run(with_budget("slow", node, fallback, budget_seconds=0.1), {})
+
+    assert result == {"found": ["a"], "node_timeouts": {"slow": 1}}
+
+
+def test_run_deadline_caps_the_node_budget(monkeypatch):
+    monkeypatch.setattr("app.agent.budget.settings.NODE_MIN_BUDGET_SECONDS", 0.1)
+    seen = {}
+
+    async def node(state):
+        seen["budget"] = remaining_budget()
+        await asyncio.sleep(5)
+
+    started = time.monotonic()
+    result = run(with_budget("capped", node, lambda s, p: {}, budget_seconds=60), {"run_deadline": time.time() - 1})
+
+    assert seen["budget"] <= 0.1
+    assert time.monotonic() - started < 1
+    assert result == {"node_timeouts": {"capped": 1}}
+
+
+def test_writer_keeps_its_own_grace_period_past_the_run_deadline(monkeypatch):
+    monkeypatch.setattr("app.agent.budget.settings.NODE_MIN_BUDGETS", {"writer": 30})
+    seen = {}
+
+    async def node(state):
+        seen["budget"] = remaining_budget()
+        return {}
+
+    run(with_budget("writer", node, lambda s, p: {}, budget_seconds=60), {"run_deadline": time.time() - 1})
+
+    assert seen["budget"] > 29
+
+
+def test_timeout_count_is_added_to_command_updates():
+    counted = _count_timeout(Command(update={"a": 1}, goto="visuals"), "writer")
+
+    assert counted.goto == "visuals"
+    assert counted.update == {"a": 1, "node_timeouts": {"writer": 1}}
+    assert _count_timeout(None, "planner") == {"node_timeouts": {"planner": 1}}
+
+
+def test_researcher_fallback_keeps_partial_sources_in_priority_order():
+    state = {"extra_context": "notes", "research_sources": ["web", "internal", "academic"]}
+    partial = {"web": [{"source_id": "web_1"}], "internal": [{"source_id": "int_a_1"}], "timed_out": ["web:q"]}
+
+    result = researcher_timeout_fallback(state, partial)
+
+    assert [r["source_id"] for r in result["research_data"]] == ["user_context", "int_a_1", "web_1"]
+    assert result["research_timeouts"] == ["web:q", "academic", "researcher"]
+
+
+def test_writer_fallback_marks_the_section_cut_short():
+    state = {"outline": [{"id": "s1"}, {"id": "s2"}], "current_section_index": 0, "draft_sections": {}}
+
+    empty = writer_timeout_fallback(state, {})
+    drafted = writer_timeout_fallback({**state, "draft_sections": {"s1": "draft"}}, {})
+
+    assert "draft_sections" not in empty.update
+    assert empty.update["truncated_sections"] == ["s1"]
+    assert (empty.goto, empty.update["current_section_index"]) == ("writer", 1)
+    assert drafted.goto == "visuals"
+    assert drafted.update == {"truncated_sections": ["s1"]}
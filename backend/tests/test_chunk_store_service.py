@@ -0,0 +1,89 @@
+from contextlib import contextmanager
+
+import pytest
+
+from app.services import chunk_store_service as module
+from app.services.chunk_store_service import ChunkStoreService
+
+
+class FakeCursor:
+    def __init__(self, rows=None, fail=False):
+        self.rows = rows or []
+        self.fail = fail
+        self.executed = []
+
+    def execute(self, sql, params):
+        if self.fail:
+            raise RuntimeError("connection lost")
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakePostgres:
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.connection_pool = object()
+
+    @contextmanager
+    def get_cursor(self):
+        yield self.cursor
+
+
+@pytest.fixture
+def cursor(monkeypatch):
+    cursor = FakeCursor(rows=[("d1_0", "chunk text", "doc.pdf", 2, 0, "d1", 0)])
+    monkeypatch.setattr(module, "postgres_service", FakePostgres(cursor))
+    return cursor
+
+
+def test_store_writes_chunks_in_document_order(monkeypatch, cursor):
+    written = []
+    monkeypatch.setattr(module, "execute_values", lambda cur, sql, rows: written.extend(rows))
+
+    ChunkStoreService().store("d1", [
+        {"id": "d1_0", "text": "first", "page": 1, "chunk_index": 0},
+        {"id": "d1_1", "text": "second", "page": 1, "chunk_index": 1},
+    ])
+
+    assert written == [("d1_0", "d1", 0, 1, 0, "first"), ("d1_1", "d1", 1, 1, 1, "second")]
+
+
+def test_fetch_maps_rows_by_chunk_id(cursor):
+    chunks = ChunkStoreService().fetch(["d1_0"])
+
+    assert chunks == {"d1_0": {
+        "text": "chunk text", "source": "doc.pdf", "page": 2, "chunk_index": 0, "doc_id": "d1", "seq": 0
+    }}
+    assert cursor.executed[0][1] == (["d1_0"],)
+
+
+def test_hydrate_fills_text_and_keeps_inline_metadata(cursor):
+    service = ChunkStoreService()
+    hits = [
+        {"id": "d1_0", "score": 0.9, "metadata": {"doc_id": "d1", "page": 2}},
+        {"id": "legacy", "score": 0.8, "metadata": {"text": "inline text", "source": "old.pdf"}},
+    ]
+
+    hydrated = service.hydrate(hits)
+
+    assert [h["metadata"]["text"] for h in hydrated] == ["chunk text", "inline text"]
+    assert hydrated[0]["metadata"]["source"] == "doc.pdf"
+    # Legacy vectors carry their text inline and need no lookup
+    assert cursor.executed[0][1] == (["d1_0"],)
+    assert service.stats == {"hydrated": 1, "dropped": 0}
+
+
+def test_hydrate_drops_hits_it_cannot_fill(monkeypatch):
+    monkeypatch.setattr(module, "postgres_service", FakePostgres(FakeCursor(fail=True)))
+    service = ChunkStoreService()
+    hits = [
+        {"id": "d1_0", "score": 0.9, "metadata": {"doc_id": "d1"}},
+        {"id": "legacy", "score": 0.8, "metadata": {"text": "inline text"}},
+    ]
+
+    hydrated = service.hydrate(hits)
+
+    assert [h["id"] for h in hydrated] == ["legacy"]
+    assert service.stats["dropped"] == 1
@@ -0,0 +1,126 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from app.agent.nodes import deep_research
+from app.agent.nodes.deep_research import _budget_stop_reason, _measure_loop_gain
+from app.agent.state import Citation, ResearchResult
+from app.core.config import settings
+
+
+def result(*urls):
+    return ResearchResult(query="q", summary="s", citations=[Citation(url=u, title=u, content="x" * 250) for u in urls])
+
+
+def metrics(**overrides):
+    base = {"loop": 2, "elapsed_s": 0.0, "searches": 0, "new_urls": 10, "coverage_gain": 0.5}
+    return {**base, **overrides}
+
+
+def test_loop_gain_counts_canonical_urls_once():
+    state = {
+        "topic": "vector search",
+        "seen_research_urls": ["https://example.com/a"],
+        "research_started_at": time.time(),
+    }
+    gain = _measure_loop_gain(state, [
+        result("https://www.example.com/a/?utm_source=x", "https://example.com/b#intro"),
+        result("https://example.com/b/", "No URL"),
+    ])
+
+    assert gain["new_urls"] == 1
+    assert gain["new_passages"] == 1
+    assert gain["_new_url_list"] == ["https://example.com/b"]
+
+
+def test_loop_of_failed_searches_has_no_gain():
+    failures = [
+        ResearchResult(query="vector search", summary="Search failed for vector search. Error: timeout", citations=[]),
+        ResearchResult(query="vector search", summary="Academic search failed for vector search: 503", citations=[]),
+    ]
+    state = {"topic": "vector search", "deep_research_results": failures, "research_started_at": time.time()}
+
+    gain = _measure_loop_gain(state, failures)
+
+    assert (gain["new_urls"], gain["term_coverage"], gain["coverage_gain"]) == (0, 0.0, 0.0)
+
+
+def test_budgets_stop_the_loop():
+    assert _budget_stop_reason(metrics(loop=settings.DEEP_RESEARCH_MAX_LOOPS)) == "max_loops"
+    assert _budget_stop_reason(metrics(elapsed_s=settings.DEEP_RESEARCH_TIME_BUDGET_SECONDS)) == "time_budget"
+    assert _budget_stop_reason(metrics(searches=settings.DEEP_RESEARCH_MAX_SEARCHES)) == "search_budget"
+    assert _budget_stop_reason(metrics()) == ""
+
+
+def test_low_gain_stops_only_when_urls_and_coverage_both_stall():
+    few_urls = settings.DEEP_RESEARCH_MIN_NEW_URLS - 1
+    small_gain = settings.DEEP_RESEARCH_MIN_COVERAGE_GAIN / 2
+
+    assert _budget_stop_reason(metrics(new_urls=few_urls, coverage_gain=small_gain)) == "low_marginal_gain"
+    assert _budget_stop_reason(metrics(new_urls=few_urls, coverage_gain=0.5)) == ""
+    assert _budget_stop_reason(metrics(new_urls=10, coverage_gain=small_gain)) == ""
+    # The first loops always get a chance to find something
+    assert _budget_stop_reason(metrics(loop=1, new_urls=0, coverage_gain=0.0)) == ""
+
+
+class FakeReflectionLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def with_structured_output(self, schema):
+        return self
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        return SimpleNamespace(
+            is_sufficient=False,
+            feedback="more",
+            coverage_summary="merged summary",
+            model_dump=lambda: {"is_sufficient": False}
+        )
+
+
+def test_reflection_only_sends_results_added_since_the_last_loop(monkeypatch):
+    llm = FakeReflectionLLM()
+    monkeypatch.setattr(deep_research.llm_service, "get_llm", lambda **kwargs: llm)
+    monkeypatch.setattr(deep_research.llm_logger, "log_call", lambda **kwargs: None)
+    state = {
+        "topic": "vector search",
+        "research_loop_count": 1,
+        "research_started_at": time.time(),
+        "coverage_summary": "earlier coverage",
+        "reflected_results_count": 2,
+        "deep_research_results": [
+            ResearchResult(query="old one", summary="old finding one", citations=[]),
+            ResearchResult(query="old two", summary="old finding two", citations=[]),
+            ResearchResult(query="new", summary="new finding", citations=[]),
+        ],
+    }
+
+    update = asyncio.run(deep_research.reflection_node(state))
+
+    prompt = llm.prompts[0]
+    assert "earlier coverage" in prompt and "new finding" in prompt
+    assert "old finding" not in prompt
+    assert update["reflected_results_count"] == 3
+    assert update["coverage_summary"] == "merged summary"
+
+
+def test_dedupe_queries_skips_repeats_of_history_and_of_the_batch(monkeypatch):
+    vectors = {
+        "rag latency": [1.0, 0.0, 0.0],
+        "RAG latency tips": [0.99, 0.1, 0.0],
+        "rag pricing": [0.0, 1.0, 0.0],
+        "rag cost": [0.05, 0.99, 0.0],
+        "rag security": [0.0, 0.0, 1.0],
+    }
+    monkeypatch.setattr(deep_research.embedding_service, "embed_documents", lambda texts: [vectors[t] for t in texts])
+    executed = [{"query": "rag latency", "embedding": vectors["rag latency"]}]
+
+    kept, skipped = asyncio.run(deep_research._dedupe_queries(
+        ["RAG latency tips", "rag pricing", " rag cost ", "", "rag security"], executed, threshold=0.9
+    ))
+
+    assert [k["query"] for k in kept] == ["rag pricing", "rag security"]
+    assert kept[0]["embedding"] == vectors["rag pricing"]
+    assert skipped == ["RAG latency tips", "rag cost"]
@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+
+import pytest
+
+from app.services import embedding_service as module
+from app.services.embedding_service import EmbeddingService
+
+
+class FakeProvider:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 0.5] for t in texts]
+
+
+class FakeTable:
+    """embedding_cache rows behind a postgres_service-like get_cursor()."""
+
+    def __init__(self):
+        self.rows = {}
+        self.connection_pool = object()
+        self._result = []
+
+    @contextmanager
+    def get_cursor(self):
+        yield self
+
+    def execute(self, sql, params):
+        self._result = [(key, self.rows[key]) for key in params[0] if key in self.rows]
+
+    def fetchall(self):
+        return self._result
+
+
+@pytest.fixture
+def table(monkeypatch):
+    table = FakeTable()
+    monkeypatch.setattr(module, "postgres_service", table)
+    monkeypatch.setattr(module.settings, "EMBEDDING_CACHE_PERSIST", True)
+    monkeypatch.setattr(
+        module, "execute_values",
+        lambda cur, sql, rows: table.rows.update({key: vector for key, _, vector in rows})
+    )
+    return table
+
+
+def service_with(provider):
+    service = EmbeddingService()
+    service.embeddings = provider
+    return service
+
+
+def test_repeated_texts_are_embedded_once_and_then_served_from_memory(table):
+    provider = FakeProvider()
+    service = service_with(provider)
+
+    first = service.embed_documents(["hello  world", "hello world", "other"])
+    second = service.embed_query("hello world ")
+
+    assert provider.calls == [["hello world", "other"]]
+    assert first[0] == first[1] == second == [11.0, 0.5]
+
+
+def test_a_fresh_process_reads_vectors_from_the_persistent_tier(table):
+    service_with(FakeProvider()).embed_documents(["cached text"])
+    provider = FakeProvider()
+
+    vectors = service_with(provider).embed_documents(["cached text", "new text"])
+
+    assert provider.calls == [["new text"]]
+    assert vectors[0] == [11.0, 0.5]
+    assert len(table.rows) == 2
+
+
+def test_vectors_are_keyed_by_model(table):
+    service = service_with(FakeProvider())
+    service.embed_documents(["same text"])
+
+    other = service_with(FakeProvider())
+    other.model_name = "another-model"
+    other.embed_documents(["same text"])
+
+    assert other.embeddings.calls == [["same text"]]
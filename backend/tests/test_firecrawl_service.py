@@ -0,0 +1,48 @@
+import asyncio
+
+from app.services.firecrawl_service import FirecrawlService
+
+RESULTS = [
+    {"url": "https://www.example.com/seen/?utm_source=feed", "title": "Vector databases compared", "description": "vector databases"},
+    {"url": "https://example.com/off-topic", "title": "Cooking pasta", "description": "recipes"},
+    {"url": "https://example.com/best", "title": "Vector databases in production", "description": "vector databases compared"},
+    {"url": "https://example.com/good", "title": "Choosing databases", "description": "vector search"},
+]
+
+
+def make_service(monkeypatch):
+    service = FirecrawlService()
+    scraped = []
+
+    async def scrape_markdown(url):
+        scraped.append(url)
+        return f"# {url}"
+
+    monkeypatch.setattr(service, "search", lambda query, limit, scrape: {"web": [dict(r) for r in RESULTS]})
+    monkeypatch.setattr(service, "_scrape_markdown", scrape_markdown)
+    return service, scraped
+
+
+def test_only_the_most_relevant_unseen_results_are_scraped(monkeypatch):
+    service, scraped = make_service(monkeypatch)
+    seen = {"https://example.com/seen"}
+
+    result = asyncio.run(service.asearch("vector databases", limit=4, scrape_top=2, seen_urls=seen))
+
+    assert scraped == ["https://example.com/best", "https://example.com/good"]
+    assert [bool(i.get("markdown")) for i in result["web"]] == [False, False, True, True]
+    assert seen == {"https://example.com/seen", "https://example.com/best", "https://example.com/good"}
+    assert result["stats"]["results"] == 4 and result["stats"]["scraped"] == 2
+
+
+def test_pages_claimed_by_an_earlier_search_are_not_scraped_again(monkeypatch):
+    service, scraped = make_service(monkeypatch)
+    seen = set()
+
+    async def main():
+        await service.asearch("vector databases", limit=4, scrape_top=1, seen_urls=seen)
+        await service.asearch("vector databases", limit=4, scrape_top=1, seen_urls=seen)
+
+    asyncio.run(main())
+
+    assert len(scraped) == len(set(scraped)) == 2
@@ -0,0 +1,32 @@
+from app.services.keyphrase_service import KeyphraseService
+
+
+def test_topic_specific_phrases_outrank_generic_ones():
+    service = KeyphraseService()
+    phrases = service.extract({"topic": "The complete guide to vector database indexing with HNSW"})
+
+    assert phrases[0] in {"vector database indexing", "hnsw"}
+    assert "complete guide" not in phrases[:2]
+
+
+def test_generates_audience_aware_queries_without_duplicates():
+    service = KeyphraseService()
+    queries = service.generate_queries(
+        "Rust vs Go for backend services",
+        guidelines=["Include performance statistics"],
+        audience="Backend engineers",
+    )
+
+    assert 3 <= len(queries) <= 4
+    assert queries[0] == "rust vs go for backend services"
+    assert any(q.endswith("statistics") for q in queries)
+    assert any(q.endswith("implementation details") for q in queries)
+    assert len(set(queries)) == len(queries)
+
+
+def test_excluded_queries_are_not_repeated():
+    service = KeyphraseService()
+    first = service.generate_queries("Serverless cold starts", num_queries=3)
+    second = service.generate_queries("Serverless cold starts", num_queries=3, exclude=first)
+
+    assert not set(first) & set(second)
@@ -0,0 +1,68 @@
+import time
+
+from app.services.local_search_index import LocalSearchIndex, fts_query
+
+DOCS = [
+    {"url": "https://example.com/mamba", "title": "Mamba state space models",
+     "content": "Mamba is a selective state space model with linear time inference."},
+    {"url": "https://example.com/attention", "title": "Attention is all you need",
+     "content": "Transformers use self-attention, which is quadratic in sequence length."},
+    {"url": "https://example.com/cooking", "title": "Sourdough basics",
+     "content": "Feed the starter daily and bake at a high temperature."},
+]
+
+
+def make_index(tmp_path):
+    index = LocalSearchIndex(str(tmp_path / "index.db"), max_content_chars=40)
+    index.upsert_documents(DOCS)
+    return index
+
+
+def test_search_returns_firecrawl_shaped_results_ranked_by_relevance(tmp_path):
+    index = make_index(tmp_path)
+    results = index.search("state space models vs transformers", limit=5)
+
+    assert [r["url"] for r in results][:2] == ["https://example.com/mamba", "https://example.com/attention"]
+    assert "https://example.com/cooking" not in [r["url"] for r in results]
+    first = results[0]
+    assert first["title"] == "Mamba state space models"
+    assert first["markdown"] == DOCS[0]["content"][:40]
+    assert "state space" in first["description"]
+
+
+def test_reimport_only_rewrites_changed_documents(tmp_path):
+    index = make_index(tmp_path)
+    changed = dict(DOCS[2], content="Sourdough needs patience and a hot oven.")
+
+    stats = index.upsert_documents([DOCS[0], DOCS[1], changed])
+
+    assert stats == {"added": 0, "updated": 1, "unchanged": 2}
+    assert index.search("oven")[0]["url"] == "https://example.com/cooking"
+    assert index.search("starter") == []
+
+
+def test_prune_removes_documents_missing_from_the_import(tmp_path):
+    index = make_index(tmp_path)
+
+    assert index.remove_missing([DOCS[0]["url"]]) == 2
+    assert index.count() == 1
+    assert index.search("transformers") == []
+
+
+def test_operators_and_site_filters_are_neutralised():
+    assert fts_query('mamba OR "ssm" site:reddit.com NOT') == '"mamba" OR "ssm"'
+    assert fts_query("site:x.com") == ""
+
+
+def test_queries_are_fast(tmp_path):
+    index = LocalSearchIndex(str(tmp_path / "big.db"))
+    index.upsert_documents(
+        {"url": f"https://example.com/{i}", "title": f"Document {i}", "content": f"topic{i % 50} body text " * 40}
+        for i in range(2000)
+    )
+    index.search("topic7 body")
+
+    started = time.perf_counter()
+    for _ in range(20):
+        index.search("topic7 body text")
+    assert (time.perf_counter() - started) / 20 < 0.05
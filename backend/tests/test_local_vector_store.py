@@ -0,0 +1,101 @@
+import numpy as np
+
+from app.services.local_vector_store import LocalVectorStore
+from app.services.vector_store import matches_filter
+
+
+def vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def test_query_returns_exact_top_k_with_metadata(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    data = vectors(50)
+    store.upsert_vectors([(f"v{i}", data[i], {"doc_id": f"d{i % 5}", "text": f"chunk {i}"}) for i in range(50)], "ns")
+
+    matches = store.query_vectors(data[7], namespace="ns", top_k=3)["matches"]
+
+    assert matches[0]["id"] == "v7"
+    assert abs(matches[0]["score"] - 1.0) < 1e-5
+    assert matches[0]["metadata"] == {"doc_id": "d2", "text": "chunk 7"}
+    assert [m["score"] for m in matches] == sorted((m["score"] for m in matches), reverse=True)
+    assert len(matches) == 3
+
+
+def test_persists_and_reloads_from_disk(tmp_path):
+    data = vectors(10)
+    LocalVectorStore(str(tmp_path)).upsert_vectors([(f"v{i}", data[i], {}) for i in range(10)], "ns")
+
+    reopened = LocalVectorStore(str(tmp_path))
+    assert reopened.count("ns") == 10
+    assert reopened.query_vectors(data[3], namespace="ns", top_k=1)["matches"][0]["id"] == "v3"
+
+
+def test_upsert_overwrites_existing_ids(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    data = vectors(3)
+    store.upsert_vectors([("a", data[0], {"v": 1}), ("b", data[1], {"v": 1})], "ns")
+    store.upsert_vectors([("a", data[2], {"v": 2})], "ns")
+
+    assert store.count("ns") == 2
+    top = store.query_vectors(data[2], namespace="ns", top_k=1)["matches"][0]
+    assert top["id"] == "a" and top["metadata"] == {"v": 2}
+
+
+def test_delete_by_filter_ids_and_namespace(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    data = vectors(6)
+    store.upsert_vectors([(f"v{i}", data[i], {"doc_id": "keep" if i < 3 else "drop"}) for i in range(6)], "ns")
+
+    store.delete_vectors(namespace="ns", filter={"doc_id": "drop"})
+    assert store.count("ns") == 3
+    store.delete_vectors(namespace="ns", ids=["v0"])
+    assert {m["id"] for m in store.query_vectors(data[0], namespace="ns", top_k=10)["matches"]} == {"v1", "v2"}
+
+    store.delete_namespace("ns")
+    assert store.count("ns") == 0
+    assert store.query_vectors(data[0], namespace="ns")["matches"] == []
+
+
+def test_query_filter_and_multi_namespace_query(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    data = vectors(4)
+    store.upsert_vectors([("a", data[0], {"doc_id": "x"}), ("b", data[1], {"doc_id": "y"})], "bin1")
+    store.upsert_vectors([("c", data[2], {"doc_id": "x"})], "bin2")
+
+    filtered = store.query_vectors(data[1], namespace="bin1", top_k=5, filter={"doc_id": {"$eq": "x"}})["matches"]
+    assert [m["id"] for m in filtered] == ["a"]
+
+    merged = store.query_namespaces(data[2], ["bin1", "bin2", "missing"], top_k=2)["matches"]
+    assert merged[0]["id"] == "c" and merged[0]["namespace"] == "bin2"
+    assert len(merged) == 2
+
+
+def test_matches_filter_operators():
+    meta = {"doc_id": "a", "page": 2}
+    assert matches_filter(meta, None)
+    assert matches_filter(meta, {"doc_id": "a", "page": {"$in": [1, 2]}})
+    assert not matches_filter(meta, {"doc_id": {"$ne": "a"}})
+    assert not matches_filter(meta, {"page": {"$nin": [2]}})
+
+
+def test_queries_do_not_wait_for_a_write_in_progress(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    data = vectors(4)
+    store.upsert_vectors([(f"v{i}", data[i], {}) for i in range(4)], "ns")
+
+    # Held by a writer for the whole rewrite of the namespace files
+    with store._write_lock:
+        assert store.query_vectors(data[1], namespace="ns", top_k=1)["matches"][0]["id"] == "v1"
+        assert LocalVectorStore(str(tmp_path)).count("ns") == 4
+
+
+def test_rewrites_leave_a_single_matrix_file(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    data = vectors(3)
+    for i in range(3):
+        store.upsert_vectors([(f"v{i}", data[i], {})], "ns")
+
+    files = sorted(p.name for p in (tmp_path / "ns").iterdir())
+    assert len(files) == 2 and files[0] == "records.json" and files[1].startswith("vectors-")
+    assert LocalVectorStore(str(tmp_path)).count("ns") == 3
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from app.services import page_cache_service as module
+from app.services.page_cache_service import PageCacheService
+
+
+class Fetcher:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    async def __call__(self, url, headers):
+        self.calls.append(headers)
+        return self.responses.pop(0)
+
+
+def page(markdown, etag=None):
+    return {"url": "https://example.com/a", "title": "A", "markdown": markdown, "etag": etag, "last_modified": None}
+
+
+@pytest.fixture(autouse=True)
+def memory_only(monkeypatch):
+    monkeypatch.setattr(module.settings, "PAGE_CACHE_PERSIST", False)
+
+
+def expire(cache):
+    for entry in cache._memory.values():
+        entry["fetched_at"] -= cache.ttl_seconds + 1
+
+
+def test_fresh_pages_are_served_from_cache_by_canonical_url():
+    cache = PageCacheService(ttl_seconds=60)
+    fetch = Fetcher(page("v1"))
+
+    async def main():
+        await cache.get("https://example.com/a", fetch)
+        return await cache.get("https://www.example.com/a/?utm_source=x", fetch)
+
+    assert asyncio.run(main())["markdown"] == "v1"
+    assert fetch.calls == [None]
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+
+def test_expired_pages_with_an_etag_are_revalidated():
+    cache = PageCacheService(ttl_seconds=60)
+    fetch = Fetcher(page("v1", etag='"abc"'), {"status_code": 304}, page("v2", etag='"def"'))
+
+    async def main():
+        await cache.get("https://example.com/a", fetch)
+        expire(cache)
+        unchanged = await cache.get("https://example.com/a", fetch)
+        expire(cache)
+        changed = await cache.get("https://example.com/a", fetch)
+        return unchanged, changed
+
+    unchanged, changed = asyncio.run(main())
+
+    assert fetch.calls[1] == {"If-None-Match": '"abc"'}
+    assert unchanged["markdown"] == "v1"
+    assert changed["markdown"] == "v2" and changed["etag"] == '"def"'
+    assert cache.stats["revalidated"] == 1 and cache.stats["refetched"] == 1
+
+
+def test_stale_copy_is_kept_when_a_refetch_fails():
+    cache = PageCacheService(ttl_seconds=60)
+    fetch = Fetcher(page("v1"), None)
+
+    async def main():
+        await cache.get("https://example.com/a", fetch)
+        expire(cache)
+        return await cache.get("https://example.com/a", fetch)
+
+    assert asyncio.run(main())["markdown"] == "v1"
+    # Without validators the page is fetched unconditionally
+    assert fetch.calls == [None, None]
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.page_extractor import PageExtractor, MainContentParser
+
+ARTICLE_PAGE = """
+<html>
+<head><title>State Space Models Explained</title><script>var tracking = 1;</script></head>
+<body>
+  <nav><a href="/">Home</a> <a href="/blog">Blog</a></nav>
+  <header>Subscribe to our newsletter</header>
+  <main>
+    <article>
+      <h1>State Space Models</h1>
+      <p>Mamba is a <a href="/mamba">selective state space model</a> that scales linearly with sequence length.</p>
+      <h2>Why it matters</h2>
+      <ul><li>Linear time inference</li><li>Long context</li></ul>
+      <p>%s</p>
+    </article>
+  </main>
+  <footer>Copyright 2025</footer>
+</body>
+</html>
+""" % ("Transformers pay quadratic attention cost. " * 20)
+
+LONG_PAGE = "<html><body><article>" + "<p>%s</p>" % ("word " * 50) * 2000 + "</article></body></html>"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/article":
+            self._send(ARTICLE_PAGE.encode(), "text/html; charset=utf-8")
+        elif self.path == "/long":
+            self._send(LONG_PAGE.encode(), "text/html")
+        elif self.path == "/data.json":
+            self._send(b'{"a": 1}', "application/json")
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def fixture_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def run(coro_factory):
+    async def _run():
+        extractor = PageExtractor(max_chars=500)
+        try:
+            return await coro_factory(extractor)
+        finally:
+            await extractor.aclose()
+    return asyncio.run(_run())
+
+
+def test_extracts_main_content_as_markdown(fixture_server):
+    page = run(lambda ex: ex.extract(f"{fixture_server}/article"))
+
+    assert page["title"] == "State Space Models Explained"
+    assert page["etag"] == '"v1"'
+    md = page["markdown"]
+    assert md.startswith("# State Space Models")
+    assert "## Why it matters" in md
+    assert "- Linear time inference" in md
+    assert f"[selective state space model]({fixture_server}/mamba)" in md
+    assert "Subscribe" not in md
+    assert "Copyright" not in md
+    assert "tracking" not in md
+    assert len(md) <= 500
+
+
+def test_stops_reading_once_enough_text_is_captured(fixture_server):
+    page = run(lambda ex: ex.extract(f"{fixture_server}/long"))
+
+    assert len(page["markdown"]) == 500
+    assert page["bytes"] < len(LONG_PAGE)
+
+
+def test_non_html_and_missing_pages_are_skipped(fixture_server):
+    pages = run(lambda ex: ex.extract_many([f"{fixture_server}/data.json", f"{fixture_server}/missing"]))
+
+    assert pages == [None, None]
+
+
+def test_enrich_results_fills_url_only_items(fixture_server):
+    items = [
+        {"url": f"{fixture_server}/article", "title": "From search"},
+        {"url": f"{fixture_server}/missing", "description": "snippet"},
+        {"url": f"{fixture_server}/long", "markdown": "already scraped"},
+    ]
+    enriched = run(lambda ex: ex.enrich_results(items))
+
+    assert enriched[0]["title"] == "From search"
+    assert enriched[0]["markdown"].startswith("# State Space Models")
+    assert "markdown" not in enriched[1]
+    assert enriched[2]["markdown"] == "already scraped"
+
+
+def test_parser_falls_back_to_body_without_main_container():
+    parser = MainContentParser(max_chars=1000)
+    parser.feed("<body><nav>Menu</nav><div><p>Plain page body text.</p></div></body>")
+    parser.close()
+
+    assert parser.markdown == "Plain page body text."
@@ -0,0 +1,58 @@
+import asyncio
+
+from app.agent.nodes import planner
+from app.services import research_index_service as index_module
+
+TOPICS = ["pricing", "security", "latency"]
+
+
+def keyword_embeddings(texts):
+    return [[float(topic in text.lower()) + 0.01 for topic in TOPICS] for text in texts]
+
+
+def test_research_digest_lists_each_cluster_with_its_key_source(monkeypatch):
+    monkeypatch.setattr(index_module.embedding_service, "embed_documents", keyword_embeddings)
+    monkeypatch.setattr(planner.settings, "PLANNER_DIGEST_CLUSTERS", 2)
+    monkeypatch.setattr(planner.settings, "PLANNER_DIGEST_TITLES_PER_CLUSTER", 1)
+    research = [
+        {"source_id": "web_1", "title": "Pricing tiers", "content": "pricing plans"},
+        {"source_id": "web_2", "title": "Pricing calculator", "content": "pricing pricing"},
+        {"source_id": "web_3", "title": "Pricing changes", "content": "pricing news"},
+        {"source_id": "web_4", "title": "Security audit", "content": "security findings"},
+    ]
+
+    digest = asyncio.run(planner.build_research_digest(research))
+
+    clusters = digest.split("Cluster ")[1:]
+    assert len(clusters) == 2
+    # Largest cluster first; every source is listed under exactly one cluster
+    assert clusters[0].startswith("1 (3 sources)")
+    assert "Source IDs: web_4" in clusters[1]
+    assert all(digest.count(f"web_{i}") >= 1 for i in range(1, 5))
+    # Only one other title per cluster besides its key source
+    assert clusters[0].count("  - web_") == 1
+
+
+def test_timeout_fallback_outlines_the_gathered_research(monkeypatch):
+    monkeypatch.setattr(index_module.embedding_service, "embed_documents", keyword_embeddings)
+    monkeypatch.setattr(index_module.embedding_service, "embed_query", lambda text: keyword_embeddings([text])[0])
+    research = [
+        {"source_id": "web_1", "title": "Pricing tiers", "content": "pricing plans"},
+        {"source_id": "web_2", "title": "Pricing calculator", "content": "pricing pricing"},
+        {"source_id": "web_3", "title": "Security audit", "content": "security findings"},
+    ]
+
+    result = asyncio.run(planner.planner_timeout_fallback({"blog_size": "medium", "research_data": research}, {}))
+
+    outline = result["outline"]
+    assert [s["title"] for s in outline] == ["Introduction", "Pricing tiers", "Security audit", "Conclusion"]
+    assert [s["id"] for s in outline] == ["sec_1", "sec_2", "sec_3", "sec_4"]
+    assert outline[1]["source_ids"] == ["web_1", "web_2"]
+    assert all(s["source_ids"] for s in outline)
+    assert set(result["section_word_budgets"]) == {"sec_1", "sec_2", "sec_3", "sec_4"}
+
+
+def test_timeout_fallback_without_research_uses_the_generic_outline():
+    result = asyncio.run(planner.planner_timeout_fallback({"blog_size": "small", "research_data": []}, {}))
+
+    assert [s["title"] for s in result["outline"]] == [s["title"] for s in planner.FALLBACK_OUTLINE]
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from app.services import research_index_service as module
+from app.services.research_index_service import ResearchIndexService
+
+VOCAB = ["pricing", "security", "latency", "hiring"]
+
+
+class KeywordEmbeddings:
+    """One dimension per vocabulary word, so similarity follows shared keywords."""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(word in text.lower()) + 0.01 for word in VOCAB] for text in texts]
+
+
+@pytest.fixture
+def embeddings(monkeypatch):
+    fake = KeywordEmbeddings()
+    monkeypatch.setattr(module, "embedding_service", fake)
+    return fake
+
+
+RESEARCH = [
+    {"source_id": "web_1", "title": "Pricing tiers", "content": "pricing pricing"},
+    {"source_id": "web_2", "title": "Security audit", "content": "security"},
+    {"source_id": "web_3", "title": "Latency budget", "content": "latency"},
+    {"title": "no id", "content": "pricing"},
+]
+SECTIONS = [
+    {"id": "s1", "title": "Security", "intent": "security review"},
+    {"id": "s2", "title": "Cost", "intent": "pricing model"},
+]
+
+
+def test_rank_for_sections_suggests_the_most_similar_sources(embeddings):
+    ranked = asyncio.run(ResearchIndexService().rank_for_sections(RESEARCH, SECTIONS, top_k=1))
+
+    assert ranked == {"s1": ["web_2"], "s2": ["web_1"]}
+
+
+def test_embeddings_are_cached_across_rankings(embeddings):
+    service = ResearchIndexService()
+
+    asyncio.run(service.rank_for_sections(RESEARCH, SECTIONS, top_k=2))
+    asyncio.run(service.rank_for_sections(RESEARCH, SECTIONS, top_k=2))
+
+    # Items without a source_id are never embedded; the second run embeds nothing
+    assert len(embeddings.calls) == 2
+    assert sum(map(len, embeddings.calls)) == 3 + 2
+
+
+def test_no_research_gives_every_section_an_empty_list(embeddings):
+    ranked = asyncio.run(ResearchIndexService().rank_for_sections([], SECTIONS))
+
+    assert ranked == {"s1": [], "s2": []}
+    assert embeddings.calls == []
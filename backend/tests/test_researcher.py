@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from app.agent.nodes import researcher
+
+
+class FakeSearch:
+    """Firecrawl stand-in: queries containing "slow" never answer in time."""
+
+    async def asearch(self, query, limit=3, seen_urls=None):
+        if "slow" in query:
+            await asyncio.sleep(5)
+        return {"web": [{"url": f"https://example.com/{query[:6]}", "title": query, "markdown": "page text"}], "stats": {}}
+
+
+class FakeArxiv:
+    async def search(self, query, limit=3):
+        return [{"title": "Paper", "url": "https://arxiv.org/abs/1", "summary": "abstract", "authors": ["A"], "published": "2024"}]
+
+
+class FakeQueryLLM:
+    """Query generation stand-in that always returns the given queries."""
+
+    def __init__(self, queries):
+        self.queries = queries
+
+    def with_structured_output(self, schema):
+        return RunnableLambda(lambda _: schema(queries=self.queries))
+
+
+def use_queries(monkeypatch, queries):
+    monkeypatch.setattr(researcher.llm_service, "get_llm", lambda **kwargs: FakeQueryLLM(queries))
+
+
+@pytest.fixture(autouse=True)
+def fakes(monkeypatch):
+    monkeypatch.setattr(researcher, "firecrawl_service", FakeSearch())
+    monkeypatch.setattr(researcher, "arxiv_service", FakeArxiv())
+    monkeypatch.setattr(researcher.settings, "RESEARCH_SOURCE_DEADLINES", {"web": 0.2, "social": 0.2, "academic": 1.0, "internal": 1.0})
+
+
+def test_sources_that_miss_their_deadline_are_skipped(monkeypatch):
+    use_queries(monkeypatch, ["slow one", "fast one"])
+    state = {"topic": "topic", "research_sources": ["web", "social", "academic"], "extra_context": "notes"}
+
+    result = asyncio.run(researcher.researcher_node(state))
+
+    # The fast web query and academic search land; the slow query and social search are cut off
+    assert [r["source_id"] for r in result["research_data"]] == ["user_context", "web_1", "acad_1"]
+    assert result["research_data"][1]["title"] == "fast one"
+    assert sorted(result["research_timeouts"]) == ["social", "web:slow one"]
+
+
+def test_all_queries_run_concurrently(monkeypatch):
+    use_queries(monkeypatch, [f"query {i}" for i in range(5)])
+    monkeypatch.setattr(researcher.settings, "RESEARCH_SOURCE_DEADLINES", {"web": 1.0})
+    in_flight, peak = [0], [0]
+
+    class Tracking(FakeSearch):
+        async def asearch(self, query, limit=3, seen_urls=None):
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+            await asyncio.sleep(0.05)
+            in_flight[0] -= 1
+            return await super().asearch(query)
+
+    monkeypatch.setattr(researcher, "firecrawl_service", Tracking())
+    state = {"topic": "topic", "research_sources": ["web"]}
+
+    result = asyncio.run(researcher.researcher_node(state))
+
+    assert peak[0] == 5
+    assert len(result["research_data"]) == 5
+    assert result["research_timeouts"] == []
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from app.services import retrieval_service as module
+from app.services.local_vector_store import LocalVectorStore
+from app.services.retrieval_service import RetrievalService
+
+QUERIES = {"engines": [1.0, 0.0, 0.0], "fuel": [0.8, 0.6, 0.0], "tyres": [0.0, 0.0, 1.0]}
+CHUNKS = [
+    ("a1", [1.0, 0.0, 0.0], "doc_a"),
+    ("a2", [0.99, 0.05, 0.0], "doc_a"),
+    ("b1", [0.8, 0.6, 0.0], "doc_b"),
+    ("c1", [0.0, 1.0, 0.0], "doc_c"),
+]
+
+
+@pytest.fixture
+def embed_calls(tmp_path, monkeypatch):
+    store = LocalVectorStore(str(tmp_path))
+    store.upsert_vectors([(cid, vec, {"doc_id": doc, "text": cid}) for cid, vec, doc in CHUNKS], "u_bin1")
+    calls = []
+
+    def embed_documents(texts):
+        calls.append(list(texts))
+        return [QUERIES[t] for t in texts]
+
+    monkeypatch.setattr(module, "vector_store", store)
+    monkeypatch.setattr(module.embedding_service, "embed_documents", embed_documents)
+    monkeypatch.setattr(module.namespace_version_service, "get", lambda namespaces: {ns: 0 for ns in namespaces})
+    return calls
+
+
+def ids(hits):
+    return [h["id"] for h in hits]
+
+
+def test_search_merges_queries_into_one_ranked_list(embed_calls):
+    hits = asyncio.run(RetrievalService().search(["engines", "fuel"], "u", ["bin1"], top_k=2))
+
+    # a2 is found by both queries and kept once, with its best score
+    assert ids(hits) == ["a1", "b1", "a2"]
+    assert hits[1]["score"] == pytest.approx(1.0)
+    assert embed_calls == [["engines", "fuel"]]
+    assert all("values" not in h for h in hits)
+
+
+def test_search_each_keeps_results_per_query(embed_calls):
+    per_query = asyncio.run(RetrievalService().search_each(["engines", "", "tyres"], "u", ["bin1"], top_k=1))
+
+    assert [ids(hits) for hits in per_query] == [["a1"], [], ["a1"]]
+    assert embed_calls == [["engines", "tyres"]]
+
+
+def test_over_fetched_candidates_are_diversified_and_capped_per_document(embed_calls):
+    plain = asyncio.run(RetrievalService().search(["engines"], "u", ["bin1"], top_k=2))
+    diverse = asyncio.run(RetrievalService(fetch_multiplier=2, max_per_doc=1).search(["engines"], "u", ["bin1"], top_k=2))
+
+    assert ids(plain) == ["a1", "a2"]
+    assert ids(diverse) == ["a1", "b1"]
+
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from app.agent.nodes import section_retrieval
+from app.services.context_pack_service import ContextPackService, section_fingerprint
+
+OUTLINE = [
+    {"id": "s1", "title": "Setup", "intent": "install it", "source_ids": ["web_1"]},
+    {"id": "s2", "title": "Tuning", "intent": "make it fast", "source_ids": []},
+    {"id": "s3", "title": "Limits", "intent": "known issues", "source_ids": []},
+]
+
+
+def hit(text):
+    return {"id": text, "score": 0.9, "bin_id": "bin1", "metadata": {"text": text, "source": "manual.pdf"}}
+
+
+@pytest.fixture
+def searched(monkeypatch):
+    queries = []
+
+    async def search_each(texts, user_id, bin_ids, top_k=3):
+        queries.extend(texts)
+        return [[hit(f"found for {t}")] for t in texts]
+
+    monkeypatch.setattr(section_retrieval.retrieval_service, "search_each", search_each)
+    return queries
+
+
+def test_fingerprint_ignores_the_sections_own_targeted_chunks():
+    section = OUTLINE[0]
+    with_chunks = {**section, "source_ids": section["source_ids"] + ["int_s1_1"]}
+
+    assert section_fingerprint(with_chunks, 500) == section_fingerprint(section, 500)
+    assert section_fingerprint({**section, "intent": "edited"}, 500) != section_fingerprint(section, 500)
+    assert section_fingerprint(section, 600) != section_fingerprint(section, 500)
+
+
+def test_finished_packs_are_reused_and_the_rest_searched_in_one_call(monkeypatch, searched):
+    packs = ContextPackService()
+    monkeypatch.setattr(section_retrieval, "context_pack_service", packs)
+    state = {
+        "outline": OUTLINE,
+        "selected_bins": ["bin1"],
+        "research_sources": ["internal"],
+        "user_id": "u",
+        # s3 already has its targeted chunks
+        "research_data": [{"source_id": "web_1"}, {"source_id": "int_s3_1", "source": "internal"}],
+    }
+
+    async def built_pack(state, section, internal_batch=None):
+        return {"internal_chunks": [{"source_id": "int_s1_1", "source": "internal", "content": "from pack"}]}
+
+    async def no_batch(state, sections):
+        return {}
+
+    async def main():
+        monkeypatch.setattr(packs, "build_pack", built_pack)
+        monkeypatch.setattr(packs, "_search_sections", no_batch)
+        packs.precompute("thread", {**state, "outline": OUTLINE[:1]})
+        await packs.get_pack("thread", state, OUTLINE[0])
+        return await section_retrieval.section_retrieval_node(state, {"configurable": {"thread_id": "thread"}})
+
+    update = asyncio.run(main())
+
+    assert searched == ["Tuning: make it fast"]
+    source_ids = {s["id"]: s["source_ids"] for s in update["outline"]}
+    assert source_ids == {"s1": ["web_1", "int_s1_1"], "s2": ["int_s2_1"], "s3": []}
+    assert [r["source_id"] for r in update["research_data"]] == ["web_1", "int_s3_1", "int_s1_1", "int_s2_1"]
+
+
+def test_a_timed_out_writer_does_not_cancel_the_shared_pack(monkeypatch):
+    packs = ContextPackService()
+    builds = []
+
+    async def slow_pack(state, section, internal_batch=None):
+        builds.append(section["id"])
+        await asyncio.sleep(0.1)
+        return {"internal_chunks": [], "section": section["id"]}
+
+    monkeypatch.setattr(packs, "build_pack", slow_pack)
+    state = {"outline": OUTLINE[:1]}
+
+    async def main():
+        packs.precompute("thread", state)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(packs.get_pack("thread", state, OUTLINE[0]), timeout=0.01)
+        return await packs.get_pack("thread", state, OUTLINE[0])
+
+    assert asyncio.run(main()) == {"internal_chunks": [], "section": "s1"}
+    assert builds == ["s1"]
+
+
+def test_cancelled_packs_are_rebuilt(monkeypatch):
+    packs = ContextPackService()
+
+    async def pack(state, section, internal_batch=None):
+        return {"section": section["id"]}
+
+    monkeypatch.setattr(packs, "build_pack", pack)
+    state = {"outline": OUTLINE[:1]}
+
+    async def main():
+        packs.precompute("thread", state)
+        packs._packs["thread"]["s1"][1].cancel()
+        await asyncio.sleep(0)
+        return await packs.get_pack("thread", state, OUTLINE[0])
+
+    assert asyncio.run(main()) == {"section": "s1"}
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.utils.singleflight import SingleFlight, ThreadSingleFlight, singleflight_stats
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight("test_share")
+    calls = []
+
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return {"key": key}
+
+    async def main():
+        return await asyncio.gather(
+            flight.do("a", lambda: fetch("a")),
+            flight.do("a", lambda: fetch("a")),
+            flight.do("b", lambda: fetch("b")),
+        )
+
+    first, second, other = asyncio.run(main())
+
+    assert calls == ["a", "b"]
+    assert first is second
+    assert other == {"key": "b"}
+    assert singleflight_stats()["test_share"] == {"calls": 2, "coalesced": 1}
+
+
+def test_key_is_released_after_completion_and_errors_reach_all_callers():
+    flight = SingleFlight("test_errors")
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        results = await asyncio.gather(
+            flight.do("k", failing), flight.do("k", failing), return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        with pytest.raises(RuntimeError):
+            await flight.do("k", failing)
+
+    asyncio.run(main())
+
+    assert len(attempts) == 2
+
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    flight = SingleFlight("test_cancel")
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        impatient = asyncio.create_task(flight.do("k", slow))
+        patient = asyncio.create_task(flight.do("k", slow))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        return await patient
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_thread_flight_lets_one_thread_own_each_key():
+    flight = ThreadSingleFlight("test_threads")
+    owned, waiting = flight.claim(["x", "y"])
+    other_owned, other_waiting = flight.claim(["y", "z"])
+
+    assert owned == ["x", "y"]
+    assert other_owned == ["z"]
+    assert set(other_waiting) == {"y"}
+
+    released = threading.Timer(0.01, flight.release, args=[owned])
+    released.start()
+    assert other_waiting["y"].wait(timeout=1)
+    flight.release(other_owned)
+
+    assert flight.claim(["y"])[0] == ["y"]
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from app.services import source_quality_service as module
+from app.services.source_quality_service import SourceQualityService, estimate_tokens, rejection_reason
+
+
+class NoIndex:
+    """Similarity scoring unavailable: every item gets the neutral 0.5."""
+
+    async def build_index(self, research):
+        return []
+
+
+@pytest.fixture(autouse=True)
+def no_similarity(monkeypatch):
+    monkeypatch.setattr(module, "research_index_service", NoIndex())
+
+
+def item(source_id, source, chars, url="https://example.com/page"):
+    return {"source_id": source_id, "source": source, "title": source_id, "url": url, "content": "Useful research prose. " * (chars // 23)}
+
+
+def prune(research, budget, quotas):
+    return asyncio.run(SourceQualityService().prune(research, "topic", token_budget=budget, quotas=quotas))
+
+
+def test_rejects_empty_and_placeholder_snippets():
+    assert rejection_reason({"title": "x", "content": "  "}) == "empty content"
+    assert rejection_reason({"title": "No Title", "content": "short"}) == "snippet too small"
+    assert rejection_reason(item("web_1", "web", 400)) is None
+
+
+def test_each_source_type_stays_within_its_quota_first():
+    web = [item(f"web_{i}", "web", 400) for i in range(4)]
+    internal = [item("int_1", "internal", 400)]
+    per_item = estimate_tokens(web[0])
+
+    kept, pruned = prune(web + internal, budget=per_item * 3, quotas={"web": 0.34, "internal": 0.66})
+
+    # web gets one item from its quota, internal fills its own, the leftover budget goes to the next best
+    assert [k["source_id"] for k in kept] == ["web_0", "web_1", "int_1"]
+    assert {p["source_id"]: p["reason"] for p in pruned} == {"web_2": "over budget", "web_3": "over budget"}
+
+
+def test_higher_scores_are_kept_first_and_original_order_is_preserved():
+    research = [
+        item("web_low", "web", 400, url="https://pinterest.com/pin"),
+        item("web_high", "web", 400, url="https://arxiv.org/abs/1"),
+        {"source_id": "user_context", "source": "user", "title": "User Provided Context", "content": "x" * 400},
+    ]
+    budget = estimate_tokens(research[1]) + estimate_tokens(research[2])
+
+    kept, pruned = prune(research, budget=budget, quotas={"web": 1.0})
+
+    assert [k["source_id"] for k in kept] == ["web_high", "user_context"]
+    assert pruned[0]["source_id"] == "web_low"
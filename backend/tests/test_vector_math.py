@@ -0,0 +1,60 @@
+import numpy as np
+
+from app.utils.vector_math import mmr_select, spherical_kmeans
+
+
+def test_mmr_skips_near_duplicates_of_picked_rows():
+    query = np.array([1.0, 0.0, 0.0])
+    candidates = np.array([
+        [0.95, 0.30, 0.0],   # most relevant
+        [0.94, 0.31, 0.0],   # near-duplicate of the first
+        [0.80, 0.0, 0.60],   # less relevant but different
+    ])
+
+    assert mmr_select(query, candidates, k=2, lambda_mult=0.5) == [0, 2]
+    # lambda=1 is plain relevance ranking
+    assert mmr_select(query, candidates, k=2, lambda_mult=1.0) == [0, 1]
+
+
+def test_mmr_caps_rows_per_group():
+    query = np.array([1.0, 0.0])
+    candidates = np.array([[1.0, 0.0], [0.99, 0.1], [0.98, 0.2], [0.5, 0.5]])
+
+    picked = mmr_select(query, candidates, k=3, lambda_mult=1.0, groups=["a", "a", "a", "b"], max_per_group=2)
+
+    assert picked == [0, 1, 3]
+
+
+def test_mmr_handles_small_and_empty_inputs():
+    query = np.array([1.0, 0.0])
+    assert mmr_select(query, np.zeros((0, 2)), k=3) == []
+    assert mmr_select(query, np.array([[1.0, 0.0]]), k=3) == [0]
+    assert mmr_select(query, np.array([[1.0, 0.0], [0.9, 0.1]]), k=3, groups=["a", "a"], max_per_group=1) == [0]
+
+
+def blobs(seed=0):
+    rng = np.random.default_rng(seed)
+    centers = np.eye(3, 8) * 5
+    return np.vstack([center + rng.normal(scale=0.3, size=(10, 8)) for center in centers])
+
+
+def test_spherical_kmeans_separates_clusters_deterministically():
+    points = blobs()
+
+    labels, centroids = spherical_kmeans(points, 3)
+
+    assert centroids.shape == (3, 8)
+    assert np.allclose(np.linalg.norm(centroids, axis=1), 1.0, atol=1e-5)
+    # Each blob ends up in a cluster of its own
+    assert sorted(len(set(labels[i:i + 10])) for i in (0, 10, 20)) == [1, 1, 1]
+    assert len(set(labels)) == 3
+    assert np.array_equal(spherical_kmeans(points, 3)[0], labels)
+
+
+def test_spherical_kmeans_handles_small_inputs():
+    labels, centroids = spherical_kmeans(np.zeros((0, 4)), 3)
+    assert labels.shape == (0,) and centroids.shape == (0, 4)
+
+    labels, centroids = spherical_kmeans(np.array([[1.0, 0.0], [0.0, 1.0]]), 5)
+    assert sorted(labels.tolist()) == [0, 1]
+    assert centroids.shape == (2, 2)
@@ -0,0 +1,27 @@
+from app.services.vector_store import batch_vectors, estimate_record_bytes
+
+
+def records(n, dim=8, text=""):
+    return [(f"v{i}", [0.1] * dim, {"text": text}) for i in range(n)]
+
+
+def test_batches_respect_count_limit_and_keep_order():
+    batches = batch_vectors(records(25), max_bytes=10_000_000, max_vectors=10)
+
+    assert [len(b) for b in batches] == [10, 10, 5]
+    assert [r[0] for b in batches for r in b] == [f"v{i}" for i in range(25)]
+
+
+def test_batches_respect_size_limit():
+    vectors = records(10, dim=100, text="x" * 1000)
+    size = estimate_record_bytes(vectors[0])
+
+    batches = batch_vectors(vectors, max_bytes=3 * size, max_vectors=1000)
+
+    assert [len(b) for b in batches] == [3, 3, 3, 1]
+
+
+def test_oversized_record_gets_its_own_batch():
+    vectors = records(1, text="x" * 5000) + records(2)
+    assert [len(b) for b in batch_vectors(vectors, max_bytes=1000, max_vectors=1000)] == [1, 2]
+    assert batch_vectors([], max_bytes=1000, max_vectors=10) == []
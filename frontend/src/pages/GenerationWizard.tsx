@@ -63,6 +63,7 @@ export const GenerationWizard = () => {
   const [isAnalyzingStyle, setIsAnalyzingStyle] = useState(false);
   const [researchSources, setResearchSources] = useState<string[]>(['web', 'internal']);
   const [deepResearchMode, setDeepResearchMode] = useState(false);
+  const [fastQueryMode, setFastQueryMode] = useState(false);
   const [blogSize, setBlogSize] = useState<'small' | 'medium' | 'large'>('medium');
   
   // New Research Brief State
@@ -209,6 +210,7 @@ export const GenerationWizard = () => {
         profile_id: (selectedProfileId && selectedProfileId !== '_none') ? selectedProfileId : undefined,
         research_sources: researchSources,
         deep_research_mode: deepResearchMode,
+        fast_query_mode: fastQueryMode,
         blog_size: blogSize,
         target_audience: targetAudience,
         research_guidelines: researchGuidelines.split('\n').filter(l => l.trim() !== ''),
@@ -631,6 +633,24 @@ export const GenerationWizard = () => {
                 </div>
               </div>
 
+              <div className="flex items-center space-x-2 border p-3 rounded-md bg-muted/20">
+                <input
+                  type="checkbox"
+                  id="fastQueryMode"
+                  className="h-4 w-4 rounded border-gray-300 text-primary focus:ring-primary"
+                  checked={fastQueryMode}
+                  onChange={(e) => setFastQueryMode(e.target.checked)}
+                />
+                <div className="space-y-1 leading-none">
+                  <Label htmlFor="fastQueryMode" className="cursor-pointer font-medium">
+                    Fast Query Generation
+                  </Label>
+                  <p className="text-xs text-muted-foreground">
+                    Builds search queries from key phrases instead of an LLM call, so research starts immediately.
+                  </p>
+                </div>
+              </div>
+
               <div className="flex items-center space-x-2 border p-3 rounded-md bg-muted/20">
                 <input
                   type="checkbox"